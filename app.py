@@ -1,28 +1,65 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import json
+import os
 from datetime import datetime, timedelta
-import yfinance as yf
-import matplotlib.pyplot as plt
-import io
-import base64
-from streamlit_drawable_canvas import st_canvas
-from data_manager import DataManager
 from utils import get_common_mistakes, get_trading_rules, get_good_practices
-from user_manager import UserManager
+from user_manager import UserManager, HashQueueFull
+from tracing import tracer, traced, to_chrome_trace, top_stacks
+from watch_registry import WatchRegistry
 
-# Initialize data manager
+# pandas, plotly and the market data/charting modules are imported inside the
+# views that use them, so the login screen and cold sessions don't pay for them
+
+# Chart window whose bars feed the watchlist metrics table
+METRICS_PERIOD = "5d"
+
+# "views" runs only the selected view on each rerun; "tabs" renders all six as st.tabs
+NAVIGATION_MODE = os.environ.get("DAYTRADER_NAVIGATION", "views")
+
+# Per-user data managers, bounded in count and cached bytes
 @st.cache_resource
+def get_data_manager_pool():
+    from data_manager_pool import DataManagerPool
+    return DataManagerPool()
+
 def get_data_manager(username=None):
-    from data_manager import DataManager
-    return DataManager(username=username)
+    return get_data_manager_pool().get(username)
 
 # Initialize user manager
 @st.cache_resource
 def get_user_manager():
     return UserManager()
 
+# Shared on-disk OHLCV cache
+@st.cache_resource
+def get_bar_store():
+    from market_data import BarStore
+    return BarStore()
+
+# Built chart figures, shared across sessions
+@st.cache_resource
+def get_figure_cache():
+    from charting import FigureCache
+    return FigureCache()
+
+# Every active session's today list; cheap, so it runs on every view
+@st.cache_resource
+def get_watch_registry():
+    return WatchRegistry()
+
+# Background refresh of every active user's watched symbols, started by the
+# first Trading Day render so other views never load market data
+@st.cache_resource
+def get_refresh_scheduler():
+    from market_data import RefreshScheduler
+    scheduler = RefreshScheduler(get_bar_store(), registry=get_watch_registry())
+    scheduler.start()
+    return scheduler
+
+def watch_today_stocks(dm):
+    """Keep the background refresh in step with this session's watchlist"""
+    get_watch_registry().watch(dm.username, [stock['symbol'] for stock in dm.get_today_stocks()])
+
 def login_registration_modal():
     st.header("Login or Register")
     user_manager = get_user_manager()
@@ -31,7 +68,12 @@ def login_registration_modal():
         username = st.text_input("Username", key="login_username")
         password = st.text_input("Password", type="password", key="login_password")
         if st.button("Login"):
-            if user_manager.authenticate_user(username, password):
+            try:
+                authenticated = user_manager.authenticate_user(username, password)
+            except HashQueueFull as e:
+                st.warning(str(e))
+                st.stop()
+            if authenticated:
                 st.session_state["logged_in"] = True
                 st.session_state["username"] = username
                 st.success("Logged in successfully!")
@@ -70,82 +112,80 @@ def main():
     # Initialize user-specific data manager
     username = st.session_state.get("username")
     dm = get_data_manager(username=username)
+    watch_today_stocks(dm)
     
-    # Create tabs
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
-        "🌅 Morning Setup", 
-        "📋 Longterm Playbook", 
-        "📊 Trading Day", 
-        "🌙 End-of-day Reflection", 
-        "📑 Weekly Scorecard"
-    ])
-    
-    with tab1:
-        morning_setup_tab(dm)
-    
-    with tab2:
-        longterm_playbook_tab(dm)
-    
-    with tab3:
-        trading_day_tab(dm)
-    
-    with tab4:
-        end_of_day_reflection_tab(dm)
+    if NAVIGATION_MODE == "tabs":
+        # Every tab body runs on each rerun
+        for tab, view in zip(st.tabs(list(VIEWS)), VIEWS.values()):
+            with tab:
+                view(dm)
+    else:
+        # Only the selected view runs, so a rerun costs one view
+        labels = list(VIEWS)
+        if hasattr(st, "segmented_control"):
+            active = st.segmented_control("View", labels, default=labels[0], key="active_view",
+                                          label_visibility="collapsed")
+        else:
+            active = st.radio("View", labels, key="active_view", horizontal=True,
+                              label_visibility="collapsed")
+        VIEWS[active or labels[0]](dm)
     
-    with tab5:
-        weekly_scorecard_tab(dm)
+    if tracer.enabled:
+        trace_panel(tracer.end_rerun())
 
+def trace_panel(rerun):
+    """Developer sidebar panel with the last rerun's span timeline"""
+    import pandas as pd
+    
+    with st.sidebar.expander("🛠 Rerun Trace"):
+        st.caption(f"Last rerun: {rerun.duration * 1000:.1f} ms, {len(rerun.spans)} spans")
+        if rerun.spans:
+            spans = sorted(rerun.spans, key=lambda s: s['start_ms'])
+            st.dataframe(pd.DataFrame({
+                'Span': ["· " * s['depth'] + s['name'] for s in spans],
+                'Start (ms)': [round(s['start_ms'], 1) for s in spans],
+                'Duration (ms)': [round(s['duration_ms'], 2) for s in spans],
+            }), hide_index=True)
+        
+        reruns = tracer.get_reruns()
+        durations = sorted(r.duration * 1000 for r in reruns)
+        st.caption(f"Last {len(reruns)} reruns: median {durations[len(durations) // 2]:.1f} ms, "
+                   f"max {durations[-1]:.1f} ms")
+        pool = get_data_manager_pool().get_stats()
+        st.caption(f"Data managers: {pool['resident']} resident, "
+                   f"{pool['cache_bytes'] / 1024:.0f} KiB cached, evictions {pool['evictions']}")
+        st.download_button(
+            "Download Chrome trace",
+            json.dumps(to_chrome_trace(reruns)),
+            file_name="daytrader_trace.json",
+            mime="application/json"
+        )
+        
+        if tracer.profile:
+            st.markdown("**Slowest reruns (sampled)**")
+            for slow in tracer.get_slowest():
+                started = datetime.fromtimestamp(slow.started_at).strftime('%H:%M:%S')
+                st.caption(f"{slow.duration * 1000:.1f} ms at {started}")
+                st.dataframe(pd.DataFrame(top_stacks(slow.profile)), hide_index=True)
+
+@traced
 def morning_setup_tab(dm):
     st.header("Morning Setup")
     
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.subheader("📝 Add Today's Stocks")
-        
-        # Add new stock for today
-        with st.form("add_today_stock"):
-            new_stock = st.text_input("Stock Symbol", placeholder="e.g., AAPL").upper()
-            reason = st.text_area("Reason for watching", placeholder="Enter why you're watching this stock")
-            submitted = st.form_submit_button("Add Stock")
-            
-            if submitted and new_stock:
-                dm.add_today_stock(new_stock, reason)
-                st.success(f"Added {new_stock} to today's watchlist!")
-                st.rerun()
-    
-    with col2:
-        st.subheader("🗑️ Remove Today's Stocks")
-        today_stocks = dm.get_today_stocks()
-        if today_stocks:
-            stock_to_remove = st.selectbox("Select stock to remove", 
-                                         options=[f"{stock['symbol']} - {stock['reason']}" for stock in today_stocks])
-            if st.button("Remove Selected Stock"):
-                symbol = stock_to_remove.split(" - ")[0]
-                dm.remove_today_stock(symbol)
-                st.success(f"Removed {symbol} from today's watchlist!")
-                st.rerun()
+    today_watchlist_panel(dm)
     
-    # Display current watchlists
-    st.subheader("📊 Current Watchlists")
+    # Display other watchlists
+    st.subheader("📊 Other Watchlists")
     
-    col1, col2, col3 = st.columns(3)
+    col1, col2 = st.columns(2)
     
     with col1:
-        st.write("**Today's Stocks**")
-        today_stocks = dm.get_today_stocks()
-        if today_stocks:
-            for stock in today_stocks:
-                st.write(f"• {stock['symbol']}: {stock['reason']}")
-        else:
-            st.write("No stocks added for today")
-    
-    with col2:
         st.write("**Last Week's Stocks**")
         last_week_stocks = dm.get_last_week_stocks()
         if last_week_stocks:
+            last_week_plans = dm.get_stock_trading_plans_for([stock['symbol'] for stock in last_week_stocks])
             for stock in last_week_stocks:
-                stock_plan = dm.get_stock_trading_plan(stock['symbol'])
+                stock_plan = last_week_plans[stock['symbol']]
                 plan_indicator = " 📋" if stock_plan else ""
                 
                 with st.expander(f"{stock['symbol']}{plan_indicator} - {stock['reason']}", expanded=False):
@@ -154,6 +194,7 @@ def morning_setup_tab(dm):
                         if st.button(f"Add to Today", key=f"add_{stock['symbol']}"):
                             dm.add_today_stock(stock['symbol'], stock['reason'])
                             st.success(f"Added {stock['symbol']} to today's watchlist!")
+                            # Today's list lives in another panel, so refresh the page
                             st.rerun()
                     
                     with col_b:
@@ -170,12 +211,13 @@ def morning_setup_tab(dm):
         else:
             st.write("No stocks from last week")
     
-    with col3:
+    with col2:
         st.write("**Permanent Watchlist**")
         permanent_stocks = dm.get_permanent_stocks()
         if permanent_stocks:
+            permanent_plans = dm.get_stock_trading_plans_for([stock['symbol'] for stock in permanent_stocks])
             for stock in permanent_stocks:
-                stock_plan = dm.get_stock_trading_plan(stock['symbol'])
+                stock_plan = permanent_plans[stock['symbol']]
                 plan_indicator = " 📋" if stock_plan else ""
                 
                 with st.expander(f"{stock['symbol']}{plan_indicator} - {stock['reason']}", expanded=False):
@@ -200,6 +242,47 @@ def morning_setup_tab(dm):
         else:
             st.write("No permanent stocks")
 
+@st.fragment
+def today_watchlist_panel(dm):
+    """Add/remove widgets and list for today's watchlist; reruns on its own"""
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("📝 Add Today's Stocks")
+        
+        # Add new stock for today
+        with st.form("add_today_stock"):
+            new_stock = st.text_input("Stock Symbol", placeholder="e.g., AAPL").upper()
+            reason = st.text_area("Reason for watching", placeholder="Enter why you're watching this stock")
+            submitted = st.form_submit_button("Add Stock")
+            
+            if submitted and new_stock:
+                dm.add_today_stock(new_stock, reason)
+                watch_today_stocks(dm)
+                st.success(f"Added {new_stock} to today's watchlist!")
+                st.rerun(scope="fragment")
+    
+    with col2:
+        st.subheader("🗑️ Remove Today's Stocks")
+        today_stocks = dm.get_today_stocks()
+        if today_stocks:
+            stock_to_remove = st.selectbox("Select stock to remove", 
+                                         options=[f"{stock['symbol']} - {stock['reason']}" for stock in today_stocks])
+            if st.button("Remove Selected Stock"):
+                symbol = stock_to_remove.split(" - ")[0]
+                dm.remove_today_stock(symbol)
+                watch_today_stocks(dm)
+                st.success(f"Removed {symbol} from today's watchlist!")
+                st.rerun(scope="fragment")
+        
+        st.write("**Today's Stocks**")
+        if today_stocks:
+            for stock in today_stocks:
+                st.write(f"• {stock['symbol']}: {stock['reason']}")
+        else:
+            st.write("No stocks added for today")
+
+@traced
 def longterm_playbook_tab(dm):
     st.header("Longterm Playbook")
     
@@ -244,57 +327,59 @@ def longterm_playbook_tab(dm):
                 st.rerun()
     
     with col2:
-        st.subheader("🎯 Permanent Watchlist")
-        
-        # Add permanent stock
-        with st.form("add_permanent_stock"):
-            new_perm_stock = st.text_input("Stock Symbol", placeholder="e.g., TSLA").upper()
-            perm_reason = st.text_area("Reason for permanent watch", 
-                                     placeholder="Why is this in your long-term playbook?")
-            if st.form_submit_button("Add to Permanent List"):
-                if new_perm_stock:
-                    dm.add_permanent_stock(new_perm_stock, perm_reason)
-                    st.success(f"Added {new_perm_stock} to permanent watchlist!")
-                    st.rerun()
-        
-        # Display and manage permanent stocks
-        permanent_stocks = dm.get_permanent_stocks()
-        if permanent_stocks:
-            st.write("**Current Permanent Stocks:**")
-            for stock in permanent_stocks:
-                col_a, col_b = st.columns([3, 1])
-                with col_a:
-                    st.write(f"• **{stock['symbol']}**: {stock['reason']}")
-                with col_b:
-                    if st.button("Remove", key=f"remove_perm_{stock['symbol']}"):
-                        dm.remove_permanent_stock(stock['symbol'])
-                        st.success(f"Removed {stock['symbol']} from permanent watchlist!")
-                        st.rerun()
+        permanent_watchlist_panel(dm)
+
+@st.fragment
+def permanent_watchlist_panel(dm):
+    """Add/remove widgets and list for the permanent watchlist; reruns on its own"""
+    st.subheader("🎯 Permanent Watchlist")
+    
+    # Add permanent stock
+    with st.form("add_permanent_stock"):
+        new_perm_stock = st.text_input("Stock Symbol", placeholder="e.g., TSLA").upper()
+        perm_reason = st.text_area("Reason for permanent watch", 
+                                 placeholder="Why is this in your long-term playbook?")
+        if st.form_submit_button("Add to Permanent List"):
+            if new_perm_stock:
+                dm.add_permanent_stock(new_perm_stock, perm_reason)
+                st.success(f"Added {new_perm_stock} to permanent watchlist!")
+                st.rerun(scope="fragment")
+    
+    # Display and manage permanent stocks
+    permanent_stocks = dm.get_permanent_stocks()
+    if permanent_stocks:
+        st.write("**Current Permanent Stocks:**")
+        for stock in permanent_stocks:
+            col_a, col_b = st.columns([3, 1])
+            with col_a:
+                st.write(f"• **{stock['symbol']}**: {stock['reason']}")
+            with col_b:
+                if st.button("Remove", key=f"remove_perm_{stock['symbol']}"):
+                    dm.remove_permanent_stock(stock['symbol'])
+                    st.success(f"Removed {stock['symbol']} from permanent watchlist!")
+                    st.rerun(scope="fragment")
 
-def get_stock_chart(symbol, period="1d", interval="5m"):
-    """Fetch stock data and create a plotly chart"""
+@traced
+def get_stock_chart(symbol, period="1d", interval="5m", zoom=None, max_points=None):
+    """Fetch stock data and create a plotly chart.
+
+    The figure is aggregated to max_points candles (after slicing to the
+    zoom range) and cached until the underlying bars change.
+    """
+    from charting import build_candlestick_figure, point_budget, zoom_bars
+    
     try:
-        stock = yf.Ticker(symbol)
-        data = stock.history(period=period, interval=interval)
+        data = get_bar_store().get_bars(symbol, period=period, interval=interval)
         
         if data.empty:
             return None, None
-            
-        fig = go.Figure(data=go.Candlestick(
-            x=data.index,
-            open=data['Open'],
-            high=data['High'],
-            low=data['Low'],
-            close=data['Close'],
-            name=symbol
-        ))
         
-        fig.update_layout(
-            title=f"{symbol} - {period.upper()} Chart",
-            xaxis_title="Time",
-            yaxis_title="Price ($)",
-            height=400,
-            showlegend=False
+        max_points = max_points or point_budget()
+        shown = zoom_bars(data, zoom)
+        key = (symbol, period, interval, max_points, tuple(zoom or ()), shown.index[0], shown.index[-1],
+               len(shown), float(shown['Close'].iloc[-1]))
+        fig = get_figure_cache().get_or_build(
+            key, lambda: build_candlestick_figure(symbol, shown, period, max_points)
         )
         
         return fig, data
@@ -302,8 +387,14 @@ def get_stock_chart(symbol, period="1d", interval="5m"):
         st.error(f"Error fetching data for {symbol}: {str(e)}")
         return None, None
 
+@traced
 def trading_day_tab(dm):
+    from market_data import CHART_INTERVALS
+    from metrics import compute_watchlist_metrics
+    from plan_levels import evaluate_plan_alerts
+    
     st.header("Trading Day Dashboard")
+    get_refresh_scheduler()
     
     today_stocks = dm.get_today_stocks()
     
@@ -311,6 +402,39 @@ def trading_day_tab(dm):
         st.warning("No stocks selected for today. Go to Morning Setup to add stocks.")
         return
     
+    # Load every watched symbol's default chart and the metrics window in
+    # parallel so switching is instant
+    symbols = [stock['symbol'] for stock in today_stocks]
+    bar_store = get_bar_store()
+    failed = {}
+    for period in ("1d", METRICS_PERIOD):
+        failed.update(bar_store.prefetch(symbols, period=period, interval=CHART_INTERVALS[period])['failed'])
+    if failed:
+        st.caption("⚠️ Could not load data for: " + ", ".join(
+            f"{symbol} ({reason})" for symbol, reason in failed.items()
+        ))
+    
+    # Intraday metrics for the whole watchlist, computed in one batch
+    st.subheader("📈 Watchlist Metrics")
+    watchlist_bars = {
+        symbol: bar_store.get_bars(symbol, METRICS_PERIOD, CHART_INTERVALS[METRICS_PERIOD])
+        for symbol in symbols if symbol not in failed
+    }
+    watchlist_metrics = compute_watchlist_metrics(watchlist_bars)
+    if not watchlist_metrics.empty:
+        st.dataframe(watchlist_metrics.round(2), use_container_width=True)
+        st.caption(f"{CHART_INTERVALS[METRICS_PERIOD]} bars over {METRICS_PERIOD}; "
+                   "click a column header to sort. Rel Volume compares today's volume "
+                   "with prior sessions at the same time of day.")
+    
+        # Check every plan level against today's range in one sweep
+        st.subheader("🚨 Plan Alerts")
+        alerts = evaluate_plan_alerts(dm.get_stock_trading_plans_for(symbols), watchlist_metrics)
+        if not alerts.empty:
+            st.dataframe(alerts.round(2), use_container_width=True, hide_index=True)
+        else:
+            st.info("No plan levels reached today.")
+    
     # Stock selection for detailed analysis
     st.subheader("📊 Select Stock for Analysis")
     selected_stock = st.selectbox(
@@ -325,98 +449,10 @@ def trading_day_tab(dm):
         col1, col2 = st.columns([2, 1])
         
         with col1:
-            st.subheader(f"📈 {symbol} Chart & Trading Plan")
-            
-            # Chart time frame selection
-            time_frame = st.selectbox("Time Frame:", ["1d", "5d", "1mo"], key=f"timeframe_{symbol}")
-            interval_map = {"1d": "5m", "5d": "15m", "1mo": "1h"}
-            interval = interval_map[time_frame]
-            
-            # Get and display chart
-            fig, data = get_stock_chart(symbol, time_frame, interval)
-            
-            if fig is not None:
-                st.plotly_chart(fig, use_container_width=True)
-                
-                # Current price info
-                if data is not None and len(data) > 0:
-                    current_price = data['Close'].iloc[-1]
-                    price_change = data['Close'].iloc[-1] - data['Close'].iloc[0]
-                    price_change_pct = (price_change / data['Close'].iloc[0]) * 100
-                    
-                    col_a, col_b, col_c = st.columns(3)
-                    with col_a:
-                        st.metric("Current Price", f"${current_price:.2f}")
-                    with col_b:
-                        st.metric("Change", f"${price_change:.2f}", f"{price_change_pct:.2f}%")
-                    with col_c:
-                        st.metric("Volume", f"{data['Volume'].iloc[-1]:,.0f}")
-            else:
-                st.error(f"Unable to fetch chart data for {symbol}")
+            chart_panel(symbol)
         
         with col2:
-            st.subheader("📋 Trading Strategy")
-            
-            # Trading plan for this specific stock
-            stock_plans = dm.get_stock_trading_plans()
-            current_plan = stock_plans.get(symbol, {})
-            
-            with st.form(f"trading_plan_{symbol}"):
-                st.write("**Entry Strategy:**")
-                initial_entry = st.text_input(
-                    "Initial Entry Price/Condition:",
-                    value=current_plan.get('initial_entry', ''),
-                    placeholder="e.g., $150.50 on breakout"
-                )
-                
-                entry_size = st.text_input(
-                    "Position Size:",
-                    value=current_plan.get('entry_size', ''),
-                    placeholder="e.g., 100 shares, 1% of portfolio"
-                )
-                
-                st.write("**Scaling Strategy:**")
-                scale_up_condition = st.text_input(
-                    "Scale Up If Reaches:",
-                    value=current_plan.get('scale_up_condition', ''),
-                    placeholder="e.g., $155 - add 50 shares"
-                )
-                
-                scale_down_condition = st.text_input(
-                    "Scale Down/Stop If Drops To:",
-                    value=current_plan.get('scale_down_condition', ''),
-                    placeholder="e.g., $145 - cut 50%, $140 - full stop"
-                )
-                
-                st.write("**Exit Strategy:**")
-                exit_strategy = st.text_area(
-                    "Exit Conditions:",
-                    value=current_plan.get('exit_strategy', ''),
-                    placeholder="e.g., Take 50% at $160, full exit at $165 or stop at $145",
-                    height=80
-                )
-                
-                st.write("**Risk Management:**")
-                wrong_scenario = st.text_area(
-                    "If Completely Wrong:",
-                    value=current_plan.get('wrong_scenario', ''),
-                    placeholder="e.g., Hard stop at $140, reassess strategy, max loss 2%",
-                    height=80
-                )
-                
-                if st.form_submit_button("Save Trading Plan", type="primary"):
-                    plan_data = {
-                        'initial_entry': initial_entry,
-                        'entry_size': entry_size,
-                        'scale_up_condition': scale_up_condition,
-                        'scale_down_condition': scale_down_condition,
-                        'exit_strategy': exit_strategy,
-                        'wrong_scenario': wrong_scenario,
-                        'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    }
-                    dm.save_stock_trading_plan(symbol, plan_data)
-                    st.success(f"Trading plan saved for {symbol}!")
-                    st.rerun()
+            stock_plan_panel(dm, symbol)
     
     # Display all stocks summary
     st.subheader("📊 All Stocks Summary")
@@ -425,8 +461,9 @@ def trading_day_tab(dm):
     
     with col1:
         st.write("**Today's Watchlist:**")
+        today_plans = dm.get_stock_trading_plans_for([stock['symbol'] for stock in today_stocks])
         for stock in today_stocks:
-            stock_plan = dm.get_stock_trading_plan(stock['symbol'])
+            stock_plan = today_plans[stock['symbol']]
             
             # Display stock with expandable plan
             with st.expander(f"📊 {stock['symbol']} - {stock['reason']}", expanded=False):
@@ -471,6 +508,110 @@ def trading_day_tab(dm):
             if len(plan['rules']) > 5:
                 st.write(f"... and {len(plan['rules']) - 5} more")
 
+@st.fragment
+def chart_panel(symbol):
+    """Chart with time frame and zoom controls; reruns on its own"""
+    from market_data import CHART_INTERVALS
+    
+    st.subheader(f"📈 {symbol} Chart & Trading Plan")
+    
+    # Chart time frame selection
+    time_frame = st.selectbox("Time Frame:", list(CHART_INTERVALS), key=f"timeframe_{symbol}")
+    interval = CHART_INTERVALS[time_frame]
+    
+    # Zooming re-aggregates the selected part of the window to the point budget
+    zoom = st.slider("Zoom (% of window):", 0, 100, (0, 100), key=f"zoom_{symbol}_{time_frame}")
+    
+    # Get and display chart
+    fig, data = get_stock_chart(symbol, time_frame, interval, zoom=zoom)
+    
+    if fig is not None:
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Current price info
+        if data is not None and len(data) > 0:
+            current_price = data['Close'].iloc[-1]
+            price_change = data['Close'].iloc[-1] - data['Close'].iloc[0]
+            price_change_pct = (price_change / data['Close'].iloc[0]) * 100
+            
+            col_a, col_b, col_c = st.columns(3)
+            with col_a:
+                st.metric("Current Price", f"${current_price:.2f}")
+            with col_b:
+                st.metric("Change", f"${price_change:.2f}", f"{price_change_pct:.2f}%")
+            with col_c:
+                st.metric("Volume", f"{data['Volume'].iloc[-1]:,.0f}")
+    else:
+        st.error(f"Unable to fetch chart data for {symbol}")
+
+@st.fragment
+def stock_plan_panel(dm, symbol):
+    """Per-stock trading plan form; reruns on its own"""
+    st.subheader("📋 Trading Strategy")
+    
+    # Trading plan for this specific stock
+    stock_plans = dm.get_stock_trading_plans()
+    current_plan = stock_plans.get(symbol, {})
+    
+    with st.form(f"trading_plan_{symbol}"):
+        st.write("**Entry Strategy:**")
+        initial_entry = st.text_input(
+            "Initial Entry Price/Condition:",
+            value=current_plan.get('initial_entry', ''),
+            placeholder="e.g., $150.50 on breakout"
+        )
+        
+        entry_size = st.text_input(
+            "Position Size:",
+            value=current_plan.get('entry_size', ''),
+            placeholder="e.g., 100 shares, 1% of portfolio"
+        )
+        
+        st.write("**Scaling Strategy:**")
+        scale_up_condition = st.text_input(
+            "Scale Up If Reaches:",
+            value=current_plan.get('scale_up_condition', ''),
+            placeholder="e.g., $155 - add 50 shares"
+        )
+        
+        scale_down_condition = st.text_input(
+            "Scale Down/Stop If Drops To:",
+            value=current_plan.get('scale_down_condition', ''),
+            placeholder="e.g., $145 - cut 50%, $140 - full stop"
+        )
+        
+        st.write("**Exit Strategy:**")
+        exit_strategy = st.text_area(
+            "Exit Conditions:",
+            value=current_plan.get('exit_strategy', ''),
+            placeholder="e.g., Take 50% at $160, full exit at $165 or stop at $145",
+            height=80
+        )
+        
+        st.write("**Risk Management:**")
+        wrong_scenario = st.text_area(
+            "If Completely Wrong:",
+            value=current_plan.get('wrong_scenario', ''),
+            placeholder="e.g., Hard stop at $140, reassess strategy, max loss 2%",
+            height=80
+        )
+        
+        if st.form_submit_button("Save Trading Plan", type="primary"):
+            plan_data = {
+                'initial_entry': initial_entry,
+                'entry_size': entry_size,
+                'scale_up_condition': scale_up_condition,
+                'scale_down_condition': scale_down_condition,
+                'exit_strategy': exit_strategy,
+                'wrong_scenario': wrong_scenario,
+                'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+            dm.save_stock_trading_plan(symbol, plan_data)
+            st.success(f"Trading plan saved for {symbol}!")
+            # Alerts and the summary below pick the plan up on the next page rerun
+            st.rerun(scope="fragment")
+
+@traced
 def end_of_day_reflection_tab(dm):
     st.header("End-of-day Reflection")
     
@@ -523,7 +664,11 @@ def end_of_day_reflection_tab(dm):
             dm.save_daily_reflection(reflection_data)
             st.success("Daily reflection saved!")
 
+@traced
 def weekly_scorecard_tab(dm):
+    import pandas as pd
+    import plotly.express as px
+    
     st.header("Weekly Scorecard Summary")
     
     # Get weekly data
@@ -596,5 +741,134 @@ def weekly_scorecard_tab(dm):
         else:
             st.info("No good practices recorded this week")
 
+@traced
+def trade_log_tab(dm):
+    import pandas as pd
+    import plotly.express as px
+    from market_data import CHART_INTERVALS
+    
+    st.header("Trade Log")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("✍️ Log a Fill")
+        with st.form("fill_form", clear_on_submit=True):
+            fill_symbol = st.text_input("Stock Symbol", placeholder="e.g., AAPL").upper()
+            side = st.radio("Side", ["Buy", "Sell"], horizontal=True)
+            quantity = st.number_input("Shares", min_value=0.0, value=100.0, step=1.0)
+            price = st.number_input("Price", min_value=0.0, value=0.0, step=0.01, format="%.2f")
+            fees = st.number_input("Fees", min_value=0.0, value=0.0, step=0.01, format="%.2f")
+            fill_date = st.date_input("Date", value=datetime.now().date())
+            fill_time = st.time_input("Time", value=datetime.now().time().replace(microsecond=0))
+            if st.form_submit_button("Log Fill", type="primary"):
+                try:
+                    dm.add_fill(fill_symbol, side, quantity, price, fees,
+                                datetime.combine(fill_date, fill_time))
+                    st.success(f"Logged {side.lower()} {quantity:g} {fill_symbol} @ ${price:.2f}")
+                except ValueError as e:
+                    st.error(str(e))
+    
+    with col2:
+        st.subheader("📥 Import Broker Fills")
+        uploaded = st.file_uploader(
+            "CSV with time (or separate date and time), symbol, quantity and price columns, "
+            "plus optional side and fees",
+            type=["csv"]
+        )
+        # The uploader keeps its file across reruns; import each upload once
+        upload_key = f"{uploaded.name}:{uploaded.size}" if uploaded else None
+        if uploaded and st.session_state.get("imported_fills_file") != upload_key:
+            try:
+                count = dm.import_fills(pd.read_csv(uploaded))
+                st.session_state["imported_fills_file"] = upload_key
+                st.success(f"Imported {count:,} fills from {uploaded.name}")
+            except (ValueError, pd.errors.ParserError) as e:
+                st.error(f"Could not import {uploaded.name}: {e}")
+    
+    fills = dm.get_fills()
+    if fills.empty:
+        st.info("No fills logged yet. Log a fill or import your broker's execution history.")
+        return
+    
+    # Value open positions at the latest 1d close
+    analytics = dm.get_trade_analytics()
+    open_symbols = sorted(analytics['trips'].loc[~analytics['trips']['closed'], 'symbol'].astype(str).unique())
+    if open_symbols:
+        bar_store = get_bar_store()
+        failed = bar_store.prefetch(open_symbols, period="1d", interval=CHART_INTERVALS["1d"])['failed']
+        marks = {}
+        for symbol in open_symbols:
+            if symbol not in failed:
+                bars = bar_store.get_bars(symbol, "1d", CHART_INTERVALS["1d"])
+                if not bars.empty:
+                    marks[symbol] = float(bars['Close'].iloc[-1])
+        analytics = dm.get_trade_analytics(marks)
+    trips, summary = analytics['trips'], analytics['summary']
+    
+    st.subheader("💰 Performance")
+    format_money = lambda value: "—" if value is None else f"${value:,.2f}"
+    format_share = lambda value: "—" if value is None else f"{value:.0%}"
+    metric_cols = st.columns(5)
+    metric_cols[0].metric("Realized P&L", format_money(summary['realized']))
+    metric_cols[1].metric("Unrealized P&L", format_money(summary['unrealized']))
+    metric_cols[2].metric("Win Rate", format_share(summary['win_rate']))
+    metric_cols[3].metric("Avg R", "—" if summary['avg_r'] is None else f"{summary['avg_r']:.2f}R")
+    metric_cols[4].metric("Profit Factor",
+                          "—" if summary['profit_factor'] is None else f"{summary['profit_factor']:.2f}")
+    st.caption(f"{summary['trades']:,} closed round trips and {summary['open_trades']} open positions "
+               f"from {len(fills):,} fills. A round trip runs from flat to flat.")
+    if summary['unmarked_positions']:
+        st.caption(f"⚠️ No latest price for {summary['unmarked_positions']} open position(s)")
+    
+    st.subheader("📋 Plan Adherence")
+    adherence_cols = st.columns(3)
+    adherence_cols[0].metric("Trades on Planned Stocks", format_share(summary['planned_share']))
+    adherence_cols[1].metric("Trades with a Plan Stop", format_share(summary['with_stop_share']))
+    adherence_cols[2].metric("Losers Held to the Stop", format_share(summary['stop_respected_share']))
+    st.caption("R-multiples measure each trip's P&L against the risk to the stop in the stock's "
+               "current plan (\"If Wrong\" levels). A loser held to the stop lost at most 1.1R.")
+    
+    daily = analytics['daily']
+    if not daily.empty:
+        st.subheader("📈 Daily P&L")
+        fig = px.bar(daily, x='date', y='realized', title="Realized P&L by Day")
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Does the self-reported discipline score line up with results?
+        scores = pd.DataFrame([
+            {'date': r['date'], 'discipline_score': r['discipline_score']}
+            for r in dm.get_daily_reflections() if r.get('discipline_score') is not None
+        ], columns=['date', 'discipline_score'])
+        scored_days = daily.merge(scores, on='date')
+        if len(scored_days) >= 2:
+            fig = px.scatter(scored_days, x='discipline_score', y='realized', hover_data=['date'],
+                             title="Discipline Score vs Realized P&L")
+            st.plotly_chart(fig, use_container_width=True)
+    
+    st.subheader("🔁 Round Trips")
+    recent = trips.sort_values('entry_time', ascending=False).head(200)
+    st.dataframe(
+        recent[['symbol', 'direction', 'entry_time', 'exit_time', 'fills', 'max_position',
+                'avg_entry', 'avg_exit', 'realized', 'unrealized', 'stop', 'r_multiple']].round(2),
+        use_container_width=True, hide_index=True
+    )
+    if len(trips) > len(recent):
+        st.caption(f"Latest {len(recent)} of {len(trips):,} round trips")
+
+VIEWS = {
+    "🌅 Morning Setup": morning_setup_tab,
+    "📋 Longterm Playbook": longterm_playbook_tab,
+    "📊 Trading Day": trading_day_tab,
+    "🌙 End-of-day Reflection": end_of_day_reflection_tab,
+    "📑 Weekly Scorecard": weekly_scorecard_tab,
+    "💹 Trade Log": trade_log_tab,
+}
+
 if __name__ == "__main__":
-    main()
+    tracer.begin_rerun()
+    try:
+        main()
+    finally:
+        # No-op if main() already closed the rerun
+        tracer.end_rerun()
@@ -0,0 +1,113 @@
+"""Benchmark the charting and metrics path against the offline replay provider.
+
+Runs without network access: bars come from ReplayProvider (recordings in
+--replay-dir, or deterministic synthetic data) with a configurable simulated
+latency. Exits non-zero if prefetching the watchlist takes longer than
+one round of parallel requests, i.e. about the slowest single request plus
+the CPU cost of the bars. Run from the repository root:
+
+    python benchmarks/bench_chart_path.py --symbols 30 --latency 0.2
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_data import BarStore, ReplayProvider
+
+WINDOWS = {"1d": "5m", "5d": "15m", "1mo": "1h"}
+
+
+def build_figure(symbol, bars):
+    """Same candlestick figure as app.get_stock_chart"""
+    import plotly.graph_objects as go
+    fig = go.Figure(data=go.Candlestick(
+        x=bars.index,
+        open=bars['Open'],
+        high=bars['High'],
+        low=bars['Low'],
+        close=bars['Close'],
+        name=symbol
+    ))
+    fig.update_layout(height=400, showlegend=False)
+    return fig
+
+
+def price_metrics(bars):
+    """Same metrics as the Trading Day tab"""
+    current_price = bars['Close'].iloc[-1]
+    price_change = current_price - bars['Close'].iloc[0]
+    return current_price, price_change, price_change / bars['Close'].iloc[0] * 100, bars['Volume'].iloc[-1]
+
+
+def timed(func, *args, repeat=1):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return result, timings
+
+
+def report(label, timings):
+    timings_ms = sorted(t * 1000 for t in timings)
+    p50 = statistics.median(timings_ms)
+    p99 = timings_ms[min(len(timings_ms) - 1, int(len(timings_ms) * 0.99))]
+    print(f"{label:<38} p50 {p50:9.2f} ms   p99 {p99:9.2f} ms   n={len(timings_ms)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=30)
+    parser.add_argument('--latency', type=float, default=0.2, help='Simulated seconds per provider request')
+    parser.add_argument('--replay-dir', default=os.path.join('data', 'replay'))
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i:03d}" for i in range(args.symbols)]
+    provider = ReplayProvider(data_dir=args.replay_dir, latency=args.latency)
+    store = BarStore(cache_dir=tempfile.mkdtemp(prefix='bench_bars_'), provider=provider)
+
+    print(f"{args.symbols} symbols, {args.latency * 1000:.0f} ms simulated latency\n")
+
+    _, cold = timed(store.get_bars, symbols[0], "1d", "5m")
+    report("cold get_bars (provider fetch)", cold)
+    _, warm = timed(store.get_bars, symbols[0], "1d", "5m", repeat=args.repeat)
+    report("warm get_bars (cache slice)", warm)
+
+    result, prefetch = timed(store.prefetch, symbols[1:], "1d", "5m")
+    report(f"prefetch {len(symbols) - 1} symbols", prefetch)
+    if result['failed']:
+        print(f"  failed: {result['failed']}")
+    print(f"  sequential estimate {args.latency * (len(symbols) - 1) * 1000:9.2f} ms")
+
+    # The same prefetch without latency is the CPU cost; on top of that the
+    # whole watchlist should wait for a single round of requests
+    cpu_store = BarStore(cache_dir=tempfile.mkdtemp(prefix='bench_bars_'),
+                         provider=ReplayProvider(data_dir=args.replay_dir), max_workers=store.max_workers)
+    _, cpu = timed(cpu_store.prefetch, symbols[1:], "1d", "5m")
+    budget = cpu[0] + 1.5 * args.latency
+    print(f"  without latency     {cpu[0] * 1000:9.2f} ms, budget for one request round {budget * 1000:.2f} ms")
+    if prefetch[0] > budget:
+        print(f"Prefetch took {prefetch[0] * 1000:.0f} ms, more than one round of requests "
+              f"({len(symbols) - 1} symbols, {store.max_workers} workers)")
+        sys.exit(1)
+
+    for period, interval in WINDOWS.items():
+        bars = store.get_bars(symbols[0], period, interval)
+        _, metric_timings = timed(price_metrics, bars, repeat=args.repeat)
+        report(f"price metrics {period}/{interval} ({len(bars)} bars)", metric_timings)
+        try:
+            _, figure_timings = timed(build_figure, symbols[0], bars, repeat=max(1, args.repeat // 5))
+        except ImportError:
+            continue
+        report(f"candlestick figure {period}/{interval}", figure_timings)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+"""Benchmark DataManager and scorecard hot paths on synthetic users.
+
+Generates a user with configurable history depth, then times the
+DataManager calls the app makes plus a simulated rerun of each tab's data
+work, reporting p50/p99 latency and peak traced memory per operation.
+Results can be saved as a baseline and later runs compared against it.
+Run from the repository root:
+
+    python benchmarks/bench_data_manager.py --years 5 --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_data_manager.py --years 5 --compare benchmarks/baseline.json
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_manager import DataManager
+from storage import create_storage
+from utils import get_common_mistakes, get_trading_rules, get_good_practices
+
+SYMBOLS = [f"SYM{i:04d}" for i in range(2000)]
+
+
+# Synthetic data
+def populate(dm, years, reflections, plans, watchlist, seed=0):
+    """Fill a user's storage with history, reflections, plans and watchlists"""
+    rng = random.Random(seed)
+    storage = dm.storage
+    today = datetime.now()
+
+    day = today - timedelta(days=int(years * 365))
+    while day < today:
+        if day.weekday() < 5:
+            date = day.strftime('%Y-%m-%d')
+            storage.archive_stocks(date, [
+                {'symbol': symbol, 'reason': f"Setup on {date}", 'date_added': date}
+                for symbol in rng.sample(SYMBOLS, rng.randint(5, 20))
+            ])
+        day += timedelta(days=1)
+
+    mistakes, rules, practices = get_common_mistakes(), get_trading_rules(), get_good_practices()
+    for i in range(reflections):
+        date = (today - timedelta(days=reflections - i)).strftime('%Y-%m-%d')
+        storage.save_reflection({
+            'date': date,
+            'broken_rules': rng.sample(rules, rng.randint(0, 3)),
+            'mistakes_made': rng.sample(mistakes, rng.randint(0, 4)),
+            'good_practices': rng.sample(practices, rng.randint(0, 5)),
+            'discipline_score': rng.randint(1, 10),
+            'reflection_notes': "Notes " * rng.randint(5, 60)
+        })
+
+    for symbol in SYMBOLS[:plans]:
+        dm.save_stock_trading_plan(symbol, {
+            'initial_entry': f"${rng.uniform(10, 500):.2f} on breakout",
+            'entry_size': "100 shares",
+            'scale_up_condition': f"${rng.uniform(10, 500):.2f} - add 50 shares",
+            'scale_down_condition': f"${rng.uniform(10, 500):.2f} - cut 50%",
+            'exit_strategy': "Take 50% at target, trail the rest",
+            'wrong_scenario': f"Hard stop at ${rng.uniform(10, 500):.2f}",
+            'last_updated': today.strftime('%Y-%m-%d %H:%M:%S')
+        })
+
+    for symbol in SYMBOLS[:watchlist]:
+        dm.add_permanent_stock(symbol, "Long-term leader")
+    dm.save_trading_plan({'rules': rules[:8], 'setup_criteria': "Breakouts on volume"})
+
+
+# Simulated tab reruns: the DataManager calls each app.py tab makes
+def rerun_morning_setup(dm):
+    dm.get_today_stocks()
+    last_week = dm.get_last_week_stocks()
+    dm.get_stock_trading_plans_for([s['symbol'] for s in last_week])
+    permanent = dm.get_permanent_stocks()
+    dm.get_stock_trading_plans_for([s['symbol'] for s in permanent])
+
+
+def rerun_longterm_playbook(dm):
+    dm.get_trading_plan()
+    dm.get_permanent_stocks()
+
+
+def rerun_trading_day(dm):
+    today_stocks = dm.get_today_stocks()
+    symbols = [s['symbol'] for s in today_stocks]
+    dm.get_stock_trading_plans_for(symbols)
+    dm.get_stock_trading_plans()
+    dm.get_stock_trading_plans_for(symbols)
+    dm.get_most_common_mistake_last_week()
+    dm.get_trading_plan()
+
+
+def rerun_end_of_day_reflection(dm):
+    dm.get_trading_plan()
+
+
+def rerun_weekly_scorecard(dm):
+    dm.get_weekly_scorecard_data()
+
+
+def rerun_all_tabs(dm):
+    rerun_morning_setup(dm)
+    rerun_longterm_playbook(dm)
+    rerun_trading_day(dm)
+    rerun_end_of_day_reflection(dm)
+    rerun_weekly_scorecard(dm)
+
+
+def make_operations(rng):
+    counter = iter(range(10 ** 9))
+    today = datetime.now().strftime('%Y-%m-%d')
+    return {
+        'add_today_stock': lambda dm: dm.add_today_stock(f"NEW{next(counter)}", "Gap up"),
+        'get_last_week_stocks': lambda dm: dm.get_last_week_stocks(),
+        'save_daily_reflection': lambda dm: dm.save_daily_reflection({
+            'date': today,
+            'broken_rules': [],
+            'mistakes_made': rng.sample(get_common_mistakes(), 2),
+            'good_practices': [],
+            'discipline_score': rng.randint(1, 10),
+            'reflection_notes': "Benchmark"
+        }),
+        'get_weekly_scorecard_data': lambda dm: dm.get_weekly_scorecard_data(),
+        'rerun_morning_setup': rerun_morning_setup,
+        'rerun_longterm_playbook': rerun_longterm_playbook,
+        'rerun_trading_day': rerun_trading_day,
+        'rerun_end_of_day_reflection': rerun_end_of_day_reflection,
+        'rerun_weekly_scorecard': rerun_weekly_scorecard,
+        'rerun_all_tabs': rerun_all_tabs,
+    }
+
+
+# Measurement
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def measure(operation, get_dm, iterations):
+    timings = []
+    for _ in range(iterations):
+        dm = get_dm()
+        start = time.perf_counter()
+        operation(dm)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+
+    # Peak memory in a separate traced run, so tracing overhead stays out of the timings
+    dm = get_dm()
+    gc.collect()
+    tracemalloc.start()
+    operation(dm)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'p50_ms': statistics.median(timings) * 1000,
+        'p99_ms': percentile(timings, 0.99) * 1000,
+        'peak_kib': peak / 1024
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print ratios against a baseline; return the names that regressed"""
+    regressions = []
+    print(f"\n{'operation':<30} {'p50 vs base':>12} {'p99 vs base':>12} {'peak vs base':>13}")
+    for name, result in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            continue
+        ratios = [result[key] / base[key] if base[key] else 1.0 for key in ('p50_ms', 'p99_ms', 'peak_kib')]
+        flag = "  REGRESSION" if ratios[0] > threshold or ratios[2] > threshold else ""
+        print(f"{name:<30} {ratios[0]:>11.2f}x {ratios[1]:>11.2f}x {ratios[2]:>12.2f}x{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=float, default=3, help='Years of watchlist history (1-10)')
+    parser.add_argument('--reflections', type=int, default=2000)
+    parser.add_argument('--plans', type=int, default=300)
+    parser.add_argument('--watchlist', type=int, default=50, help='Permanent watchlist size')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--backend', default='json', choices=['json', 'sqlite'])
+    parser.add_argument('--cold', action='store_true',
+                        help='Use a fresh DataManager (empty caches) for every iteration')
+    parser.add_argument('--only', default=None, help='Comma-separated operation names to run')
+    parser.add_argument('--save-baseline', metavar='PATH')
+    parser.add_argument('--compare', metavar='PATH')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='Ratio over baseline p50 or peak memory counted as a regression')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_dm_')
+    os.chdir(workdir)
+
+    def new_dm():
+        return DataManager(username='bench', storage=create_storage('bench', args.backend))
+
+    print(f"Generating {args.years:g} years of history, {args.reflections} reflections, "
+          f"{args.plans} plans ({args.backend} backend) in {workdir}")
+    start = time.perf_counter()
+    shared_dm = new_dm()
+    populate(shared_dm, args.years, args.reflections, args.plans, args.watchlist)
+    print(f"Generated in {time.perf_counter() - start:.1f}s\n")
+
+    get_dm = new_dm if args.cold else (lambda: shared_dm)
+    operations = make_operations(random.Random(1))
+    if args.only:
+        operations = {name: operations[name] for name in args.only.split(',')}
+
+    results = {}
+    print(f"{'operation':<30} {'p50 (ms)':>10} {'p99 (ms)':>10} {'peak (KiB)':>11}")
+    for name, operation in operations.items():
+        results[name] = measure(operation, get_dm, args.iterations)
+        r = results[name]
+        print(f"{name:<30} {r['p50_ms']:>10.3f} {r['p99_ms']:>10.3f} {r['peak_kib']:>11.1f}")
+
+    run = {
+        'params': {key: getattr(args, key) for key in
+                   ('years', 'reflections', 'plans', 'watchlist', 'iterations', 'backend', 'cold')},
+        'results': results
+    }
+    exit_code = 0
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('params') != run['params']:
+            print(f"\nWarning: baseline parameters differ: {baseline.get('params')}")
+        if compare(results, baseline, args.threshold):
+            exit_code = 1
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f"\nSaved baseline to {args.save_baseline}")
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
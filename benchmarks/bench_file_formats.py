@@ -0,0 +1,144 @@
+"""Benchmark the on-disk file formats against pretty-printed JSON.
+
+Builds synthetic history partitions, stock plans and reflections, checks
+that each format round-trips them unchanged (through file_formats and
+through JsonStorage on disk), then reports serialize and parse time and
+file size for each format relative to "json". Formats whose packages are
+missing are skipped. Exits non-zero on a round-trip mismatch. Run from
+the repository root:
+
+    python benchmarks/bench_file_formats.py --days 250 --repeat 20
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_formats import FILE_FORMATS, decode, detect_format, encode
+from storage import JsonStorage
+from utils import get_common_mistakes, get_trading_rules, get_good_practices
+
+SYMBOLS = [f"SYM{i:04d}" for i in range(2000)]
+
+
+def build_documents(days, plans, reflections, seed=0):
+    """Synthetic documents shaped like the app's data files"""
+    rng = random.Random(seed)
+    today = datetime.now()
+
+    history = {}
+    for i in range(days):
+        date = (today - timedelta(days=i)).strftime('%Y-%m-%d')
+        history[date] = [
+            {'symbol': symbol, 'reason': f"Setup on {date}", 'date_added': date}
+            for symbol in rng.sample(SYMBOLS, rng.randint(5, 20))
+        ]
+
+    stock_plans = {
+        symbol: {
+            'initial_entry': f"${rng.uniform(10, 500):.2f} on breakout",
+            'entry_size': "100 shares",
+            'scale_up_condition': f"${rng.uniform(10, 500):.2f} - add 50 shares",
+            'scale_down_condition': f"${rng.uniform(10, 500):.2f} - cut 50%",
+            'exit_strategy': "Take 50% at target, trail the rest",
+            'wrong_scenario': f"Hard stop at ${rng.uniform(10, 500):.2f}",
+            'last_updated': today.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        for symbol in SYMBOLS[:plans]
+    }
+
+    mistakes, rules, practices = get_common_mistakes(), get_trading_rules(), get_good_practices()
+    reflection_list = [
+        {
+            'date': (today - timedelta(days=i)).strftime('%Y-%m-%d'),
+            'broken_rules': rng.sample(rules, rng.randint(0, 3)),
+            'mistakes_made': rng.sample(mistakes, rng.randint(0, 4)),
+            'good_practices': rng.sample(practices, rng.randint(0, 5)),
+            'discipline_score': rng.randint(1, 10),
+            'reflection_notes': "Notes – ünïcode " * rng.randint(5, 60)
+        }
+        for i in range(reflections)
+    ]
+    return {'history': history, 'stock_plans': stock_plans, 'reflections': reflection_list}
+
+
+def available_formats():
+    formats = []
+    for file_format in FILE_FORMATS:
+        try:
+            encode({}, file_format)
+        except ImportError as e:
+            print(f"Skipping {file_format}: {e}")
+            continue
+        formats.append(file_format)
+    return formats
+
+
+def check_round_trips(documents, formats):
+    """Return a list of round-trip mismatches"""
+    problems = []
+    data_dir = tempfile.mkdtemp(prefix='bench_formats_')
+    for file_format in formats:
+        storage = JsonStorage(username='bench', data_dir=data_dir, file_format=file_format)
+        for name, document in documents.items():
+            raw = encode(document, file_format)
+            if detect_format(raw) != file_format:
+                problems.append(f"{file_format}/{name}: detected as {detect_format(raw)}")
+            if decode(raw) != document:
+                problems.append(f"{file_format}/{name}: decode(encode()) differs")
+
+            filename = os.path.join(data_dir, f"{file_format}_{name}.json")
+            storage.save_json_file(filename, document)
+            storage.clear_cache()
+            if storage.load_json_file(filename) != document:
+                problems.append(f"{file_format}/{name}: JsonStorage save/load differs")
+        storage.close()
+    return problems
+
+
+def median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=250, help='Days of watchlist history')
+    parser.add_argument('--plans', type=int, default=500, help='Stock trading plans')
+    parser.add_argument('--reflections', type=int, default=500, help='Daily reflections')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed repetitions per measurement')
+    args = parser.parse_args()
+
+    documents = build_documents(args.days, args.plans, args.reflections)
+    formats = available_formats()
+
+    problems = check_round_trips(documents, formats)
+    for problem in problems:
+        print(f"ROUND TRIP  {problem}")
+    if problems:
+        sys.exit(1)
+    print(f"Round trips OK for {', '.join(formats)}\n")
+
+    print(f"{'document':<12} {'format':<8} {'serialize':>12} {'parse':>12} {'size':>12} {'vs json':>8}")
+    for name, document in documents.items():
+        baseline_size = len(encode(document, 'json'))
+        for file_format in formats:
+            raw = encode(document, file_format)
+            serialize = median_ms(lambda: encode(document, file_format), args.repeat)
+            parse = median_ms(lambda: decode(raw), args.repeat)
+            print(f"{name:<12} {file_format:<8} {serialize:9.2f} ms {parse:9.2f} ms "
+                  f"{len(raw):12,d} {len(raw) / baseline_size:7.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""Measure cold import time of the app and check it against a startup budget.
+
+Each module is imported in a fresh interpreter, so every measurement is a
+cold start. `app` is what a new session pays before the login screen
+renders; the other modules are loaded later by the views that need them
+and are listed to show what the login screen no longer waits for. A
+second probe runs what every view does after login (the user's data
+manager, plans, reflections and watchlist registration) and checks it
+doesn't load market data either, so only the views that chart pay for it.
+Exits non-zero if `app` exceeds the budget or either pulls in a heavy
+module eagerly.
+Run from the repository root:
+
+    python benchmarks/bench_import_time.py --budget-ms 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on demand by the views; none of these may be imported by `app` itself
+HEAVY_MODULES = [
+    "pandas", "numpy", "plotly", "matplotlib", "yfinance", "streamlit_drawable_canvas",
+    "market_data", "metrics", "charting", "plan_levels", "trade_log", "data_manager", "data_manager_pool",
+]
+
+# Loaded only by the Trading Day and Trade Log views, never by the per-session setup
+MARKET_MODULES = ["pandas", "numpy", "plotly", "yfinance", "market_data", "metrics", "charting", "trade_log"]
+
+DEFERRED_MODULES = ["data_manager", "market_data", "metrics", "charting", "plotly.express"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+SESSION_PROBE = """
+import json, os, sys, tempfile, time
+sys.path.insert(0, os.getcwd())
+os.chdir(tempfile.mkdtemp(prefix="bench_session_"))
+start = time.perf_counter()
+from data_manager_pool import DataManagerPool
+from watch_registry import WatchRegistry
+dm = DataManagerPool().get("bench")
+dm.add_today_stock("AAPL", "probe")
+dm.save_stock_trading_plan("AAPL", {{"wrong_scenario": "Stop at $180"}})
+dm.get_stock_trading_plans()
+dm.get_daily_reflections()
+dm.get_weekly_scorecard_data()
+dm.get_cache_stats()
+WatchRegistry().watch(dm.username, [stock["symbol"] for stock in dm.get_today_stocks()])
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def import_once(module, probe=PROBE):
+    """Import module in a fresh interpreter; returns (seconds, loaded modules) or an error"""
+    result = subprocess.run(
+        [sys.executable, "-c", probe.format(module=module)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1] if result.stderr else "failed"
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    return data["seconds"], data["modules"]
+
+
+def measure(module, repeat):
+    timings, modules = [], []
+    for _ in range(repeat):
+        seconds, loaded = import_once(module)
+        if seconds is None:
+            return None, loaded
+        timings.append(seconds)
+        modules = loaded
+    return timings, modules
+
+
+def top_imports(module, limit):
+    """Slowest direct imports of module by cumulative time, from -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Names are indented two spaces per nesting level below the imported module
+        if len(name) - len(name.lstrip()) == 3:
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=1500,
+                        help='Maximum median cold import time of app (ms)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='Show the N slowest direct imports of app')
+    args = parser.parse_args()
+
+    exit_code = 0
+    timings, loaded = measure("app", args.repeat)
+    if timings is None:
+        print(f"app: could not import ({loaded})")
+        exit_code = 1
+    else:
+        median_ms = statistics.median(timings) * 1000
+        status = "OK" if median_ms <= args.budget_ms else "OVER BUDGET"
+        print(f"{'app (login screen)':<28} median {median_ms:8.1f} ms   "
+              f"max {max(timings) * 1000:8.1f} ms   budget {args.budget_ms:.0f} ms   {status}")
+        if median_ms > args.budget_ms:
+            exit_code = 1
+
+        eager = [name for name in HEAVY_MODULES if name in loaded]
+        if eager:
+            print(f"  imported eagerly: {', '.join(eager)}")
+            exit_code = 1
+
+        print("\nSlowest direct imports of app:")
+        for cumulative_us, name in top_imports("app", args.top):
+            print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    seconds, loaded = import_once("session", SESSION_PROBE)
+    if seconds is None:
+        print(f"\nsession setup: could not run ({loaded})")
+        exit_code = 1
+    else:
+        eager = [name for name in MARKET_MODULES if name in loaded]
+        print(f"\n{'session setup (any view)':<28} {seconds * 1000:8.1f} ms   "
+              + (f"loads market data: {', '.join(eager)}" if eager else "OK"))
+        if eager:
+            exit_code = 1
+
+    print("\nDeferred until a view needs them:")
+    for module in DEFERRED_MODULES:
+        deferred, error = measure(module, max(1, args.repeat // 2))
+        if deferred is None:
+            print(f"  {module:<26} not available ({error})")
+        else:
+            print(f"  {module:<26} median {statistics.median(deferred) * 1000:8.1f} ms")
+
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
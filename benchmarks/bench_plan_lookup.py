@@ -0,0 +1,107 @@
+"""Benchmark per-stock plan lookups in watchlist rendering.
+
+Compares the old pattern (one ``get_stock_trading_plan`` call per symbol,
+each re-reading the plans file) against ``get_stock_trading_plans_for`` as
+the watchlist grows, after checking that price levels are parsed from
+plan text correctly. Run from the repository root:
+
+    python benchmarks/bench_plan_lookup.py
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_manager import DataManager
+from plan_levels import parse_price_levels
+
+# Plan text -> the price levels it holds; times, durations, multiples and
+# moving-average lengths are not prices
+PLAN_TEXT_LEVELS = {
+    "$145 - cut 50%, $140 - full stop": [145, 140],
+    "Add above 152.5 on 2x volume": [152.5],
+    "Hold above VWAP for 15 minutes": [],
+    "Cut half at 9:45 if below 150": [150],
+    "Stop 2 ATR below entry": [],
+    "Exit at 10am or 148": [148],
+    "Lose the 20 EMA, out below 147.80": [147.8],
+    "1.5R target 160": [160],
+    "Red 3 bars below 99.5": [99.5],
+}
+
+
+def check_plan_levels():
+    """Return a list of plan texts whose parsed levels are wrong"""
+    return [f"{text!r} parsed as {parse_price_levels(text)}, expected {expected}"
+            for text, expected in PLAN_TEXT_LEVELS.items() if parse_price_levels(text) != expected]
+
+
+def make_plans(dm, symbols):
+    for i, symbol in enumerate(symbols):
+        dm.save_stock_trading_plan(symbol, {
+            'initial_entry': f"${100 + i:.2f} on breakout",
+            'entry_size': "100 shares",
+            'scale_up_condition': f"${105 + i:.2f} - add 50 shares",
+            'scale_down_condition': f"${95 + i:.2f} - cut 50%",
+            'exit_strategy': "Take 50% at target, trail the rest",
+            'wrong_scenario': f"Hard stop at ${90 + i:.2f}",
+            'last_updated': "2025-06-27 09:15:00"
+        })
+
+
+def rerun_per_symbol(dm, symbols):
+    """One lookup per rendered symbol, without the read cache"""
+    for symbol in symbols:
+        dm.clear_cache()
+        dm.get_stock_trading_plan(symbol)
+
+
+def rerun_bulk(dm, symbols):
+    """One bulk lookup per rendered list, starting from a cold cache"""
+    dm.clear_cache()
+    dm.get_stock_trading_plans_for(symbols)
+
+
+def time_rerun(func, dm, symbols, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(dm, symbols)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10,50,100,200,400',
+                        help='Comma-separated watchlist sizes')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    problems = check_plan_levels()
+    for problem in problems:
+        print(f"MISMATCH  {problem}")
+    if problems:
+        sys.exit(1)
+    print("Plan levels parse as expected\n")
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    workdir = tempfile.mkdtemp(prefix='bench_plans_')
+    os.chdir(workdir)
+
+    print(f"{'symbols':>8} {'per-symbol (ms)':>16} {'bulk (ms)':>10} {'speedup':>8}")
+    for size in sizes:
+        dm = DataManager(username='bench')
+        symbols = [f"SYM{i:04d}" for i in range(size)]
+        make_plans(dm, symbols)
+
+        per_symbol = time_rerun(rerun_per_symbol, dm, symbols, args.repeat)
+        bulk = time_rerun(rerun_bulk, dm, symbols, args.repeat)
+        print(f"{size:>8} {per_symbol * 1000:>16.2f} {bulk * 1000:>10.2f} {per_symbol / bulk:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
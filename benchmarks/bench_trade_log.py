@@ -0,0 +1,265 @@
+"""Benchmark the trade log on a large synthetic fill history.
+
+Generates scaled-in/scaled-out round trips (longs and shorts, some
+reversing through zero, some left open) across many symbols, appends them
+to a TradeLog in batches, then times a cold load, round-trip grouping and
+the full analytics a Trade Log rerun computes. Round trips are checked
+against a plain Python loop on a sample first. Exits non-zero on a
+mismatch or if the analytics exceed the budget. Run from the repository root:
+
+    python benchmarks/bench_trade_log.py --fills 200000 --budget-ms 1000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from convert_data_files import convert_file, find_data_files
+from trade_log import (TradeLog, apply_marks, apply_r_multiples, compute_round_trips, daily_pnl,
+                       normalize_fills, summarize_trades)
+
+
+def generate_fills(count, symbols, seed=0):
+    """Synthetic fills plus plans with a stop for most symbols"""
+    rng = random.Random(seed)
+    rows = []
+    clock = {f"S{i:04d}": pd.Timestamp("2020-01-02 09:30").value for i in range(symbols)}
+    prices = {symbol: rng.uniform(10, 500) for symbol in clock}
+    while len(rows) < count:
+        symbol = rng.choice(list(clock))
+        direction = rng.choice((1, -1))
+        position = 0
+        for _ in range(rng.randint(1, 3)):
+            quantity = direction * rng.randint(1, 10) * 10
+            rows.append((clock[symbol], symbol, quantity, prices[symbol]))
+            position += quantity
+            clock[symbol] += rng.randint(1, 600) * 10 ** 9
+            prices[symbol] *= 1 + rng.gauss(0, 0.01)
+        while position:
+            quantity = -position if rng.random() < 0.5 else -direction * min(abs(position), 10 * rng.randint(1, 5))
+            if rng.random() < 0.05:
+                quantity -= direction * 50  # reverse through flat
+            rows.append((clock[symbol], symbol, quantity, prices[symbol]))
+            position += quantity
+            direction = np.sign(position) or direction
+            clock[symbol] += rng.randint(1, 600) * 10 ** 9
+            prices[symbol] *= 1 + rng.gauss(0, 0.01)
+            if rng.random() < 0.01:
+                break  # leave this one open
+        # Next trip for this symbol starts on a later day
+        clock[symbol] += 86400 * 10 ** 9
+
+    fills = pd.DataFrame(rows[:count], columns=['time', 'symbol', 'quantity', 'price'])
+    fills['time'] = pd.to_datetime(fills['time'])
+    fills['fees'] = 1.0
+    plans = {
+        symbol: {'wrong_scenario': f"Hard stop at ${price * 0.9:.2f}", 'levels': {'wrong_scenario': [price * 0.9]}}
+        for symbol, price in list(prices.items())[: symbols * 3 // 4]
+    }
+    return fills, plans
+
+
+def reference_round_trips(fills):
+    """Round trips the slow way: walk each symbol's fills in order"""
+    trips = []
+    for symbol, group in fills.sort_values(['symbol', 'time'], kind='stable').groupby('symbol', observed=True):
+        position, trip = 0.0, None
+        for quantity, price, fee in zip(group['quantity'], group['price'], group['fees']):
+            while quantity:
+                if trip is None:
+                    trip = {'symbol': symbol, 'direction': np.sign(quantity), 'entry_qty': 0.0, 'entry_cost': 0.0,
+                            'exit_qty': 0.0, 'exit_value': 0.0, 'fees': 0.0}
+                part = quantity
+                if position and np.sign(quantity) != np.sign(position) and abs(quantity) > abs(position):
+                    part = -position
+                share = part / quantity
+                if np.sign(part) == trip['direction']:
+                    trip['entry_qty'] += part
+                    trip['entry_cost'] += part * price
+                else:
+                    trip['exit_qty'] += part
+                    trip['exit_value'] += part * price
+                trip['fees'] += fee * share
+                fee -= fee * share
+                position += part
+                quantity -= part
+                if abs(position) < 1e-9:
+                    position = 0.0
+                    trips.append(trip)
+                    trip = None
+        if trip is not None:
+            trips.append(trip)
+    for trip in trips:
+        avg_entry = trip['entry_cost'] / trip['entry_qty']
+        avg_exit = trip['exit_value'] / trip['exit_qty'] if trip['exit_qty'] else 0.0
+        trip['realized'] = trip['direction'] * abs(trip['exit_qty']) * (avg_exit - avg_entry) - trip['fees']
+    return trips
+
+
+def check(fills):
+    """Return a list of differences from the reference implementation"""
+    expected = reference_round_trips(fills)
+    actual = compute_round_trips(fills)
+    if len(expected) != len(actual):
+        return [f"{len(actual)} round trips, expected {len(expected)}"]
+    realized = np.array([trip['realized'] for trip in expected])
+    if not np.allclose(actual['realized'].to_numpy(), realized, rtol=1e-9, atol=1e-6):
+        worst = int(np.argmax(np.abs(actual['realized'].to_numpy() - realized)))
+        return [f"realized P&L differs, e.g. trip {worst}: {actual['realized'].iloc[worst]:.4f} "
+                f"vs {realized[worst]:.4f}"]
+    return []
+
+
+def check_edge_cases():
+    """Return a list of failures on logs that are empty or otherwise unusual"""
+    problems = []
+    empty = TradeLog(os.path.join(tempfile.mkdtemp(prefix='bench_trades_'), 'never_written'))
+    try:
+        if not empty.load().empty:
+            problems.append("a log that was never written to has fills")
+    except Exception as e:
+        problems.append(f"loading a log that was never written to raised {e!r}")
+
+    # Analytics over no round trips: the full chain a Trade Log rerun runs
+    try:
+        trips = compute_round_trips(empty.load())
+        expected = compute_round_trips(generate_fills(10, 2)[0])
+        if list(trips.dtypes.astype(str)) != list(expected.dtypes.astype(str)):
+            problems.append("empty round trips have different column dtypes")
+        trips = apply_r_multiples(apply_marks(trips, {}), {})
+        summary = summarize_trades(trips, {})
+        if summary['trades'] or summary['realized'] or not daily_pnl(trips).empty:
+            problems.append(f"analytics over no round trips are not empty: {summary}")
+    except Exception as e:
+        problems.append(f"analytics over no round trips raised {e!r}")
+
+    # Broker exports with separate Date and Time columns
+    split = pd.DataFrame({'Date': ['2024-01-03', '01/04/2024'], 'Time': ['09:31:05', '3:59 PM'],
+                          'Symbol': ['AAPL', 'AAPL'], 'Quantity': [100, -100], 'Price': [150, 151]})
+    times = normalize_fills(split)['time'].tolist()
+    if times != [pd.Timestamp('2024-01-03 09:31:05'), pd.Timestamp('2024-01-04 15:59')]:
+        problems.append(f"separate date and time columns parsed as {times}")
+    try:
+        normalize_fills(split.drop(columns='Date'))
+        problems.append("times of day without a date were accepted")
+    except ValueError:
+        pass
+
+    # A merge interrupted before or after switching to the merged chunk
+    # must count every fill exactly once
+    fills = generate_fills(TradeLog.MAX_CHUNKS + 1, 3)[0]
+    for crash in ('before switch', 'after switch'):
+        log = TradeLog(tempfile.mkdtemp(prefix='bench_trades_'))
+        for i in range(TradeLog.MAX_CHUNKS):
+            log.append(fills.iloc[i:i + 1])
+        failing = (log, '_write_manifest') if crash == 'before switch' else (os, 'unlink')
+        original = getattr(*failing)
+        setattr(*failing, lambda *args: (_ for _ in ()).throw(OSError("simulated crash")))
+        try:
+            log.append(fills.iloc[-1:])
+        except OSError:
+            pass
+        finally:
+            setattr(*failing, original)
+        expected = TradeLog.MAX_CHUNKS + (crash == 'after switch')
+        log.release()
+        if len(log.load()) != expected:
+            problems.append(f"merge interrupted {crash}: {len(log.load())} fills, expected {expected}")
+        log.append(fills.iloc[-1:])
+        if len(log.load()) != expected + 1 or set(log._chunk_files()) != set(log._live_chunks()):
+            problems.append(f"log did not recover from a merge interrupted {crash}")
+
+    # convert_data_files must leave trade logs alone, and a manifest an older
+    # converter already rewrote must still load
+    data_dir = tempfile.mkdtemp(prefix='bench_trades_')
+    for name in ('trades', 'alice_trades'):
+        TradeLog(os.path.join(data_dir, name)).append(fills.iloc[:3])
+    converted = [os.path.relpath(filename, data_dir) for filename in find_data_files(data_dir)]
+    if converted:
+        problems.append(f"convert_data_files would rewrite trade log files: {converted}")
+    try:
+        import msgpack  # noqa: F401
+        file_format = 'msgpack'
+    except ImportError:
+        file_format = 'compact'
+    log = TradeLog(os.path.join(data_dir, 'alice_trades'))
+    convert_file(log.manifest_file, file_format)
+    try:
+        log.append(fills.iloc[3:4])
+        log.release()
+        if len(log.load()) != 4:
+            problems.append(f"a {file_format} manifest loads {len(log.load())} fills, expected 4")
+    except Exception as e:
+        problems.append(f"a {file_format} manifest raised {e!r}")
+    return problems
+
+
+def median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fills', type=int, default=200000, help='Fills to generate')
+    parser.add_argument('--symbols', type=int, default=500, help='Distinct symbols')
+    parser.add_argument('--batch', type=int, default=10000, help='Fills per append')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed repetitions per measurement')
+    parser.add_argument('--budget-ms', type=float, default=1000, help='Fail if full analytics take longer')
+    args = parser.parse_args()
+
+    fills, plans = generate_fills(args.fills, args.symbols)
+    problems = check_edge_cases() + check(fills.iloc[:5000])
+    for problem in problems:
+        print(f"MISMATCH  {problem}")
+    if problems:
+        sys.exit(1)
+    print("Edge cases pass; round trips match the reference loop on the first 5000 fills")
+
+    log = TradeLog(tempfile.mkdtemp(prefix='bench_trades_'))
+    start = time.perf_counter()
+    for offset in range(0, len(fills), args.batch):
+        log.append(fills.iloc[offset:offset + args.batch])
+    append_ms = (time.perf_counter() - start) * 1000
+
+    def cold_load():
+        log.release()
+        return log.load()
+
+    marks = fills.groupby('symbol')['price'].last().to_dict()
+
+    def analytics():
+        trips = apply_r_multiples(apply_marks(compute_round_trips(log.load()), marks), plans)
+        return summarize_trades(trips, plans), daily_pnl(trips)
+
+    print(f"\n{len(fills):,} fills across {args.symbols} symbols "
+          f"({len(log._live_chunks())} chunks, {log.directory})")
+    print(f"append in batches of {args.batch:<6,} {append_ms:9.1f} ms total")
+    print(f"cold load               {median_ms(cold_load, args.repeat):9.1f} ms")
+    print(f"round trips             {median_ms(lambda: compute_round_trips(log.load()), args.repeat):9.1f} ms")
+    analytics_ms = median_ms(analytics, args.repeat)
+    print(f"full analytics          {analytics_ms:9.1f} ms")
+
+    summary, _ = analytics()
+    print(f"\n{summary['trades']:,} closed trips, {summary['open_trades']} open, "
+          f"win rate {summary['win_rate']:.1%}, avg R {summary['avg_r']:.2f}, "
+          f"realized {summary['realized']:,.0f}, unrealized {summary['unrealized']:,.0f}")
+    if analytics_ms > args.budget_ms:
+        print(f"Analytics took {analytics_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""Benchmark concurrent logins and registrations through UserManager.
+
+Simulates many sessions, each on its own thread like Streamlit sessions,
+sharing one UserManager. Every session registers an account and then logs
+in repeatedly. Reports per-operation p50/p99 latency, throughput, logins
+turned away by the hash queue limit, and any errors. Edge cases such as
+corrupt stored hashes are checked first. Run from the repository root:
+
+    python benchmarks/bench_user_manager.py --sessions 64 --logins 5 --max-pending 16
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from user_manager import UserManager, HashQueueFull
+
+
+def report(label, timings, elapsed):
+    timings_ms = sorted(t * 1000 for t in timings)
+    if not timings_ms:
+        print(f"{label:<18} no samples")
+        return
+    p50 = statistics.median(timings_ms)
+    p99 = timings_ms[min(len(timings_ms) - 1, int(len(timings_ms) * 0.99))]
+    print(f"{label:<18} p50 {p50:8.2f} ms   p99 {p99:8.2f} ms   "
+          f"{len(timings_ms) / elapsed:9.0f} ops/s   n={len(timings_ms)}")
+
+
+def check_edge_cases():
+    """Return a list of failures on unusual accounts"""
+    problems = []
+    manager = UserManager(os.path.join(tempfile.mkdtemp(prefix='bench_users_'), 'users.db'))
+    corrupt = ['scrypt$16384$8$1$zz$00', 'scrypt$16384$8$1$00$', 'scrypt$x$8$1$00$00',
+               'pbkdf2_sha256$x$00$00', 'pbkdf2_sha256$1000$00$', 'scrypt$16384$8$1$00', '']
+    with manager.conn:
+        manager.conn.executemany('INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)',
+                                 [(f"corrupt{i}", f"corrupt{i}@example.com", stored)
+                                  for i, stored in enumerate(corrupt)])
+    for i, stored in enumerate(corrupt):
+        try:
+            if manager.authenticate_user(f"corrupt{i}", "secret"):
+                problems.append(f"a corrupt stored hash {stored!r} accepted a password")
+        except Exception as e:
+            problems.append(f"a corrupt stored hash {stored!r} raised {e!r}")
+
+    # Sessions come and go; their threads' connections must not pile up
+    for _ in range(50):
+        thread = threading.Thread(target=manager.get_user_info, args=("corrupt0",))
+        thread.start()
+        thread.join()
+    manager.get_user_info("corrupt0")
+    if len(manager._connections) > 2:
+        problems.append(f"{len(manager._connections)} connections open after 50 threads exited")
+    manager.close()
+    return problems
+
+
+def run_session(manager, index, logins, barrier, results):
+    username = f"user{index:05d}"
+    password = f"secret-{index}"
+    register_times, login_times, errors, rejected = [], [], [], 0
+    barrier.wait()
+
+    start = time.perf_counter()
+    ok, message = manager.register_user(username, f"{username}@example.com", password)
+    register_times.append(time.perf_counter() - start)
+    if not ok and 'Too many logins' in message:
+        rejected += 1
+    elif not ok:
+        errors.append(message)
+
+    for attempt in range(logins):
+        # Every tenth attempt uses a wrong password, like a mistyped login
+        wrong = attempt % 10 == 9
+        start = time.perf_counter()
+        try:
+            authenticated = manager.authenticate_user(username, "wrong" if wrong else password)
+        except HashQueueFull:
+            rejected += 1
+            continue
+        finally:
+            login_times.append(time.perf_counter() - start)
+        if ok and authenticated == wrong:
+            errors.append(f"{username}: unexpected authenticate result on attempt {attempt}")
+
+    results.append((register_times, login_times, errors, rejected))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=64, help='Concurrent simulated sessions')
+    parser.add_argument('--logins', type=int, default=5, help='Logins per session')
+    parser.add_argument('--hash-workers', type=int, default=None, help='Password hashing threads')
+    parser.add_argument('--max-pending', type=int, default=32, help='Hash queue depth limit')
+    parser.add_argument('--queue-timeout', type=float, default=2.0, help='Seconds to wait for a hash slot')
+    parser.add_argument('--db', default=None, help='Database path (default: a temporary file)')
+    args = parser.parse_args()
+
+    problems = check_edge_cases()
+    for problem in problems:
+        print(f"MISMATCH  {problem}")
+    if problems:
+        sys.exit(1)
+    print("Edge cases pass\n")
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix='bench_users_'), 'users.db')
+    manager = UserManager(db_path, hash_workers=args.hash_workers, max_pending_hashes=args.max_pending,
+                          queue_timeout=args.queue_timeout)
+    barrier = threading.Barrier(args.sessions)
+    results = []
+    threads = [
+        threading.Thread(target=run_session, args=(manager, i, args.logins, barrier, results))
+        for i in range(args.sessions)
+    ]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    manager.close()
+
+    register_times = [t for r in results for t in r[0]]
+    login_times = [t for r in results for t in r[1]]
+    errors = [e for r in results for e in r[2]]
+    rejected = sum(r[3] for r in results)
+
+    print(f"{args.sessions} sessions x {args.logins} logins in {elapsed:.2f}s ({db_path})\n")
+    report("register_user", register_times, elapsed)
+    report("authenticate_user", login_times, elapsed)
+    print(f"{rejected} requests turned away by the hash queue limit")
+    if errors:
+        print(f"\n{len(errors)} errors, first: {errors[0]}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
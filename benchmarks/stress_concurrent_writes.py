@@ -0,0 +1,129 @@
+"""Stress concurrent writes to one user's data from several processes.
+
+Every worker process opens its own DataManager for the same user and races
+the others adding watchlist stocks, removing some again, saving per-stock
+plans and saving (then revising) daily reflections. Afterwards the parent
+checks that every write survived, that removed stocks stayed removed and
+that the scorecard aggregates match a rebuild from the reflections. Exits
+non-zero on any lost update. Run from the repository root:
+
+    python benchmarks/stress_concurrent_writes.py --workers 8 --ops 100
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_manager import DataManager
+from storage import create_storage
+
+USERNAME = 'stress'
+
+
+def reflection_date(worker, i, ops):
+    return (datetime.now() - timedelta(days=worker * ops + i)).strftime('%Y-%m-%d')
+
+
+def run_worker(worker, ops, backend, data_dir, start):
+    os.chdir(data_dir)
+    dm = DataManager(username=USERNAME, storage=create_storage(USERNAME, backend))
+    start.wait()
+    for i in range(ops):
+        dm.add_permanent_stock(f"P{worker}_{i}", "stress")
+        dm.add_today_stock(f"T{worker}_{i}", "stress")
+        dm.add_today_stock(f"R{worker}_{i}", "to be removed")
+        dm.save_stock_trading_plan(f"S{worker}_{i}", {'initial_entry': f"${i + 1}", 'exit_strategy': "stress"})
+        dm.remove_today_stock(f"R{worker}_{i}")
+
+        # Save a draft, then the final version; the journal keeps the last one
+        date = reflection_date(worker, i, ops)
+        for version in ('draft', 'final'):
+            dm.save_daily_reflection({
+                'date': date,
+                'broken_rules': [],
+                'mistakes_made': [f"mistake {worker}"] if version == 'final' else [],
+                'good_practices': [],
+                'discipline_score': 10 if version == 'final' else 1,
+                'reflection_notes': version
+            })
+    dm.storage.close()
+
+
+def check(backend, data_dir, workers, ops):
+    """Return a list of lost or unexpected updates"""
+    os.chdir(data_dir)
+    dm = DataManager(username=USERNAME, storage=create_storage(USERNAME, backend))
+    problems = []
+
+    def expect(label, found, expected):
+        missing = expected - found
+        if missing:
+            problems.append(f"{label}: {len(missing)} lost, e.g. {sorted(missing)[:3]}")
+
+    expected = lambda prefix: {f"{prefix}{w}_{i}" for w in range(workers) for i in range(ops)}
+    expect("permanent stocks", {s['symbol'] for s in dm.get_permanent_stocks()}, expected("P"))
+    today = {s['symbol'] for s in dm.get_today_stocks()}
+    expect("today stocks", today, expected("T"))
+    if today & expected("R"):
+        problems.append(f"removed stocks came back: {sorted(today & expected('R'))[:3]}")
+    expect("stock plans", set(dm.get_stock_trading_plans()), expected("S"))
+
+    today_date = datetime.now().strftime('%Y-%m-%d')
+    archived = dm.storage.get_historical_stocks(today_date, today_date).get(today_date, [])
+    expect("archived history", {s['symbol'] for s in archived}, expected("T"))
+
+    reflections = {r['date']: r for r in dm.get_daily_reflections()}
+    expected_dates = {reflection_date(w, i, ops) for w in range(workers) for i in range(ops)}
+    expect("reflections", set(reflections), expected_dates)
+    drafts = [date for date in expected_dates if reflections.get(date, {}).get('reflection_notes') == 'draft']
+    if drafts:
+        problems.append(f"reflections: {len(drafts)} final versions lost, e.g. {sorted(drafts)[:3]}")
+
+    if dm.scorecard._load()['days'] != dm.scorecard._build()['days']:
+        problems.append("scorecard aggregates differ from a rebuild")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent writer processes')
+    parser.add_argument('--ops', type=int, default=100, help='Rounds of writes per worker')
+    parser.add_argument('--backend', default='json', choices=['json', 'sqlite'])
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix='stress_writes_')
+    start = multiprocessing.Event()
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(w, args.ops, args.backend, data_dir, start))
+        for w in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    began = time.perf_counter()
+    start.set()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - began
+
+    writes = args.workers * args.ops * 7
+    print(f"{args.workers} processes x {args.ops} rounds ({writes} writes, {args.backend}) "
+          f"in {elapsed:.2f}s, {writes / elapsed:.0f} writes/s ({data_dir})")
+    if any(process.exitcode for process in processes):
+        print("A worker process failed")
+        sys.exit(1)
+
+    problems = check(args.backend, data_dir, args.workers, args.ops)
+    for problem in problems:
+        print(f"LOST UPDATE  {problem}")
+    if problems:
+        sys.exit(1)
+    print("No lost updates")
+
+
+if __name__ == '__main__':
+    main()
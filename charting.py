@@ -0,0 +1,104 @@
+import math
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from tracing import traced
+
+# Approximate width of the chart column in the wide layout, and the
+# narrowest candle worth drawing; together they set the point budget
+CHART_WIDTH_PX = 900
+MIN_CANDLE_PX = 3
+
+
+def point_budget(width_px: int = CHART_WIDTH_PX, min_candle_px: int = MIN_CANDLE_PX) -> int:
+    """Maximum number of candles that can be told apart at a chart width"""
+    return max(1, width_px // min_candle_px)
+
+
+def zoom_bars(bars: pd.DataFrame, zoom: Optional[Tuple[int, int]]) -> pd.DataFrame:
+    """Slice bars to a (start %, end %) range of the window"""
+    if not zoom or tuple(zoom) == (0, 100) or bars.empty:
+        return bars
+    start = int(len(bars) * zoom[0] / 100)
+    end = max(start + 1, math.ceil(len(bars) * zoom[1] / 100))
+    return bars.iloc[start:end]
+
+
+def downsample_ohlc(bars: pd.DataFrame, max_points: int) -> pd.DataFrame:
+    """Merge runs of consecutive bars so at most max_points remain.
+
+    Each merged candle keeps the first open, highest high, lowest low, last
+    close and total volume of its run, stamped with the run's first time.
+    """
+    count = len(bars)
+    if count <= max_points:
+        return bars
+    size = math.ceil(count / max_points)
+    starts = np.arange(0, count, size)
+    ends = np.minimum(starts + size, count) - 1
+    downsampled = pd.DataFrame({
+        'Open': bars['Open'].to_numpy()[starts],
+        'High': np.maximum.reduceat(bars['High'].to_numpy(), starts),
+        'Low': np.minimum.reduceat(bars['Low'].to_numpy(), starts),
+        'Close': bars['Close'].to_numpy()[ends],
+    }, index=bars.index[starts])
+    if 'Volume' in bars:
+        downsampled['Volume'] = np.add.reduceat(bars['Volume'].to_numpy(), starts)
+    return downsampled
+
+
+@traced(category="charting")
+def build_candlestick_figure(symbol: str, bars: pd.DataFrame, period: str, max_points: int):
+    """Candlestick figure for a window, aggregated to the point budget"""
+    import plotly.graph_objects as go
+
+    shown = downsample_ohlc(bars, max_points)
+    fig = go.Figure(data=go.Candlestick(
+        x=shown.index,
+        open=shown['Open'],
+        high=shown['High'],
+        low=shown['Low'],
+        close=shown['Close'],
+        name=symbol
+    ))
+
+    title = f"{symbol} - {period.upper()} Chart"
+    if len(shown) < len(bars):
+        title += f" ({len(bars)} bars shown as {len(shown)})"
+    fig.update_layout(
+        title=title,
+        xaxis_title="Time",
+        yaxis_title="Price ($)",
+        height=400,
+        showlegend=False
+    )
+    return fig
+
+
+class FigureCache:
+    """Small LRU of built figures, keyed by everything that changes their content"""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def get_or_build(self, key: Hashable, build: Callable):
+        with self._lock:
+            if key in self._figures:
+                self._figures.move_to_end(key)
+                self.stats['hits'] += 1
+                return self._figures[key]
+        figure = build()
+        with self._lock:
+            self.stats['misses'] += 1
+            self._figures[key] = figure
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.max_entries:
+                self._figures.popitem(last=False)
+        return figure
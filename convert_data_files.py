@@ -0,0 +1,98 @@
+"""Rewrite the JSON storage backend's data files in another file format.
+
+Walks the data directory (including the monthly history partitions) and
+rewrites every data file in the requested format, keeping its name. Each
+file is replaced atomically under its file lock, so the app can keep
+running. The reflection journal, its index and the legacy reflections.json
+it migrates from stay JSON, and trade log directories are left alone. Run from the repository root:
+
+    python convert_data_files.py --to compact [--data-dir data] [--dry-run]
+
+Afterwards start the app with ``DAYTRADER_FILE_FORMAT`` set to the same
+format so new writes match; files in any format stay readable either way.
+"""
+import argparse
+import os
+import tempfile
+
+from file_formats import FILE_FORMATS, decode, detect_format, encode
+from file_lock import file_lock
+
+# Read by ReflectionJournal with stdlib json rather than through JsonStorage
+JOURNAL_FILES = ("reflections.json", "reflections_index.json")
+# TradeLog directories ("trades", "{user}_trades") hold npz chunks and the log's own manifest
+TRADE_LOG_DIR = "trades"
+
+
+def find_data_files(data_dir):
+    """Every data file under data_dir that JsonStorage reads"""
+    for root, dirnames, filenames in os.walk(data_dir):
+        dirnames[:] = [name for name in dirnames
+                       if name != TRADE_LOG_DIR and not name.endswith("_" + TRADE_LOG_DIR)]
+        for filename in sorted(filenames):
+            if not filename.endswith(".json"):
+                continue
+            if any(filename == name or filename.endswith("_" + name) for name in JOURNAL_FILES):
+                continue
+            yield os.path.join(root, filename)
+
+
+def convert_file(filename, file_format, dry_run=False):
+    """Rewrite one file in file_format; return (old format, old size, new size)"""
+    with file_lock(filename):
+        with open(filename, 'rb') as f:
+            raw = f.read()
+        old_format = detect_format(raw)
+        if old_format == file_format:
+            return old_format, len(raw), len(raw)
+        converted = encode(decode(raw), file_format)
+        if dry_run:
+            return old_format, len(raw), len(converted)
+
+        fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(filename) or ".",
+                                        prefix=os.path.basename(filename) + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(converted)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, filename)
+        except BaseException:
+            if os.path.exists(tmp_file):
+                os.unlink(tmp_file)
+            raise
+    return old_format, len(raw), len(converted)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert data files to another file format")
+    parser.add_argument("--to", required=True, choices=FILE_FORMATS, dest="file_format")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--dry-run", action="store_true", help="Report sizes without rewriting anything")
+    args = parser.parse_args()
+    try:
+        encode({}, args.file_format)
+    except ImportError as e:
+        parser.error(str(e))
+
+    converted, failed, before, after = 0, 0, 0, 0
+    for filename in find_data_files(args.data_dir):
+        try:
+            old_format, old_size, new_size = convert_file(filename, args.file_format, args.dry_run)
+        except ValueError as e:
+            print(f"{filename}: skipped, {e}")
+            failed += 1
+            continue
+        before += old_size
+        after += new_size
+        if old_format != args.file_format:
+            converted += 1
+            print(f"{filename}: {old_format} -> {args.file_format}, {old_size} -> {new_size} bytes")
+
+    action = "Would convert" if args.dry_run else "Converted"
+    print(f"{action} {converted} file(s) to {args.file_format}: {before} -> {after} bytes"
+          + (f", {failed} unreadable file(s) skipped" if failed else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,84 +1,77 @@
-import json
 import os
 from datetime import datetime, timedelta
 from collections import Counter
-from typing import Dict, List, Any
+from typing import Dict, List, Optional
+from storage import StorageBackend, create_storage
+from scorecard import ScorecardAggregates
+from plan_levels import LEVELS_VERSION, parse_plan_levels
+from tracing import traced
 
 class DataManager:
-    def __init__(self, username=None):
+    def __init__(self, username=None, storage: StorageBackend = None):
         self.data_dir = "data"
-        self.ensure_data_directory()
         self.username = username
-        self.today_stocks_file = self._user_file("today_stocks.json")
-        self.permanent_stocks_file = self._user_file("permanent_stocks.json")
-        self.trading_plan_file = self._user_file("trading_plan.json")
-        self.stock_trading_plans_file = self._user_file("stock_trading_plans.json")
-        self.reflections_file = self._user_file("reflections.json")
-        self.historical_stocks_file = self._user_file("historical_stocks.json")
+        self.storage = storage or create_storage(username=username, data_dir=self.data_dir)
+        self.scorecard = ScorecardAggregates(self.storage)
+        self._trade_log = None
+        self._round_trips = None
     
-    def _user_file(self, filename):
-        if self.username:
-            name, ext = os.path.splitext(filename)
-            return os.path.join(self.data_dir, f"{self.username}_{name}{ext}")
-        return os.path.join(self.data_dir, filename)
+    @property
+    def trade_log(self):
+        """The user's TradeLog, created on first use so views without trades never load pandas"""
+        if self._trade_log is None:
+            from trade_log import TradeLog
+            self._trade_log = TradeLog(
+                os.path.join(self.data_dir, f"{self.username}_trades" if self.username else "trades"))
+        return self._trade_log
+
+    def _release_trade_log(self):
+        if self._trade_log is not None:
+            self._trade_log.release()
+        self._round_trips = None
+
+    def get_cache_stats(self) -> Dict:
+        """Get read cache hit/miss counters and cached bytes, trade log included"""
+        stats = dict(self.storage.get_cache_stats())
+        round_trips = self._round_trips
+        stats['trade_log_bytes'] = ((self._trade_log.get_cache_bytes() if self._trade_log is not None else 0)
+                                    + (round_trips[2] if round_trips else 0))
+        stats['bytes'] = stats.get('bytes', 0) + stats['trade_log_bytes']
+        return stats
     
-    def ensure_data_directory(self):
-        """Create data directory if it doesn't exist"""
-        if not os.path.exists(self.data_dir):
-            os.makedirs(self.data_dir)
+    def clear_cache(self):
+        """Drop all cached file contents"""
+        self.storage.clear_cache()
+        self._release_trade_log()
     
-    def load_json_file(self, filename: str, default: Any = None) -> Any:
-        """Load data from JSON file with error handling"""
-        if default is None:
-            default = {}
-        
-        try:
-            if os.path.exists(filename):
-                with open(filename, 'r') as f:
-                    return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            pass
-        return default
-    
-    def save_json_file(self, filename: str, data: Any):
-        """Save data to JSON file with error handling"""
-        try:
-            with open(filename, 'w') as f:
-                json.dump(data, f, indent=2)
-        except IOError:
-            pass
+    def close(self):
+        """Release cached data and storage resources; the instance stays usable"""
+        self.storage.close()
+        self._release_trade_log()
     
     # Today's stocks management
+    @traced(category="data_manager")
     def add_today_stock(self, symbol: str, reason: str):
         """Add a stock to today's watchlist"""
-        today_stocks = self.load_json_file(self.today_stocks_file, [])
-        
-        # Check if stock already exists
-        for stock in today_stocks:
-            if stock['symbol'] == symbol:
-                stock['reason'] = reason  # Update reason if stock exists
-                stock['date_added'] = datetime.now().strftime('%Y-%m-%d')
-                self.save_json_file(self.today_stocks_file, today_stocks)
-                return
-        
-        # Add new stock
-        today_stocks.append({
+        is_new = self.storage.save_today_stock({
             'symbol': symbol,
             'reason': reason,
             'date_added': datetime.now().strftime('%Y-%m-%d')
         })
-        self.save_json_file(self.today_stocks_file, today_stocks)
-        self._archive_today_stocks()
+        
+        # Only newly added stocks change the archived watchlist
+        if is_new:
+            self._archive_today_stocks()
     
+    @traced(category="data_manager")
     def remove_today_stock(self, symbol: str):
         """Remove a stock from today's watchlist"""
-        today_stocks = self.load_json_file(self.today_stocks_file, [])
-        today_stocks = [stock for stock in today_stocks if stock['symbol'] != symbol]
-        self.save_json_file(self.today_stocks_file, today_stocks)
+        self.storage.remove_today_stock(symbol)
     
+    @traced(category="data_manager")
     def get_today_stocks(self) -> List[Dict]:
         """Get today's watchlist"""
-        return self.load_json_file(self.today_stocks_file, [])
+        return self.storage.get_today_stocks()
     
     def _archive_today_stocks(self):
         """Archive today's stocks to historical data"""
@@ -86,19 +79,22 @@ class DataManager:
         if not today_stocks:
             return
         
-        historical_data = self.load_json_file(self.historical_stocks_file, {})
         today_date = datetime.now().strftime('%Y-%m-%d')
-        historical_data[today_date] = today_stocks
-        self.save_json_file(self.historical_stocks_file, historical_data)
+        self.storage.archive_stocks(today_date, today_stocks)
     
+    @traced(category="data_manager")
     def get_last_week_stocks(self) -> List[Dict]:
         """Get stocks from the last week"""
-        historical_data = self.load_json_file(self.historical_stocks_file, {})
+        now = datetime.now()
+        historical_data = self.storage.get_historical_stocks(
+            (now - timedelta(days=7)).strftime('%Y-%m-%d'),
+            (now - timedelta(days=1)).strftime('%Y-%m-%d')
+        )
         last_week_stocks = []
         
         # Get dates from last 7 days
         for i in range(1, 8):
-            date = (datetime.now() - timedelta(days=i)).strftime('%Y-%m-%d')
+            date = (now - timedelta(days=i)).strftime('%Y-%m-%d')
             if date in historical_data:
                 for stock in historical_data[date]:
                     # Avoid duplicates
@@ -108,149 +104,133 @@ class DataManager:
         return last_week_stocks
     
     # Permanent stocks management
+    @traced(category="data_manager")
     def add_permanent_stock(self, symbol: str, reason: str):
         """Add a stock to permanent watchlist"""
-        permanent_stocks = self.load_json_file(self.permanent_stocks_file, [])
+        date_added = datetime.now().strftime('%Y-%m-%d')
         
-        # Check if stock already exists
-        for stock in permanent_stocks:
+        # Keep the original date if the stock already exists
+        for stock in self.get_permanent_stocks():
             if stock['symbol'] == symbol:
-                stock['reason'] = reason  # Update reason if stock exists
-                self.save_json_file(self.permanent_stocks_file, permanent_stocks)
-                return
+                date_added = stock.get('date_added', date_added)
+                break
         
-        # Add new permanent stock
-        permanent_stocks.append({
+        self.storage.save_permanent_stock({
             'symbol': symbol,
             'reason': reason,
-            'date_added': datetime.now().strftime('%Y-%m-%d')
+            'date_added': date_added
         })
-        self.save_json_file(self.permanent_stocks_file, permanent_stocks)
     
+    @traced(category="data_manager")
     def remove_permanent_stock(self, symbol: str):
         """Remove a stock from permanent watchlist"""
-        permanent_stocks = self.load_json_file(self.permanent_stocks_file, [])
-        permanent_stocks = [stock for stock in permanent_stocks if stock['symbol'] != symbol]
-        self.save_json_file(self.permanent_stocks_file, permanent_stocks)
+        self.storage.remove_permanent_stock(symbol)
     
+    @traced(category="data_manager")
     def get_permanent_stocks(self) -> List[Dict]:
         """Get permanent watchlist"""
-        return self.load_json_file(self.permanent_stocks_file, [])
+        return self.storage.get_permanent_stocks()
     
     # Trading plan management
+    @traced(category="data_manager")
     def save_trading_plan(self, plan_data: Dict):
         """Save trading plan"""
         plan_data['last_updated'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        self.save_json_file(self.trading_plan_file, plan_data)
+        self.storage.save_trading_plan(plan_data)
     
+    @traced(category="data_manager")
     def get_trading_plan(self) -> Dict:
         """Get trading plan"""
-        return self.load_json_file(self.trading_plan_file, {})
+        return self.storage.get_trading_plan()
     
     # Stock-specific trading plans
+    @traced(category="data_manager")
     def save_stock_trading_plan(self, symbol: str, plan_data: Dict):
-        """Save trading plan for a specific stock"""
-        stock_plans = self.load_json_file(self.stock_trading_plans_file, {})
-        stock_plans[symbol] = plan_data
-        self.save_json_file(self.stock_trading_plans_file, stock_plans)
+        """Save trading plan for a specific stock, with its parsed price levels"""
+        plan_data['levels'] = parse_plan_levels(plan_data)
+        plan_data['levels_version'] = LEVELS_VERSION
+        self.storage.save_stock_trading_plan(symbol, plan_data)
     
+    @traced(category="data_manager")
     def get_stock_trading_plans(self) -> Dict:
         """Get all stock-specific trading plans"""
-        return self.load_json_file(self.stock_trading_plans_file, {})
+        return self.storage.get_stock_trading_plans()
     
+    @traced(category="data_manager")
     def get_stock_trading_plan(self, symbol: str) -> Dict:
         """Get trading plan for a specific stock"""
         stock_plans = self.get_stock_trading_plans()
         return stock_plans.get(symbol, {})
     
+    @traced(category="data_manager")
+    def get_stock_trading_plans_for(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Get trading plans for several stocks from a single load"""
+        stock_plans = self.get_stock_trading_plans()
+        return {symbol: stock_plans.get(symbol, {}) for symbol in symbols}
+    
     # Daily reflection management
+    @traced(category="data_manager")
     def save_daily_reflection(self, reflection_data: Dict):
-        """Save daily reflection"""
-        reflections = self.load_json_file(self.reflections_file, [])
-        
-        # Remove existing reflection for today if it exists
-        today = reflection_data['date']
-        reflections = [r for r in reflections if r.get('date') != today]
-        
-        # Add new reflection
-        reflections.append(reflection_data)
-        self.save_json_file(self.reflections_file, reflections)
+        """Save daily reflection, replacing any existing one for the same date"""
+        previous_revision = self.storage.get_reflections_revision()
+        self.storage.save_reflection(reflection_data)
+        self.scorecard.record(reflection_data, previous_revision)
     
+    @traced(category="data_manager")
     def get_daily_reflections(self) -> List[Dict]:
         """Get all daily reflections"""
-        return self.load_json_file(self.reflections_file, [])
+        return self.storage.get_reflections()
+    
+    def _sum_day_counts(self, days: Dict[str, Dict], key: str) -> Counter:
+        counts = Counter()
+        for bucket in days.values():
+            counts.update(bucket[key])
+        return counts
     
+    @traced(category="data_manager")
     def get_most_common_mistake_last_week(self) -> Dict:
         """Get the most common mistake from the last week"""
-        reflections = self.get_daily_reflections()
         last_week_date = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
         
-        # Filter reflections from last week
-        last_week_reflections = [
-            r for r in reflections 
-            if r.get('date', '') >= last_week_date
-        ]
-        
         # Count mistakes
-        all_mistakes = []
-        for reflection in last_week_reflections:
-            all_mistakes.extend(reflection.get('mistakes_made', []))
+        mistake_counts = self._sum_day_counts(self.scorecard.get_days(last_week_date), 'mistakes')
         
-        if all_mistakes:
-            mistake_counts = Counter(all_mistakes)
+        if mistake_counts:
             most_common = mistake_counts.most_common(1)[0]
             return {'mistake': most_common[0], 'count': most_common[1]}
         
         return {}
     
+    @traced(category="data_manager")
     def get_weekly_scorecard_data(self) -> Dict:
         """Get data for weekly scorecard"""
-        reflections = self.get_daily_reflections()
         last_week_date = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
         
-        # Filter reflections from last week
-        weekly_reflections = [
-            r for r in reflections 
-            if r.get('date', '') >= last_week_date
-        ]
-        
-        # Count mistakes
-        all_mistakes = []
-        for reflection in weekly_reflections:
-            all_mistakes.extend(reflection.get('mistakes_made', []))
-        mistake_counts = Counter(all_mistakes)
+        # Reflections from last week, and their precomputed day buckets
+        weekly_reflections = self.storage.get_reflections(since=last_week_date)
+        days = self.scorecard.get_days(last_week_date)
         
-        # Count broken rules
-        all_broken_rules = []
-        for reflection in weekly_reflections:
-            all_broken_rules.extend(reflection.get('broken_rules', []))
-        broken_rules_counts = Counter(all_broken_rules)
-        
-        # Count good practices
-        all_good_practices = []
-        for reflection in weekly_reflections:
-            all_good_practices.extend(reflection.get('good_practices', []))
-        good_practices_counts = Counter(all_good_practices)
+        mistake_counts = self._sum_day_counts(days, 'mistakes')
+        broken_rules_counts = self._sum_day_counts(days, 'broken_rules')
+        good_practices_counts = self._sum_day_counts(days, 'good_practices')
         
         # Calculate discipline metrics
         discipline_scores = [
-            {'date': r.get('date'), 'score': r.get('discipline_score', 0)}
-            for r in weekly_reflections
-            if r.get('discipline_score') is not None
+            {'date': date, 'score': bucket['discipline_score']}
+            for date, bucket in days.items()
+            if bucket['discipline_score'] is not None
         ]
         
         # Calculate discipline streak (consecutive days with score > 8)
         discipline_streak = 0
-        sorted_reflections = sorted(weekly_reflections, key=lambda x: x.get('date', ''), reverse=True)
-        
-        for reflection in sorted_reflections:
-            if reflection.get('discipline_score', 0) > 8:
+        for date in sorted(days, reverse=True):
+            if (days[date]['discipline_score'] or 0) > 8:
                 discipline_streak += 1
             else:
                 break
         
         # Calculate average discipline score
-        scores = [r.get('discipline_score', 0) for r in weekly_reflections if r.get('discipline_score') is not None]
+        scores = [entry['score'] for entry in discipline_scores]
         avg_discipline = sum(scores) / len(scores) if scores else None
         
         return {
@@ -262,3 +242,67 @@ class DataManager:
             'discipline_streak': discipline_streak,
             'avg_discipline': avg_discipline
         }
+    
+    # Bulk import
+    @traced(category="data_manager")
+    def import_historical_stocks(self, history: Dict[str, List[Dict]]) -> int:
+        """Merge archived watchlists keyed by date; return the number of new entries"""
+        return self.storage.merge_historical_stocks(history)
+    
+    @traced(category="data_manager")
+    def import_stock_trading_plans(self, stock_plans: Dict[str, Dict]):
+        """Save several stocks' plans at once, with their parsed price levels"""
+        for plan_data in stock_plans.values():
+            plan_data['levels'] = parse_plan_levels(plan_data)
+            plan_data['levels_version'] = LEVELS_VERSION
+        self.storage.save_stock_trading_plans(stock_plans)
+    
+    @traced(category="data_manager")
+    def import_reflections(self, reflections: List[Dict]):
+        """Save several daily reflections at once, then rebuild the scorecard once"""
+        if not reflections:
+            return
+        self.storage.save_reflections(reflections)
+        self.scorecard.rebuild()
+    
+    # Trade log
+    @traced(category="data_manager")
+    def add_fill(self, symbol: str, side: str, quantity: float, price: float, fees: float = 0.0,
+                 time: Optional[datetime] = None):
+        """Log one execution; side is "buy" or "sell" """
+        from trade_log import fill_frame
+        self.trade_log.append(fill_frame(symbol, side, quantity, price, fees, time or datetime.now()))
+    
+    @traced(category="data_manager")
+    def import_fills(self, fills) -> int:
+        """Log a batch of executions (a DataFrame, see normalize_fills) in one write"""
+        return self.trade_log.append(fills)
+    
+    @traced(category="data_manager")
+    def get_fills(self):
+        """Get every logged execution as a DataFrame"""
+        return self.trade_log.load()
+    
+    def _get_round_trips(self):
+        from trade_log import compute_round_trips, frame_bytes
+        # Round trips only change with the log, so reuse them across reruns
+        revision = self.trade_log.get_revision()
+        if self._round_trips is None or self._round_trips[0] != revision:
+            trips = compute_round_trips(self.trade_log.load())
+            self._round_trips = (revision, trips, frame_bytes(trips))
+        return self._round_trips[1]
+    
+    @traced(category="data_manager")
+    def get_trade_analytics(self, marks: Optional[Dict[str, float]] = None) -> Dict:
+        """Round trips with P&L and R-multiples, their summary and daily P&L.
+
+        marks maps symbols to last prices for valuing open positions.
+        """
+        from trade_log import apply_marks, apply_r_multiples, daily_pnl, summarize_trades
+        plans = self.get_stock_trading_plans()
+        trips = apply_r_multiples(apply_marks(self._get_round_trips(), marks), plans)
+        return {
+            'trips': trips,
+            'summary': summarize_trades(trips, plans),
+            'daily': daily_pnl(trips)
+        }
@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from data_manager import DataManager
+
+
+class DataManagerPool:
+    """Bounded LRU of per-user DataManager instances.
+
+    Keeps at most max_instances users resident and their read caches within
+    max_cache_bytes (measured as the on-disk size of the cached files), and
+    drops users idle for longer than idle_timeout seconds. Evicted
+    instances are closed, which frees their caches; a session still holding
+    one keeps working and the next get() builds a fresh instance. The byte
+    budget and idle timeout are checked at most every sweep_interval
+    seconds, since they need a pass over every resident user.
+    """
+
+    def __init__(self, max_instances: int = 256, max_cache_bytes: int = 256 * 1024 * 1024,
+                 idle_timeout: float = 30 * 60, sweep_interval: float = 5.0,
+                 factory: Callable[[Optional[str]], DataManager] = None):
+        self.max_instances = max_instances
+        self.max_cache_bytes = max_cache_bytes
+        self.idle_timeout = idle_timeout
+        self.sweep_interval = sweep_interval
+        self.factory = factory or (lambda username: DataManager(username=username))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': {'size': 0, 'memory': 0, 'idle': 0}}
+
+    def get(self, username: Optional[str] = None) -> DataManager:
+        """Get the user's DataManager, creating it (and evicting others) if needed"""
+        evicted = []
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is not None:
+                self._entries.move_to_end(username)
+                self.stats['hits'] += 1
+            else:
+                entry = self._entries[username] = {'dm': self.factory(username)}
+                self.stats['misses'] += 1
+            entry['last_used'] = time.monotonic()
+
+            while len(self._entries) > self.max_instances:
+                evicted.append(self._pop_oldest('size'))
+            if time.monotonic() - self._last_sweep >= self.sweep_interval:
+                evicted.extend(self._sweep(keep=username))
+            dm = entry['dm']
+
+        # Close outside the lock; closing may wait for a journal compaction
+        for old in evicted:
+            old.close()
+        return dm
+
+    def _pop_oldest(self, reason: str) -> DataManager:
+        _, entry = self._entries.popitem(last=False)
+        self.stats['evictions'][reason] += 1
+        return entry['dm']
+
+    def _sweep(self, keep=None):
+        """Evict idle users, then least recently used ones until under the byte budget"""
+        now = self._last_sweep = time.monotonic()
+        evicted = []
+        for username in list(self._entries):
+            if username != keep and now - self._entries[username]['last_used'] > self.idle_timeout:
+                evicted.append(self._entries.pop(username)['dm'])
+                self.stats['evictions']['idle'] += 1
+
+        cache_bytes = {username: entry['dm'].get_cache_stats().get('bytes', 0)
+                       for username, entry in self._entries.items()}
+        total = sum(cache_bytes.values())
+        for username in list(self._entries):
+            if total <= self.max_cache_bytes:
+                break
+            if username == keep:
+                continue
+            evicted.append(self._entries.pop(username)['dm'])
+            self.stats['evictions']['memory'] += 1
+            total -= cache_bytes[username]
+        return evicted
+
+    def evict(self, username: Optional[str]):
+        """Drop one user's instance, e.g. on logout"""
+        with self._lock:
+            entry = self._entries.pop(username, None)
+        if entry is not None:
+            entry['dm'].close()
+
+    def close(self):
+        """Close and drop every resident instance"""
+        with self._lock:
+            entries, self._entries = list(self._entries.values()), OrderedDict()
+        for entry in entries:
+            entry['dm'].close()
+
+    def get_stats(self) -> Dict:
+        """Hit/miss and eviction counters plus per-user residency"""
+        now = time.monotonic()
+        with self._lock:
+            residents = [
+                {
+                    'username': username,
+                    'idle_seconds': now - entry['last_used'],
+                    'cache_bytes': entry['dm'].get_cache_stats().get('bytes', 0)
+                }
+                for username, entry in reversed(self._entries.items())
+            ]
+            return {
+                'hits': self.stats['hits'],
+                'misses': self.stats['misses'],
+                'evictions': dict(self.stats['evictions']),
+                'resident': len(residents),
+                'cache_bytes': sum(r['cache_bytes'] for r in residents),
+                'max_instances': self.max_instances,
+                'max_cache_bytes': self.max_cache_bytes,
+                'residents': residents
+            }
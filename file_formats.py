@@ -0,0 +1,70 @@
+import json
+import os
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# "json" is the original pretty-printed layout; "compact" drops the
+# whitespace (and uses orjson when installed); "msgpack" is binary and needs
+# the msgpack package
+FILE_FORMATS = ("json", "compact", "msgpack")
+
+# msgpack files start with this header; 0xc1 is never used by msgpack and
+# can't start a JSON document, so a file's format is known from its first byte
+MSGPACK_HEADER = b"\xc1DTM"
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise ImportError("The msgpack file format needs the msgpack package (pip install msgpack)") from None
+    return msgpack
+
+
+def encode(data: Any, file_format: str = "json") -> bytes:
+    """Serialize data in one of FILE_FORMATS"""
+    if file_format == "json":
+        return json.dumps(data, indent=2).encode()
+    if file_format == "compact":
+        if orjson is not None:
+            return orjson.dumps(data)
+        return json.dumps(data, separators=(",", ":")).encode()
+    if file_format == "msgpack":
+        return MSGPACK_HEADER + _msgpack().packb(data, use_bin_type=True)
+    raise ValueError(f"Unknown file format: {file_format} (expected one of {', '.join(FILE_FORMATS)})")
+
+
+def decode(raw: bytes) -> Any:
+    """Parse file contents in any of FILE_FORMATS, detected from the header.
+
+    Raises ValueError for contents that don't parse.
+    """
+    if raw.startswith(MSGPACK_HEADER):
+        try:
+            return _msgpack().unpackb(raw[len(MSGPACK_HEADER):], raw=False)
+        except ImportError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Invalid msgpack data: {e}") from e
+    if orjson is not None:
+        return orjson.loads(raw)  # orjson.JSONDecodeError subclasses ValueError
+    return json.loads(raw)
+
+
+def detect_format(raw: bytes) -> str:
+    """Best guess at which of FILE_FORMATS produced raw"""
+    if raw.startswith(MSGPACK_HEADER):
+        return "msgpack"
+    return "json" if b"\n " in raw[:256] else "compact"
+
+
+def default_file_format() -> str:
+    """File format for new writes, from DAYTRADER_FILE_FORMAT"""
+    file_format = os.environ.get("DAYTRADER_FILE_FORMAT", "json")
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f"Unknown file format: {file_format} (expected one of {', '.join(FILE_FORMATS)})")
+    return file_format
@@ -0,0 +1,37 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to locking within this process only
+    fcntl = None
+
+_process_locks = {}
+_process_locks_guard = threading.Lock()
+
+
+def _process_lock(path: str) -> threading.Lock:
+    with _process_locks_guard:
+        return _process_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+@contextmanager
+def file_lock(path: str, shared: bool = False):
+    """Hold an advisory lock on path (via a "path.lock" sidecar) across processes.
+
+    The lock covers one file, so writers to different files never wait on
+    each other. shared=True takes a read lock that only excludes writers.
+    Where fcntl is unavailable the lock is exclusive and per process.
+    """
+    if fcntl is None:
+        with _process_lock(path):
+            yield
+        return
+
+    with open(f"{path}.lock", 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
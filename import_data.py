@@ -0,0 +1,251 @@
+"""Stream CSV or JSONL exports into a user's watchlist history, reflections or plans.
+
+Reads the input a row at a time and writes it in batches, so memory stays
+flat however large the file is, and each batch is saved with one write per
+file (one per monthly partition for history) instead of one per row. Rows
+are validated and deduplicated: history by (date, symbol), keeping entries
+already archived, reflections by date and plans by symbol, where the last
+row wins. With the JSON backend, date-sorted history imports fastest
+since each batch then touches only a few monthly partitions. Run from the
+repository root:
+
+    python import_data.py history broker_watchlists.csv --user alice
+    python import_data.py reflections old_journal.jsonl --user alice --batch-size 1000
+    python import_data.py plans plans.csv --user alice --dry-run
+
+CSV headers are matched case-insensitively and a few common aliases are
+accepted (ticker for symbol, notes for reason). List fields in CSV
+reflections are separated with ";". Pass "-" to read from stdin.
+"""
+import argparse
+import csv
+import io
+import json
+import re
+import sys
+from datetime import datetime
+from itertools import islice
+
+from data_manager import DataManager
+from storage import STORAGE_BACKENDS, create_storage
+
+IMPORT_KINDS = ("history", "reflections", "plans")
+
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%Y/%m/%d', '%Y%m%d')
+SYMBOL_PATTERN = re.compile(r'^[A-Z0-9][A-Z0-9.\-^=]{0,11}$')
+
+COLUMN_ALIASES = {
+    'ticker': 'symbol',
+    'stock': 'symbol',
+    'trade_date': 'date',
+    'day': 'date',
+    'notes': 'reason',
+    'comment': 'reason',
+    'mistakes': 'mistakes_made',
+    'rules_broken': 'broken_rules',
+    'score': 'discipline_score',
+    'notes_text': 'reflection_notes',
+}
+
+PLAN_FIELDS = ('initial_entry', 'entry_size', 'scale_up_condition', 'scale_down_condition',
+               'exit_strategy', 'wrong_scenario', 'last_updated')
+REFLECTION_LIST_FIELDS = ('broken_rules', 'mistakes_made', 'good_practices')
+
+
+# Reading
+def read_rows(path, input_format):
+    """Yield (line number, row dict) from a CSV or JSONL file, one row at a time"""
+    stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig') if path == '-' \
+        else open(path, 'r', encoding='utf-8-sig', newline='')
+    with stream:
+        if input_format == 'csv':
+            reader = csv.DictReader(stream)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_num, line in enumerate(stream, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_num, ValueError(f"invalid JSON: {e.msg}")
+                    continue
+                yield line_num, row if isinstance(row, dict) else ValueError("not a JSON object")
+
+
+def normalize_row(row):
+    """Lower-case, underscore and alias the column names; drop empty values"""
+    normalized = {}
+    for key, value in row.items():
+        if key is None or value is None or value == '':
+            continue
+        key = re.sub(r'\s+', '_', str(key).strip().lower())
+        normalized[COLUMN_ALIASES.get(key, key)] = value.strip() if isinstance(value, str) else value
+    return normalized
+
+
+# Validation
+def parse_date(value):
+    if not value:
+        raise ValueError("missing date")
+    text = str(value).strip()
+    # Timestamps like 2024-03-01T15:30:00 or "2024-03-01 15:30"
+    text = re.split(r'[T ]', text, maxsplit=1)[0]
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognized date {value!r}")
+
+
+def parse_symbol(value):
+    symbol = str(value or '').strip().upper()
+    if not symbol:
+        raise ValueError("missing symbol")
+    if not SYMBOL_PATTERN.match(symbol):
+        raise ValueError(f"invalid symbol {value!r}")
+    return symbol
+
+
+def parse_list(value):
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in str(value or '').split(';') if item.strip()]
+
+
+def history_record(row):
+    """Return ((date, symbol), stock) for a watchlist history row"""
+    date = parse_date(row.get('date') or row.get('date_added'))
+    symbol = parse_symbol(row.get('symbol'))
+    stock = {
+        'symbol': symbol,
+        'reason': str(row.get('reason', 'Imported')),
+        'date_added': parse_date(row['date_added']) if row.get('date_added') else date
+    }
+    return (date, symbol), stock
+
+
+def reflection_record(row):
+    """Return (date, reflection) for a daily reflection row"""
+    date = parse_date(row.get('date'))
+    reflection = {'date': date}
+    for field in REFLECTION_LIST_FIELDS:
+        reflection[field] = parse_list(row.get(field))
+    score = row.get('discipline_score')
+    if score is None:
+        raise ValueError("missing discipline_score")
+    try:
+        score = int(float(score))
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid discipline_score {score!r}") from None
+    if not 1 <= score <= 10:
+        raise ValueError(f"discipline_score {score} outside 1-10")
+    reflection['discipline_score'] = score
+    reflection['reflection_notes'] = str(row.get('reflection_notes', ''))
+    return date, reflection
+
+
+def plan_record(row):
+    """Return (symbol, plan) for a stock trading plan row"""
+    symbol = parse_symbol(row.get('symbol'))
+    plan = {field: str(row[field]) for field in PLAN_FIELDS if field in row}
+    if not any(field in plan for field in PLAN_FIELDS if field != 'last_updated'):
+        raise ValueError("no plan fields")
+    plan.setdefault('last_updated', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    return symbol, plan
+
+
+RECORD_PARSERS = {'history': history_record, 'reflections': reflection_record, 'plans': plan_record}
+
+
+# Writing
+def write_batch(dm, kind, records):
+    """Save one batch of deduplicated records; return how many were new or updated"""
+    if kind == 'history':
+        history = {}
+        for (date, _), stock in records.items():
+            history.setdefault(date, []).append(stock)
+        return dm.import_historical_stocks(history)
+    if kind == 'reflections':
+        dm.import_reflections([records[date] for date in sorted(records)])
+    else:
+        dm.import_stock_trading_plans(records)
+    return len(records)
+
+
+def import_file(dm, path, kind, input_format, batch_size=5000, dry_run=False, max_errors=20):
+    """Stream one file into dm; return row counts"""
+    parse_record = RECORD_PARSERS[kind]
+    counts = {'rows': 0, 'invalid': 0, 'duplicates': 0, 'imported': 0, 'batches': 0}
+    rows = read_rows(path, input_format)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        records = {}
+        for line_num, row in batch:
+            counts['rows'] += 1
+            try:
+                if isinstance(row, Exception):
+                    raise row
+                key, record = parse_record(normalize_row(row))
+            except ValueError as e:
+                counts['invalid'] += 1
+                if counts['invalid'] <= max_errors:
+                    print(f"{path}:{line_num}: skipped, {e}", file=sys.stderr)
+                continue
+            if key in records:
+                counts['duplicates'] += 1
+                if kind == 'history':
+                    continue
+            # Reflections and plans: the last row for a key wins
+            records[key] = record
+
+        if records and not dry_run:
+            imported = write_batch(dm, kind, records)
+            # History entries already archived are kept, so count them as duplicates
+            counts['duplicates'] += len(records) - imported
+            counts['imported'] += imported
+            counts['batches'] += 1
+        elif dry_run:
+            counts['imported'] += len(records)
+    return counts
+
+
+def detect_input_format(path):
+    return 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream CSV or JSONL exports into DayTrader data")
+    parser.add_argument("kind", choices=IMPORT_KINDS)
+    parser.add_argument("paths", nargs='+', help='Input files, or - for stdin')
+    parser.add_argument("--user", default=None, help='Username (default: the shared data files)')
+    parser.add_argument("--format", choices=['csv', 'jsonl'], default=None, dest='input_format',
+                        help='Input format (default: from the file extension)')
+    parser.add_argument("--batch-size", type=int, default=5000, help='Rows per write')
+    parser.add_argument("--backend", choices=STORAGE_BACKENDS, default=None)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--max-errors", type=int, default=20, help='Invalid rows to report per file')
+    parser.add_argument("--dry-run", action="store_true", help='Validate without writing')
+    args = parser.parse_args()
+    if args.batch_size < 1:
+        parser.error("--batch-size must be positive")
+
+    dm = DataManager(username=args.user, storage=create_storage(args.user, args.backend, args.data_dir))
+    try:
+        for path in args.paths:
+            input_format = args.input_format or detect_input_format(path)
+            counts = import_file(dm, path, args.kind, input_format, args.batch_size, args.dry_run, args.max_errors)
+            action = "would import" if args.dry_run else "imported"
+            print(f"{path}: {counts['rows']} rows, {action} {counts['imported']}, "
+                  f"{counts['duplicates']} duplicates, {counts['invalid']} invalid"
+                  + ("" if args.dry_run else f", {counts['batches']} batch write(s)"))
+    finally:
+        dm.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,427 @@
+import os
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, time as dtime, timedelta
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+from tracing import span, tracer
+from watch_registry import WatchRegistry
+
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = dtime(9, 30)
+MARKET_CLOSE = dtime(16, 0)
+
+INTERVAL_SECONDS = {"1m": 60, "5m": 300, "15m": 900, "30m": 1800, "1h": 3600, "1d": 86400}
+
+# Bar interval used for each chart window in the Trading Day tab
+CHART_INTERVALS = {"1d": "5m", "5d": "15m", "1mo": "1h"}
+
+# Calendar days a chart window can reach back, generous enough to span
+# weekends so a "1d" window still finds the last session on a Monday morning
+PERIOD_DAYS = {"1d": 5, "5d": 10, "1mo": 35, "3mo": 95, "6mo": 190, "1y": 370}
+
+
+# Market hours
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    """Whether the regular US session is open (weekends closed, holidays not modelled)"""
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+def last_market_close(now: Optional[datetime] = None) -> datetime:
+    """Most recent regular-session close at or before now"""
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    close = datetime.combine(now.date(), MARKET_CLOSE, tzinfo=MARKET_TZ)
+    if close > now:
+        close -= timedelta(days=1)
+    while close.weekday() >= 5:
+        close -= timedelta(days=1)
+    return close
+
+
+def is_stale(fetched_at: float, interval: str, now: Optional[datetime] = None) -> bool:
+    """Whether bars fetched at fetched_at (epoch seconds) need refreshing.
+
+    While the market is open a new bar completes every interval. Outside
+    market hours nothing changes after the last close has been captured.
+    """
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    if is_market_open(now):
+        return now.timestamp() - fetched_at >= INTERVAL_SECONDS.get(interval, 60)
+    return fetched_at < last_market_close(now).timestamp()
+
+
+def slice_window(bars: pd.DataFrame, period: str) -> pd.DataFrame:
+    """Cut a chart window ("1d", "5d", "1mo", ...) from the end of cached bars.
+
+    Day windows count trading sessions present in the data; month and year
+    windows are calendar offsets from the last bar.
+    """
+    if bars.empty:
+        return bars
+    match = re.fullmatch(r"(\d+)(d|mo|y)", period)
+    if not match:
+        return bars
+    count, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        sessions = bars.index.normalize().unique()
+        return bars[bars.index.normalize() >= sessions[-min(count, len(sessions))]]
+    offset = pd.DateOffset(months=count) if unit == "mo" else pd.DateOffset(years=count)
+    return bars[bars.index > bars.index[-1] - offset]
+
+
+class MarketDataProvider:
+    """Source of OHLCV bars with a DatetimeIndex in exchange time"""
+
+    def now(self) -> datetime:
+        """Current time as seen by this provider"""
+        return datetime.now(MARKET_TZ)
+
+    def fetch_bars(self, symbol: str, interval: str, period: Optional[str] = None,
+                   start: Optional[datetime] = None) -> pd.DataFrame:
+        """Fetch bars for a trailing period, or from start up to now"""
+        raise NotImplementedError
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Live bars from Yahoo Finance"""
+
+    def __init__(self, request_timeout: float = 10):
+        self.request_timeout = request_timeout
+
+    def fetch_bars(self, symbol: str, interval: str, period: Optional[str] = None,
+                   start: Optional[datetime] = None) -> pd.DataFrame:
+        # Imported on the first download rather than when the store is built
+        import yfinance
+        ticker = yfinance.Ticker(symbol)
+        if start is not None:
+            return ticker.history(start=start, interval=interval, timeout=self.request_timeout)
+        return ticker.history(period=period, interval=interval, timeout=self.request_timeout)
+
+
+class ReplayProvider(MarketDataProvider):
+    """Recorded or synthetic bars served from local files, without the network.
+
+    Bars come from ``{data_dir}/{symbol}_{interval}.csv`` when such a
+    recording exists, otherwise from a random walk seeded by the symbol, so
+    every run sees the same data. A replay clock starts at start_at (default:
+    the real time) and advances speed times faster than real time; only bars
+    up to the replay clock are served. latency seconds are slept per fetch
+    to stand in for a network round trip.
+    """
+
+    SYNTHETIC_DAYS = 60
+
+    def __init__(self, data_dir: str = os.path.join("data", "replay"), speed: float = 1.0,
+                 latency: float = 0.0, start_at: Optional[datetime] = None):
+        self.data_dir = data_dir
+        self.speed = speed
+        self.latency = latency
+        self._started = time.monotonic()
+        self._start_at = (start_at or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def now(self) -> datetime:
+        elapsed = (time.monotonic() - self._started) * self.speed
+        return self._start_at + timedelta(seconds=elapsed)
+
+    def _path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.data_dir, f"{symbol}_{interval}.csv")
+
+    def record(self, symbol: str, interval: str, bars: pd.DataFrame):
+        """Save bars as a recording for later replay"""
+        os.makedirs(self.data_dir, exist_ok=True)
+        bars[["Open", "High", "Low", "Close", "Volume"]].to_csv(self._path(symbol, interval), index_label="Datetime")
+        with self._lock:
+            self._series.pop((symbol, interval), None)
+
+    def _synthesize(self, symbol: str, interval: str) -> pd.DataFrame:
+        step = pd.Timedelta(seconds=INTERVAL_SECONDS.get(interval, 300))
+        end = self._start_at.date()
+        days = pd.bdate_range(end=end, periods=self.SYNTHETIC_DAYS)
+        # Every session's bar times at once: day + open + k * step, in exchange time
+        session_open = pd.Timedelta(hours=MARKET_OPEN.hour, minutes=MARKET_OPEN.minute)
+        session = pd.Timedelta(hours=MARKET_CLOSE.hour, minutes=MARKET_CLOSE.minute) - session_open
+        offsets = np.asarray(session_open + step * np.arange(max((session - step) // step + 1, 0)), dtype="timedelta64[ns]")
+        index = pd.DatetimeIndex((days.values[:, None] + offsets[None, :]).ravel()).tz_localize(MARKET_TZ)
+
+        rng = np.random.default_rng(zlib.crc32(f"{symbol}:{interval}".encode()))
+        base = 20 + rng.random() * 280
+        close = base * np.exp(np.cumsum(rng.normal(0, 0.002, len(index))))
+        open_ = np.concatenate([[base], close[:-1]])
+        spread = np.abs(rng.normal(0, 0.0015, len(index))) * close
+        return pd.DataFrame({
+            "Open": open_,
+            "High": np.maximum(open_, close) + spread,
+            "Low": np.minimum(open_, close) - spread,
+            "Close": close,
+            "Volume": rng.integers(10_000, 500_000, len(index)).astype(float),
+        }, index=pd.DatetimeIndex(index, name="Datetime"))
+
+    def _get_series(self, symbol: str, interval: str) -> pd.DataFrame:
+        with self._lock:
+            series = self._series.get((symbol, interval))
+            if series is None:
+                path = self._path(symbol, interval)
+                if os.path.exists(path):
+                    series = pd.read_csv(path, index_col="Datetime")
+                    series.index = pd.to_datetime(series.index, utc=True).tz_convert(MARKET_TZ)
+                else:
+                    series = self._synthesize(symbol, interval)
+                self._series[(symbol, interval)] = series
+            return series
+
+    def fetch_bars(self, symbol: str, interval: str, period: Optional[str] = None,
+                   start: Optional[datetime] = None) -> pd.DataFrame:
+        if self.latency:
+            time.sleep(self.latency)
+        series = self._get_series(symbol, interval)
+        series = series[series.index <= self.now()]
+        if start is not None:
+            return series[series.index >= start]
+        return slice_window(series, period or "1d")
+
+
+def create_provider(name: Optional[str] = None, request_timeout: float = 10) -> MarketDataProvider:
+    """Create the provider selected by name or DAYTRADER_MARKET_DATA.
+
+    The replay provider reads DAYTRADER_REPLAY_DIR, DAYTRADER_REPLAY_SPEED,
+    DAYTRADER_REPLAY_LATENCY and DAYTRADER_REPLAY_START (ISO timestamp).
+    """
+    name = name or os.environ.get("DAYTRADER_MARKET_DATA", "yfinance")
+    if name == "yfinance":
+        return YFinanceProvider(request_timeout=request_timeout)
+    if name == "replay":
+        start_at = os.environ.get("DAYTRADER_REPLAY_START")
+        return ReplayProvider(
+            data_dir=os.environ.get("DAYTRADER_REPLAY_DIR", os.path.join("data", "replay")),
+            speed=float(os.environ.get("DAYTRADER_REPLAY_SPEED", "1")),
+            latency=float(os.environ.get("DAYTRADER_REPLAY_LATENCY", "0")),
+            start_at=datetime.fromisoformat(start_at).replace(tzinfo=MARKET_TZ) if start_at else None
+        )
+    raise ValueError(f"Unknown market data provider: {name} (expected yfinance or replay)")
+
+
+class BarStore:
+    """On-disk OHLCV cache keyed by (symbol, interval).
+
+    Each key is one pickled DataFrame plus the time it was last fetched and
+    the widest window it covers. Requests are served by slicing the cache;
+    when it is stale only bars from the last cached timestamp onwards are
+    downloaded and merged in.
+    """
+
+    def __init__(self, cache_dir: str = os.path.join("data", "bars"), max_workers: int = 48,
+                 request_timeout: float = 10, provider: Optional[MarketDataProvider] = None):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.request_timeout = request_timeout
+        self.provider = provider or create_provider(request_timeout=request_timeout)
+        self._executor = None
+        os.makedirs(cache_dir, exist_ok=True)
+        self._entries = {}
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        self.stats = {'hits': 0, 'incremental_fetches': 0, 'full_fetches': 0}
+
+    def _path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.cache_dir, f"{symbol}_{interval}.pkl")
+
+    def _lock_for(self, key) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _load_entry(self, symbol: str, interval: str) -> Optional[Dict]:
+        entry = self._entries.get((symbol, interval))
+        if entry is not None:
+            return entry
+        try:
+            entry = pd.read_pickle(self._path(symbol, interval))
+        except (OSError, ValueError, EOFError, KeyError):
+            return None
+        self._entries[(symbol, interval)] = entry
+        return entry
+
+    def _save_entry(self, symbol: str, interval: str, entry: Dict):
+        self._entries[(symbol, interval)] = entry
+        path = self._path(symbol, interval)
+        tmp_path = f"{path}.tmp"
+        try:
+            pd.to_pickle(entry, tmp_path)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def get_bars(self, symbol: str, period: str = "1d", interval: str = "5m") -> pd.DataFrame:
+        """Get the bars for a chart window, fetching only what the cache lacks"""
+        key = (symbol, interval)
+        with self._lock_for(key):
+            entry = self._load_entry(symbol, interval)
+            covers = entry is not None and PERIOD_DAYS.get(entry['period'], 0) >= PERIOD_DAYS.get(period, 0)
+
+            if not covers:
+                with span("fetch_bars", "market_data", symbol=symbol, interval=interval, period=period):
+                    bars = self.provider.fetch_bars(symbol, interval, period=period)
+                if bars.empty:
+                    return bars
+                entry = {'bars': bars, 'period': period, 'fetched_at': self.provider.now().timestamp()}
+                self._save_entry(symbol, interval, entry)
+                self.stats['full_fetches'] += 1
+            elif is_stale(entry['fetched_at'], interval, now=self.provider.now()):
+                cached = entry['bars']
+                try:
+                    # Refetch the last cached bar too, since it may have been partial
+                    with span("fetch_bars", "market_data", symbol=symbol, interval=interval, incremental=True):
+                        new_bars = self.provider.fetch_bars(symbol, interval, start=cached.index[-1])
+                except Exception:
+                    # Serve what we have if the provider is unavailable
+                    return slice_window(cached, period)
+                bars = pd.concat([cached, new_bars])
+                bars = bars[~bars.index.duplicated(keep='last')].sort_index()
+                retention = timedelta(days=PERIOD_DAYS.get(entry['period'], 35))
+                bars = bars[bars.index >= bars.index[-1] - retention]
+                entry = {'bars': bars, 'period': entry['period'], 'fetched_at': self.provider.now().timestamp()}
+                self._save_entry(symbol, interval, entry)
+                self.stats['incremental_fetches'] += 1
+            else:
+                self.stats['hits'] += 1
+
+            return slice_window(entry['bars'], period)
+
+    def _get_bars_for(self, handoff: Optional[tuple], symbol: str, period: str, interval: str) -> pd.DataFrame:
+        with tracer.attach(handoff):
+            return self.get_bars(symbol, period, interval)
+
+    def prefetch(self, symbols: List[str], period: str = "1d", interval: str = "5m",
+                 timeout: Optional[float] = None) -> Dict:
+        """Load bars for many symbols in parallel on a bounded thread pool.
+
+        The pool starts threads only as symbols queue up, so a watchlist of
+        up to max_workers symbols downloads in a single round, in about the
+        time of its slowest request.
+        Each download is limited by request_timeout; timeout caps the whole
+        call (by default enough for every batch of max_workers symbols).
+        Returns the symbols that loaded and an error message per symbol that
+        failed or did not finish in time.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {'loaded': [], 'failed': {}}
+        with self._locks_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bar-prefetch")
+        if timeout is None:
+            batches = -(-len(symbols) // self.max_workers)
+            timeout = self.request_timeout * batches + 1
+
+        with span("prefetch_bars", "market_data", symbols=len(symbols), period=period, interval=interval):
+            # Workers record their fetch_bars spans into the caller's rerun
+            handoff = tracer.handoff()
+            futures = {
+                self._executor.submit(self._get_bars_for, handoff, symbol, period, interval): symbol
+                for symbol in symbols
+            }
+            done, not_done = wait(futures, timeout=timeout)
+
+        loaded, failed = [], {}
+        for future in done:
+            symbol = futures[future]
+            try:
+                bars = future.result()
+            except Exception as e:
+                failed[symbol] = str(e) or type(e).__name__
+                continue
+            if bars.empty:
+                failed[symbol] = "no data"
+            else:
+                loaded.append(symbol)
+        for future in not_done:
+            failed[futures[future]] = f"timed out after {timeout:.0f}s"
+        return {'loaded': [s for s in symbols if s in loaded], 'failed': failed}
+
+
+class RefreshScheduler:
+    """Background refresh of every symbol any active session is watching.
+
+    One scheduler is shared by all sessions in the process. Sessions report
+    their today list to a WatchRegistry (pass a shared one as registry, so
+    sessions can register before any view imports this module); symbols are
+    deduplicated across sessions and each chart window is refreshed on its
+    bar interval while the market is open, plus one pass after the close to
+    capture the closing bars. Sessions that stop reporting for session_ttl
+    seconds are dropped.
+    """
+
+    def __init__(self, store: BarStore, windows: Optional[Dict[str, str]] = None,
+                 session_ttl: float = 1800, poll_seconds: float = 15,
+                 registry: Optional[WatchRegistry] = None):
+        self.store = store
+        self.windows = windows or CHART_INTERVALS
+        self.registry = registry or WatchRegistry(session_ttl)
+        self.poll_seconds = poll_seconds
+        self._last_run = {}
+        self._last_pass_at = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {'passes': 0, 'refreshes': 0, 'failures': 0}
+
+    def watch(self, session_key: str, symbols: List[str]):
+        """Register (or renew) the symbols a session is watching"""
+        self.registry.watch(session_key, symbols)
+
+    def watched_symbols(self) -> List[str]:
+        """Unique symbols across all sessions that are still active"""
+        return self.registry.watched_symbols()
+
+    def run_once(self) -> int:
+        """Refresh every window that is due; return the number of symbols refreshed"""
+        now = self.store.provider.now()
+        market_open = is_market_open(now)
+        if not market_open and self._last_pass_at >= last_market_close(now).timestamp():
+            return 0
+        symbols = self.watched_symbols()
+        if not symbols:
+            return 0
+
+        refreshed = 0
+        for period, interval in self.windows.items():
+            last_run = self._last_run.get(interval, 0.0)
+            if market_open and now.timestamp() - last_run < INTERVAL_SECONDS.get(interval, 300):
+                continue
+            result = self.store.prefetch(symbols, period, interval)
+            self._last_run[interval] = now.timestamp()
+            refreshed += len(result['loaded'])
+            self.stats['failures'] += len(result['failed'])
+        self._last_pass_at = now.timestamp()
+        self.stats['passes'] += 1
+        self.stats['refreshes'] += refreshed
+        return refreshed
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                # Keep the scheduler alive; the next pass retries
+                self.stats['failures'] += 1
+            self._stop.wait(self.poll_seconds)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="bar-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,118 @@
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from tracing import traced
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+METRIC_COLUMNS = [
+    "Price", "High", "Low", "Change %", "Gap %", "VWAP", "vs VWAP %", "ATR", "ATR %",
+    "Rel Volume", "From High %", "From Low %",
+]
+
+
+def stack_bars(bars_by_symbol: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Align per-symbol OHLCV frames into one frame indexed by (symbol, time).
+
+    Each symbol's bars must be in time order and share the exchange time
+    zone; they are laid end to end as contiguous blocks of one array.
+    """
+    frames = [
+        (symbol, bars) for symbol, bars in bars_by_symbol.items()
+        if bars is not None and not bars.empty
+    ]
+    if not frames:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+
+    tz = frames[0][1].index.tz
+    values = np.concatenate([
+        np.column_stack([bars[column].to_numpy(dtype=float) for column in OHLCV_COLUMNS])
+        for _, bars in frames
+    ])
+    times = pd.to_datetime(np.concatenate([bars.index.as_unit("ns").asi8 for _, bars in frames]), utc=tz is not None)
+    if tz is not None:
+        times = times.tz_convert(tz)
+    symbols = np.repeat([symbol for symbol, _ in frames], [len(bars) for _, bars in frames])
+    index = pd.MultiIndex.from_arrays([symbols, times], names=["symbol", "time"])
+    return pd.DataFrame(values, index=index, columns=OHLCV_COLUMNS)
+
+
+@traced(category="metrics")
+def compute_watchlist_metrics(bars_by_symbol: Dict[str, pd.DataFrame], atr_period: int = 14) -> pd.DataFrame:
+    """Compute intraday metrics for every symbol in one batched pass.
+
+    Expects a few sessions of intraday bars per symbol (the 5d window). The
+    last session in each symbol's bars is "today"; earlier sessions supply
+    the previous close for the gap and the baseline for relative volume,
+    which compares today's volume with the average volume prior sessions
+    had traded by the same bar of the day. ATR is the mean true range of
+    the last atr_period bars.
+    """
+    bars = stack_bars(bars_by_symbol)
+    if bars.empty:
+        return pd.DataFrame(columns=METRIC_COLUMNS)
+
+    symbols = bars.index.get_level_values("symbol")
+    sessions = bars.index.get_level_values("time").normalize()
+    by_symbol = bars.groupby(level="symbol", sort=False)
+
+    # True range and ATR
+    prev_close = by_symbol["Close"].shift(1)
+    true_range = np.fmax(
+        bars["High"] - bars["Low"],
+        np.fmax((bars["High"] - prev_close).abs(), (bars["Low"] - prev_close).abs())
+    )
+    atr = true_range.groupby(symbols, sort=False).tail(atr_period).groupby(level="symbol", sort=False).mean()
+
+    # Split each symbol's bars into today and prior sessions
+    session_series = pd.Series(sessions, index=bars.index)
+    last_session = session_series.groupby(symbols, sort=False).transform("max")
+    is_today = (session_series == last_session).to_numpy()
+    today = bars[is_today]
+    prior = bars[~is_today]
+
+    today_groups = today.groupby(level="symbol", sort=False)
+    day = pd.DataFrame({
+        "open": today_groups["Open"].first(),
+        "high": today_groups["High"].max(),
+        "low": today_groups["Low"].min(),
+        "close": today_groups["Close"].last(),
+        "volume": today_groups["Volume"].sum(),
+        "bars": today_groups.size(),
+    })
+    typical_price = (today["High"] + today["Low"] + today["Close"]) / 3
+    vwap = (typical_price * today["Volume"]).groupby(level="symbol", sort=False).sum() / day["volume"]
+
+    prev_day_close = prior.groupby(level="symbol", sort=False)["Close"].last().reindex(day.index)
+
+    # Relative volume: today's volume vs prior sessions' volume at the same bar count
+    prior_sessions = pd.Series(sessions[~is_today], index=prior.index)
+    bar_of_day = prior.groupby([prior.index.get_level_values("symbol"), prior_sessions]).cumcount()
+    prior_symbols = prior.index.get_level_values("symbol")
+    within = bar_of_day.to_numpy() < day["bars"].reindex(prior_symbols).to_numpy()
+    prior_volume = (
+        prior["Volume"][within]
+        .groupby([prior_symbols[within], prior_sessions[within]]).sum()
+        .groupby(level=0).mean()
+        .reindex(day.index)
+    )
+
+    reference = prev_day_close.fillna(day["open"])
+    metrics = pd.DataFrame({
+        "Price": day["close"],
+        "High": day["high"],
+        "Low": day["low"],
+        "Change %": (day["close"] - reference) / reference * 100,
+        "Gap %": (day["open"] - prev_day_close) / prev_day_close * 100,
+        "VWAP": vwap,
+        "vs VWAP %": (day["close"] - vwap) / vwap * 100,
+        "ATR": atr.reindex(day.index),
+        "ATR %": atr.reindex(day.index) / day["close"] * 100,
+        "Rel Volume": day["volume"] / prior_volume,
+        "From High %": (day["close"] - day["high"]) / day["high"] * 100,
+        "From Low %": (day["close"] - day["low"]) / day["low"] * 100,
+    }, columns=METRIC_COLUMNS)
+    metrics.index.name = "Symbol"
+    return metrics.replace([np.inf, -np.inf], np.nan)
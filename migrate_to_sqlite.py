@@ -0,0 +1,104 @@
+"""One-shot migration of the JSON data files into the SQLite backend.
+
+Reads every ``[{username}_]<name>.json`` file and reflection journal in the
+data directory and writes its contents into ``data/daytrader.db``. The JSON
+files are left in place. Run from the repository root:
+
+    python migrate_to_sqlite.py [--data-dir data] [--db data/daytrader.db]
+
+Afterwards start the app with ``DAYTRADER_STORAGE=sqlite``.
+"""
+import argparse
+import os
+from collections import defaultdict
+
+from storage import JsonStorage, SqliteStorage
+
+DATA_FILES = (
+    "today_stocks",
+    "permanent_stocks",
+    "trading_plan",
+    "stock_trading_plans",
+    "reflections",
+    "historical_stocks",
+)
+
+
+def find_users(data_dir):
+    """Map each username (None for the shared files) to its data file kinds"""
+    users = defaultdict(set)
+    for filename in os.listdir(data_dir):
+        stem, ext = os.path.splitext(filename)
+        # History is a directory of partitions, hence the empty extension
+        if ext not in (".json", ".jsonl", ""):
+            continue
+        for kind in DATA_FILES:
+            if stem == kind:
+                users[None].add(kind)
+            elif stem.endswith("_" + kind):
+                users[stem[:-len(kind) - 1]].add(kind)
+    return users
+
+
+def migrate_user(username, data_dir, db_path):
+    """Copy one user's JSON data into SQLite; return row counts per kind"""
+    source = JsonStorage(username=username, data_dir=data_dir)
+    target = SqliteStorage(username=username, data_dir=data_dir, db_path=db_path)
+    counts = {}
+    try:
+        today_stocks = source.get_today_stocks()
+        for stock in today_stocks:
+            target.save_today_stock(stock)
+        counts["today_stocks"] = len(today_stocks)
+
+        permanent_stocks = source.get_permanent_stocks()
+        for stock in permanent_stocks:
+            target.save_permanent_stock(stock)
+        counts["permanent_stocks"] = len(permanent_stocks)
+
+        trading_plan = source.get_trading_plan()
+        if trading_plan:
+            target.save_trading_plan(trading_plan)
+        counts["trading_plan"] = 1 if trading_plan else 0
+
+        stock_plans = source.get_stock_trading_plans()
+        for symbol, plan_data in stock_plans.items():
+            target.save_stock_trading_plan(symbol, plan_data)
+        counts["stock_trading_plans"] = len(stock_plans)
+
+        reflections = source.get_reflections()
+        for reflection in reflections:
+            if reflection.get("date"):
+                target.save_reflection(reflection)
+        counts["reflections"] = len(reflections)
+
+        historical_data = source.get_historical_stocks("0000-00-00", "9999-99-99")
+        for date in sorted(historical_data):
+            target.archive_stocks(date, historical_data[date])
+        counts["historical_stocks"] = len(historical_data)
+    finally:
+        target.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate JSON data files into SQLite")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--db", default=None, help="Database path (default: <data-dir>/daytrader.db)")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(args.data_dir, "daytrader.db")
+    users = find_users(args.data_dir)
+    if not users:
+        print(f"No data files found in {args.data_dir}")
+        return
+
+    for username in sorted(users, key=lambda u: u or ""):
+        counts = migrate_user(username, args.data_dir, db_path)
+        summary = ", ".join(f"{kind}={count}" for kind, count in counts.items())
+        print(f"{username or '(default)'}: {summary}")
+    print(f"Migrated {len(users)} user(s) into {db_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import re
+from typing import TYPE_CHECKING, Dict, List
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Plan fields that carry price levels, and the move that triggers each one
+# (plans are read as long positions)
+PLAN_LEVEL_FIELDS = {
+    'initial_entry': 'touch',
+    'scale_up_condition': 'above',
+    'scale_down_condition': 'below',
+    'wrong_scenario': 'below',
+}
+
+FIELD_LABELS = {
+    'initial_entry': 'Entry',
+    'scale_up_condition': 'Scale Up',
+    'scale_down_condition': 'Scale Down',
+    'wrong_scenario': 'If Wrong',
+}
+
+_DOLLAR_PRICE = re.compile(r"\$\s*(\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)")
+# Bare numbers that aren't sizes or percentages ("100 shares", "50%", "2x"),
+# times of day ("9:45", "10am"), durations ("15 minutes", "3 bars"),
+# multiples ("2 ATR", "1.5R") or moving-average lengths ("20 EMA")
+_NOT_A_PRICE = (r"%|shares?\b|sh\b|x\b|lots?\b"
+                r"|(?i:[ap]\.?m\b|m(?:in(?:ute)?s?)?\b|h(?:rs?|ours?)?\b|sec(?:ond)?s?\b|d(?:ays?)?\b"
+                r"|weeks?\b|bars?\b|candles?\b|sessions?\b|atrs?\b|r\b|[sed]?ma\b)")
+_BARE_PRICE = re.compile(rf"(?<![\w.$:])(\d+(?:\.\d+)?)(?![\d.:]|\s*(?:{_NOT_A_PRICE}))")
+
+_DIRECTIONS = {'touch': 0, 'above': 1, 'below': -1}
+
+# Saved with each plan's levels; bump it when parsing changes so levels saved
+# by an older parser are read from the plan text again
+LEVELS_VERSION = 2
+
+
+def parse_price_levels(text: str) -> List[float]:
+    """Extract price levels from free text like "$145 - cut 50%, $140 - full stop".
+
+    Dollar amounts win; bare numbers are only used when the text has none.
+    """
+    if not text:
+        return []
+    prices = [float(match.replace(',', '')) for match in _DOLLAR_PRICE.findall(text)]
+    if not prices:
+        prices = [float(match) for match in _BARE_PRICE.findall(text)]
+    return [price for price in prices if price > 0]
+
+
+def parse_plan_levels(plan_data: Dict) -> Dict[str, List[float]]:
+    """Get the numeric levels for each price field of a stock plan"""
+    levels = {}
+    for field in PLAN_LEVEL_FIELDS:
+        prices = parse_price_levels(plan_data.get(field, ''))
+        if prices:
+            levels[field] = prices
+    return levels
+
+
+def saved_plan_levels(plan_data: Dict) -> Dict[str, List[float]]:
+    """The levels saved with a plan, re-parsed if an older parser saved them"""
+    if plan_data.get('levels_version') == LEVELS_VERSION and 'levels' in plan_data:
+        return plan_data['levels']
+    return parse_plan_levels(plan_data)
+
+
+def evaluate_plan_alerts(plans: Dict[str, Dict], quotes: "pd.DataFrame") -> "pd.DataFrame":
+    """Check every plan level against the session's price range in one sweep.
+
+    quotes is indexed by symbol with "Price", "High" and "Low" columns (as
+    returned by compute_watchlist_metrics). "above" levels trigger when the
+    high reaches them, "below" levels when the low does, and "touch" levels
+    when the level lies inside the session range.
+    """
+    # Only the Trading Day view evaluates alerts; parsing levels doesn't need these
+    import numpy as np
+    import pandas as pd
+
+    columns = ['Symbol', 'Plan', 'Level', 'Price', 'Condition']
+    symbol_index = {symbol: i for i, symbol in enumerate(quotes.index)}
+
+    rows, fields, levels, directions = [], [], [], []
+    for symbol, plan_data in plans.items():
+        if symbol not in symbol_index:
+            continue
+        for field, prices in saved_plan_levels(plan_data).items():
+            for price in prices:
+                rows.append(symbol_index[symbol])
+                fields.append(field)
+                levels.append(price)
+                directions.append(_DIRECTIONS[PLAN_LEVEL_FIELDS[field]])
+    if not rows:
+        return pd.DataFrame(columns=columns)
+
+    rows = np.asarray(rows)
+    levels = np.asarray(levels, dtype=float)
+    directions = np.asarray(directions)
+    high = quotes['High'].to_numpy(dtype=float)[rows]
+    low = quotes['Low'].to_numpy(dtype=float)[rows]
+
+    triggered = np.where(
+        directions > 0, high >= levels,
+        np.where(directions < 0, low <= levels, (low <= levels) & (high >= levels))
+    )
+    hits = np.flatnonzero(triggered)
+    return pd.DataFrame({
+        'Symbol': quotes.index.to_numpy()[rows[hits]],
+        'Plan': [FIELD_LABELS[fields[i]] for i in hits],
+        'Level': levels[hits],
+        'Price': quotes['Price'].to_numpy(dtype=float)[rows[hits]],
+        'Condition': np.where(directions[hits] > 0, 'reached from below',
+                              np.where(directions[hits] < 0, 'reached from above', 'traded through')),
+    }, columns=columns)
@@ -0,0 +1,255 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+from file_lock import file_lock
+
+
+class ReflectionJournal:
+    """Append-only JSONL log of daily reflections.
+
+    Every save appends one line; the last line for a date wins. A small
+    date -> byte offset index lets readers seek straight to the entries they
+    need. The index is kept in memory, caught up from the journal tail on
+    each access and persisted every few saves, so a cold start only scans
+    the lines written since the last checkpoint. Superseded lines are
+    dropped by compaction, which runs on a background thread once they
+    outnumber the live ones.
+
+    Appends and compaction hold an exclusive lock on the journal file, and
+    reads hold a shared one, so several processes can use the same journal:
+    no append lands in a file that is being replaced, and no reader seeks
+    into a compacted file with stale offsets.
+
+    Compaction starts the new file with a {"generation": ...} header line.
+    The index records the generation, inode, size and mtime of the journal
+    it was built from, and is rebuilt if any of them no longer match. A
+    compacted file can reuse the old inode and even the old size, but not
+    the generation.
+    """
+
+    CHECKPOINT_EVERY = 64
+    MIN_DEAD_FOR_COMPACTION = 64
+
+    def __init__(self, journal_file: str, index_file: str, legacy_file: Optional[str] = None):
+        self.journal_file = journal_file
+        self.index_file = index_file
+        self.legacy_file = legacy_file
+        self._lock = threading.RLock()
+        self._index = None
+        self._unsaved_lines = 0
+        self._compaction_thread = None
+
+    # Index maintenance
+    def _empty_index(self, inode=None, generation=None) -> Dict:
+        return {'inode': inode, 'generation': generation, 'mtime_ns': None,
+                'journal_size': 0, 'dead': 0, 'offsets': {}}
+
+    @staticmethod
+    def _header_generation(line: bytes) -> Optional[str]:
+        """The generation if line is a compaction header, else None"""
+        if not line.startswith(b'{"generation"'):
+            return None
+        try:
+            return json.loads(line)['generation']
+        except (ValueError, KeyError):
+            return None
+
+    def _load_index(self) -> Dict:
+        try:
+            with open(self.index_file, 'r') as f:
+                index = json.load(f)
+            if isinstance(index.get('offsets'), dict):
+                return index
+        except (json.JSONDecodeError, IOError):
+            pass
+        return self._empty_index()
+
+    def _save_index(self):
+        tmp_file = f"{self.index_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump(self._index, f)
+            os.replace(tmp_file, self.index_file)
+            self._unsaved_lines = 0
+        except (IOError, OSError):
+            pass
+
+    def _migrate_legacy(self):
+        """Convert a legacy reflections.json list into the journal, once"""
+        if os.path.exists(self.journal_file):
+            return
+        if not self.legacy_file or not os.path.exists(self.legacy_file):
+            return
+        with file_lock(self.journal_file):
+            # Another process may have migrated (and appended) meanwhile
+            if os.path.exists(self.journal_file):
+                return
+            try:
+                with open(self.legacy_file, 'r') as f:
+                    reflections = json.load(f)
+            except (json.JSONDecodeError, IOError):
+                return
+            tmp_file = f"{self.journal_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                for reflection in reflections:
+                    f.write(json.dumps(reflection) + "\n")
+            os.replace(tmp_file, self.journal_file)
+
+    def _refresh_index(self) -> Dict:
+        """Bring the in-memory index up to date with the journal file"""
+        try:
+            stat = os.stat(self.journal_file)
+        except OSError:
+            self._index = self._empty_index()
+            return self._index
+
+        if self._index is None:
+            self._index = self._load_index()
+        index = self._index
+        offsets = index['offsets']
+        with open(self.journal_file, 'rb') as f:
+            generation = self._header_generation(f.readline())
+            # A different inode or generation, a shorter file, or the same size
+            # but a newer mtime means the journal was rewritten (compacted)
+            # since the index was built, so start over.
+            if (index['inode'] != stat.st_ino or index.get('generation') != generation
+                    or index['journal_size'] > stat.st_size
+                    or (index['journal_size'] == stat.st_size and index.get('mtime_ns') != stat.st_mtime_ns)):
+                index = self._index = self._empty_index(stat.st_ino, generation)
+                offsets = index['offsets']
+            index['mtime_ns'] = stat.st_mtime_ns
+            if index['journal_size'] == stat.st_size:
+                return index
+
+            f.seek(index['journal_size'])
+            offset = index['journal_size']
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Partially written tail; picked up once it is complete
+                    break
+                if offset == 0 and generation is not None:
+                    offset += len(line)
+                    continue
+                try:
+                    date = json.loads(line).get('date')
+                except ValueError:
+                    date = None
+                if date is None or date in offsets:
+                    index['dead'] += 1
+                if date is not None:
+                    # Re-insert so the dict keeps save order
+                    offsets.pop(date, None)
+                    offsets[date] = offset
+                offset += len(line)
+                self._unsaved_lines += 1
+        index['journal_size'] = offset
+
+        if self._unsaved_lines >= self.CHECKPOINT_EVERY:
+            self._save_index()
+        return index
+
+    # Reading and writing
+    def _read_at(self, offsets: List[int]) -> List[Dict]:
+        reflections = []
+        if not offsets:
+            return reflections
+        with open(self.journal_file, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                reflections.append(json.loads(f.readline()))
+        return reflections
+
+    def get_reflections(self, since: Optional[str] = None) -> List[Dict]:
+        """Get the latest reflection per date in save order, optionally dated >= since"""
+        self._migrate_legacy()
+        with self._lock, file_lock(self.journal_file, shared=True):
+            index = self._refresh_index()
+            offsets = [
+                offset for date, offset in index['offsets'].items()
+                if since is None or date >= since
+            ]
+            return self._read_at(offsets)
+
+    def get_revision(self) -> str:
+        """Get a token that changes whenever the journal is appended to or compacted"""
+        self._migrate_legacy()
+        with self._lock, file_lock(self.journal_file, shared=True):
+            index = self._refresh_index()
+            return f"{index['inode']}:{index['generation']}:{index['journal_size']}"
+
+    def append(self, reflection_data: Dict):
+        """Append a reflection; it supersedes any earlier one for its date"""
+        self.append_many([reflection_data])
+
+    def append_many(self, reflections: List[Dict]):
+        """Append several reflections with a single write, in order"""
+        if not reflections:
+            return
+        lines = "".join(json.dumps(reflection) + "\n" for reflection in reflections).encode()
+        self._migrate_legacy()
+        with self._lock, file_lock(self.journal_file):
+            index = self._refresh_index()
+            with open(self.journal_file, 'ab') as f:
+                if f.seek(0, os.SEEK_END) > index['journal_size']:
+                    # Drop a partially written tail left by an interrupted save
+                    f.truncate(index['journal_size'])
+                f.write(lines)
+            self._refresh_index()
+        self._maybe_compact()
+
+    # Compaction
+    def needs_compaction(self) -> bool:
+        index = self._index
+        if index is None:
+            return False
+        return index['dead'] >= max(self.MIN_DEAD_FOR_COMPACTION, len(index['offsets']))
+
+    def _maybe_compact(self):
+        if not self.needs_compaction():
+            return
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        self._compaction_thread = threading.Thread(target=self.compact, daemon=True)
+        self._compaction_thread.start()
+
+    def compact(self):
+        """Rewrite the journal with only the latest line per date"""
+        self._migrate_legacy()
+        with self._lock, file_lock(self.journal_file):
+            index = self._refresh_index()
+            if not index['dead']:
+                return
+            tmp_file = f"{self.journal_file}.tmp"
+            generation = os.urandom(8).hex()
+            offsets = {}
+            with open(self.journal_file, 'rb') as src, open(tmp_file, 'wb') as dst:
+                dst.write(json.dumps({'generation': generation}).encode() + b"\n")
+                for date, offset in index['offsets'].items():
+                    src.seek(offset)
+                    offsets[date] = dst.tell()
+                    dst.write(src.readline())
+                size = dst.tell()
+            os.replace(tmp_file, self.journal_file)
+            stat = os.stat(self.journal_file)
+            self._index = {
+                'inode': stat.st_ino,
+                'generation': generation,
+                'mtime_ns': stat.st_mtime_ns,
+                'journal_size': size,
+                'dead': 0,
+                'offsets': offsets
+            }
+            self._save_index()
+
+    def release(self):
+        """Checkpoint and drop the in-memory index; it is reloaded on next use"""
+        with self._lock:
+            if self._index is not None and self._unsaved_lines:
+                self._save_index()
+            self._index = None
+
+    def wait_for_compaction(self):
+        thread = self._compaction_thread
+        if thread is not None:
+            thread.join()
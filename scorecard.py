@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+
+class ScorecardAggregates:
+    """Rolling per-day scorecard buckets derived from daily reflections.
+
+    Each bucket holds one day's mistake, broken-rule and good-practice
+    counts plus its discipline score. Buckets are updated as reflections
+    are saved and pruned to the last ROLLING_DAYS days, so scorecard
+    queries sum a handful of small dicts instead of rescanning reflections.
+    The stored document records the reflections revision it was built
+    from and is rebuilt whenever that no longer matches.
+    """
+
+    DOCUMENT = "scorecard_aggregates"
+    ROLLING_DAYS = 31
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    @staticmethod
+    def bucket_for(reflection: Dict) -> Dict:
+        """Summarize one reflection into a day bucket"""
+        def count(items):
+            counts = {}
+            for item in items:
+                counts[item] = counts.get(item, 0) + 1
+            return counts
+
+        return {
+            'mistakes': count(reflection.get('mistakes_made', [])),
+            'broken_rules': count(reflection.get('broken_rules', [])),
+            'good_practices': count(reflection.get('good_practices', [])),
+            'discipline_score': reflection.get('discipline_score')
+        }
+
+    def _window_start(self) -> str:
+        return (datetime.now() - timedelta(days=self.ROLLING_DAYS)).strftime('%Y-%m-%d')
+
+    def _build(self) -> Dict:
+        revision = self.storage.get_reflections_revision()
+        days = {}
+        for reflection in self.storage.get_reflections(since=self._window_start()):
+            if reflection.get('date'):
+                days[reflection['date']] = self.bucket_for(reflection)
+        return {'revision': revision, 'days': days}
+
+    def rebuild(self) -> Dict:
+        """Recompute the buckets for the rolling window from stored reflections"""
+        document = self._build()
+        self.storage.save_document(self.DOCUMENT, document)
+        return document
+
+    def _load(self) -> Dict:
+        document = self.storage.get_document(self.DOCUMENT)
+        if 'days' not in document or document.get('revision') != self.storage.get_reflections_revision():
+            document = self.rebuild()
+        return document
+
+    def record(self, reflection: Dict, previous_revision: Optional[str]):
+        """Fold a just-saved reflection into the buckets.
+
+        previous_revision is the reflections revision from before the save;
+        if the stored buckets were not built from it they are rebuilt
+        instead of patched. The document is updated with a conflict check,
+        so a concurrent save from another session is never overwritten.
+        """
+        def fold(document):
+            if 'days' not in document or document.get('revision') != previous_revision:
+                updated = self._build()
+            else:
+                window_start = self._window_start()
+                days = {date: bucket for date, bucket in document['days'].items() if date >= window_start}
+                if reflection['date'] >= window_start:
+                    days[reflection['date']] = self.bucket_for(reflection)
+                updated = {'revision': self.storage.get_reflections_revision(), 'days': days}
+            document.clear()
+            document.update(updated)
+
+        self.storage.update_document(self.DOCUMENT, fold)
+
+    def get_days(self, since: str) -> Dict[str, Dict]:
+        """Get day buckets dated >= since, in date order"""
+        if since < self._window_start():
+            # Older than the rolling window; summarize on the fly
+            reflections = [r for r in self.storage.get_reflections(since=since) if r.get('date')]
+            return {
+                reflection['date']: self.bucket_for(reflection)
+                for reflection in sorted(reflections, key=lambda r: r['date'])
+            }
+        days = self._load()['days']
+        return {date: days[date] for date in sorted(days) if date >= since}
@@ -0,0 +1,713 @@
+import copy
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from file_formats import decode, default_file_format, encode
+from file_lock import file_lock
+from reflection_journal import ReflectionJournal
+from tracing import span
+
+STORAGE_BACKENDS = ("json", "sqlite")
+
+
+class StorageBackend:
+    """Persistence interface for one user's trading data"""
+
+    # Watchlists
+    def get_today_stocks(self) -> List[Dict]:
+        raise NotImplementedError
+
+    def save_today_stock(self, stock: Dict) -> bool:
+        """Insert or update a stock by symbol; return True if it was new"""
+        raise NotImplementedError
+
+    def remove_today_stock(self, symbol: str):
+        raise NotImplementedError
+
+    def get_permanent_stocks(self) -> List[Dict]:
+        raise NotImplementedError
+
+    def save_permanent_stock(self, stock: Dict) -> bool:
+        """Insert or update a stock by symbol; return True if it was new"""
+        raise NotImplementedError
+
+    def remove_permanent_stock(self, symbol: str):
+        raise NotImplementedError
+
+    # Watchlist history
+    def archive_stocks(self, date: str, stocks: List[Dict]):
+        """Replace the archived watchlist for a date"""
+        raise NotImplementedError
+
+    def get_historical_stocks(self, start_date: str, end_date: str) -> Dict[str, List[Dict]]:
+        """Get archived watchlists keyed by date, for dates in [start_date, end_date]"""
+        raise NotImplementedError
+
+    def merge_historical_stocks(self, history: Dict[str, List[Dict]]) -> int:
+        """Add stocks to the archived watchlists of several dates in one write.
+
+        Symbols already archived for a date are kept as they are. Returns the
+        number of (date, symbol) entries added.
+        """
+        raise NotImplementedError
+
+    # Plans
+    def get_trading_plan(self) -> Dict:
+        raise NotImplementedError
+
+    def save_trading_plan(self, plan_data: Dict):
+        raise NotImplementedError
+
+    def get_stock_trading_plans(self) -> Dict[str, Dict]:
+        raise NotImplementedError
+
+    def save_stock_trading_plan(self, symbol: str, plan_data: Dict):
+        raise NotImplementedError
+
+    def save_stock_trading_plans(self, stock_plans: Dict[str, Dict]):
+        """Save several stocks' plans in one write, replacing existing ones"""
+        raise NotImplementedError
+
+    # Reflections
+    def get_reflections(self, since: Optional[str] = None) -> List[Dict]:
+        """Get reflections in save order, optionally only those dated >= since"""
+        raise NotImplementedError
+
+    def save_reflection(self, reflection_data: Dict):
+        """Save a reflection, replacing any existing one for the same date"""
+        raise NotImplementedError
+
+    def save_reflections(self, reflections: List[Dict]):
+        """Save several reflections in one write, in order"""
+        raise NotImplementedError
+
+    def get_reflections_revision(self) -> str:
+        """Get a token that changes whenever the stored reflections change"""
+        raise NotImplementedError
+
+    # Derived documents (aggregates and other small JSON blobs)
+    def get_document(self, name: str) -> Dict:
+        raise NotImplementedError
+
+    def save_document(self, name: str, data: Dict):
+        raise NotImplementedError
+
+    def update_document(self, name: str, mutate: Callable[[Dict], Any]) -> Any:
+        """Apply mutate to a document in place and save it, retrying on concurrent writes"""
+        raise NotImplementedError
+
+    # Housekeeping
+    def get_cache_stats(self) -> Dict:
+        return {'hits': 0, 'misses': 0, 'entries': 0, 'bytes': 0}
+
+    def clear_cache(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class JsonStorage(StorageBackend):
+    """One JSON file per data type, rewritten whole on every change.
+
+    Files are replaced atomically (temp file + rename), so readers and crashes
+    never see a half-written file. Read-modify-write changes go through
+    update_json_file, which checks the file's version (inode, mtime, size)
+    under a per-file lock before replacing it and redoes the change if
+    another session or process wrote first.
+    """
+
+    OPTIMISTIC_ATTEMPTS = 3
+
+    def __init__(self, username=None, data_dir="data", file_format=None):
+        self.data_dir = data_dir
+        self.username = username
+        # Format for writes; reads detect each file's format from its header,
+        # so files written in any format stay readable
+        self.file_format = file_format or default_file_format()
+        # Fail here, not on the first save, if the format needs a missing package
+        encode({}, self.file_format)
+        self.ensure_data_directory()
+        self.today_stocks_file = self._user_file("today_stocks.json")
+        self.permanent_stocks_file = self._user_file("permanent_stocks.json")
+        self.trading_plan_file = self._user_file("trading_plan.json")
+        self.stock_trading_plans_file = self._user_file("stock_trading_plans.json")
+        self.reflections_file = self._user_file("reflections.json")
+        self.historical_stocks_file = self._user_file("historical_stocks.json")
+        # Watchlist history is split into monthly partitions listed in a
+        # manifest; historical_stocks.json is only read once to seed them
+        self.historical_stocks_dir = self._user_file("historical_stocks")
+        self.history_manifest_file = os.path.join(self.historical_stocks_dir, "manifest.json")
+        # Reflections live in an append-only journal; reflections.json is only
+        # read once to seed it
+        self.reflection_journal = ReflectionJournal(
+            self._user_file("reflections.jsonl"),
+            self._user_file("reflections_index.json"),
+            legacy_file=self.reflections_file
+        )
+        # Parsed file contents keyed by path, validated against (inode, mtime, size)
+        self._cache = {}
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._write_conflicts = 0
+
+    def _user_file(self, filename):
+        if self.username:
+            name, ext = os.path.splitext(filename)
+            return os.path.join(self.data_dir, f"{self.username}_{name}{ext}")
+        return os.path.join(self.data_dir, filename)
+
+    def ensure_data_directory(self):
+        """Create data directory if it doesn't exist"""
+        if not os.path.exists(self.data_dir):
+            os.makedirs(self.data_dir)
+
+    @staticmethod
+    def _version(stat: os.stat_result) -> Tuple[int, int, int]:
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _current_version(self, filename: str) -> Optional[Tuple[int, int, int]]:
+        try:
+            return self._version(os.stat(filename))
+        except OSError:
+            return None
+
+    def _load_versioned(self, filename: str, default: Any) -> Tuple[Any, Optional[Tuple[int, int, int]]]:
+        """Load a file through the cache, returning its contents and version"""
+        version = self._current_version(filename)
+        if version is None:
+            self._cache.pop(filename, None)
+            return default, None
+
+        cached = self._cache.get(filename)
+        if cached is not None and cached[0] == version:
+            self._cache_hits += 1
+            return cached[1], version
+
+        self._cache_misses += 1
+        try:
+            with span("load_json_file", "storage", file=os.path.basename(filename)), open(filename, 'rb') as f:
+                # Version of the file actually parsed, in case it was replaced since the stat
+                version = self._version(os.fstat(f.fileno()))
+                data = decode(f.read())
+        except (ValueError, IOError):
+            self._cache.pop(filename, None)
+            return default, version
+        self._cache[filename] = (version, data)
+        return data, version
+
+    def load_json_file(self, filename: str, default: Any = None) -> Any:
+        """Load data from a data file (any of FILE_FORMATS) with error handling.
+
+        Parsed contents are cached per instance and reused for as long as the
+        file's inode, mtime and size are unchanged. The returned object is
+        shared with the cache, so callers must not modify it; use
+        update_json_file to change a file.
+        """
+        if default is None:
+            default = {}
+        return self._load_versioned(filename, default)[0]
+
+    def _write_file(self, filename: str, data: Any):
+        """Write data to a temp file beside filename and rename it into place"""
+        fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(filename) or ".",
+                                        prefix=os.path.basename(filename) + ".", suffix=".tmp")
+        try:
+            with span("save_json_file", "storage", file=os.path.basename(filename)), os.fdopen(fd, 'wb') as f:
+                f.write(encode(data, self.file_format))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, filename)
+        except BaseException:
+            try:
+                os.unlink(tmp_file)
+            except OSError:
+                pass
+            raise
+        self._cache[filename] = (self._version(os.stat(filename)), data)
+
+    def save_json_file(self, filename: str, data: Any):
+        """Save data to JSON file with error handling, replacing it atomically"""
+        try:
+            with file_lock(filename):
+                self._write_file(filename, data)
+        except (IOError, OSError):
+            self._cache.pop(filename, None)
+
+    def update_json_file(self, filename: str, mutate: Callable[[Any], Any], default: Any = None) -> Any:
+        """Apply mutate to a private copy of a file's contents and save it.
+
+        The save only happens if the file is unchanged since it was read;
+        otherwise the file is reread and mutate runs again on the new
+        contents. After OPTIMISTIC_ATTEMPTS conflicts the file lock is held
+        for the whole read-modify-write, so a busy file still makes
+        progress. Returns mutate's return value.
+        """
+        if default is None:
+            default = {}
+        result = None
+        for attempt in range(self.OPTIMISTIC_ATTEMPTS):
+            try:
+                current, version = self._load_versioned(filename, default)
+                data = copy.deepcopy(current)
+                result = mutate(data)
+                with file_lock(filename):
+                    if self._current_version(filename) == version:
+                        self._write_file(filename, data)
+                        return result
+            except (IOError, OSError):
+                self._cache.pop(filename, None)
+                return result
+            self._write_conflicts += 1
+            # Back off a little so concurrent writers don't keep colliding
+            time.sleep(random.uniform(0, 0.002) * (attempt + 1))
+
+        # Still contended: hold the lock across the read-modify-write
+        try:
+            with file_lock(filename):
+                data = copy.deepcopy(self._load_versioned(filename, default)[0])
+                result = mutate(data)
+                self._write_file(filename, data)
+        except (IOError, OSError):
+            self._cache.pop(filename, None)
+        return result
+
+    def get_cache_stats(self) -> Dict:
+        """Get read cache hit/miss counters"""
+        return {
+            'hits': self._cache_hits,
+            'misses': self._cache_misses,
+            'entries': len(self._cache),
+            # On-disk size of the cached files, a proxy for their parsed footprint
+            'bytes': sum(version[2] for version, _ in list(self._cache.values())),
+            'write_conflicts': self._write_conflicts
+        }
+
+    def clear_cache(self):
+        """Drop all cached file contents"""
+        self._cache.clear()
+        self.reflection_journal.release()
+
+    def close(self):
+        self.reflection_journal.wait_for_compaction()
+        self.clear_cache()
+
+    def _save_stock(self, filename: str, stock: Dict) -> bool:
+        def save(stocks):
+            for i, existing in enumerate(stocks):
+                if existing['symbol'] == stock['symbol']:
+                    stocks[i] = stock
+                    return False
+            stocks.append(stock)
+            return True
+        return self.update_json_file(filename, save, [])
+
+    def _remove_stock(self, filename: str, symbol: str):
+        def remove(stocks):
+            stocks[:] = [stock for stock in stocks if stock['symbol'] != symbol]
+        self.update_json_file(filename, remove, [])
+
+    def get_today_stocks(self) -> List[Dict]:
+        return self.load_json_file(self.today_stocks_file, [])
+
+    def save_today_stock(self, stock: Dict) -> bool:
+        return self._save_stock(self.today_stocks_file, stock)
+
+    def remove_today_stock(self, symbol: str):
+        self._remove_stock(self.today_stocks_file, symbol)
+
+    def get_permanent_stocks(self) -> List[Dict]:
+        return self.load_json_file(self.permanent_stocks_file, [])
+
+    def save_permanent_stock(self, stock: Dict) -> bool:
+        return self._save_stock(self.permanent_stocks_file, stock)
+
+    def remove_permanent_stock(self, symbol: str):
+        self._remove_stock(self.permanent_stocks_file, symbol)
+
+    def _history_partition_file(self, month: str) -> str:
+        return os.path.join(self.historical_stocks_dir, f"{month}.json")
+
+    def _get_history_manifest(self) -> Dict:
+        """Load the partition manifest, splitting a legacy history file on first use"""
+        manifest = self.load_json_file(self.history_manifest_file, {})
+        if 'partitions' in manifest:
+            return manifest
+
+        manifest = {'partitions': []}
+        if not os.path.exists(self.historical_stocks_file):
+            return manifest
+
+        partitions = {}
+        for date, stocks in self.load_json_file(self.historical_stocks_file, {}).items():
+            partitions.setdefault(date[:7], {})[date] = stocks
+        os.makedirs(self.historical_stocks_dir, exist_ok=True)
+        for month, partition in partitions.items():
+            self.save_json_file(self._history_partition_file(month), partition)
+        manifest['partitions'] = sorted(partitions)
+        self.save_json_file(self.history_manifest_file, manifest)
+        return manifest
+
+    def archive_stocks(self, date: str, stocks: List[Dict]):
+        manifest = self._get_history_manifest()
+        month = date[:7]
+        partition_file = self._history_partition_file(month)
+        os.makedirs(self.historical_stocks_dir, exist_ok=True)
+
+        def archive(partition):
+            # Copy so later edits to the (cached) watchlist don't leak into history
+            partition[date] = [dict(stock) for stock in stocks]
+        self.update_json_file(partition_file, archive, {})
+
+        if month not in manifest['partitions']:
+            def add_partition(manifest):
+                partitions = manifest.setdefault('partitions', [])
+                if month not in partitions:
+                    manifest['partitions'] = sorted(partitions + [month])
+            self.update_json_file(self.history_manifest_file, add_partition, {})
+
+    def merge_historical_stocks(self, history: Dict[str, List[Dict]]) -> int:
+        manifest = self._get_history_manifest()
+        by_month = {}
+        for date, stocks in history.items():
+            by_month.setdefault(date[:7], {})[date] = stocks
+        os.makedirs(self.historical_stocks_dir, exist_ok=True)
+
+        added = 0
+        for month, dates in sorted(by_month.items()):
+            def merge(partition):
+                count = 0
+                for date, stocks in dates.items():
+                    archived = partition.setdefault(date, [])
+                    symbols = {stock['symbol'] for stock in archived}
+                    for stock in stocks:
+                        if stock['symbol'] not in symbols:
+                            symbols.add(stock['symbol'])
+                            archived.append(dict(stock))
+                            count += 1
+                return count
+            added += self.update_json_file(self._history_partition_file(month), merge, {})
+
+        new_months = set(by_month) - set(manifest['partitions'])
+        if new_months:
+            def add_partitions(manifest):
+                manifest['partitions'] = sorted(set(manifest.get('partitions', [])) | new_months)
+            self.update_json_file(self.history_manifest_file, add_partitions, {})
+        return added
+
+    def get_historical_stocks(self, start_date: str, end_date: str) -> Dict[str, List[Dict]]:
+        manifest = self._get_history_manifest()
+        historical_data = {}
+        for month in manifest['partitions']:
+            if not start_date[:7] <= month <= end_date[:7]:
+                continue
+            partition = self.load_json_file(self._history_partition_file(month), {})
+            for date in sorted(partition):
+                if start_date <= date <= end_date:
+                    historical_data[date] = partition[date]
+        return historical_data
+
+    def get_trading_plan(self) -> Dict:
+        return self.load_json_file(self.trading_plan_file, {})
+
+    def save_trading_plan(self, plan_data: Dict):
+        self.save_json_file(self.trading_plan_file, plan_data)
+
+    def get_stock_trading_plans(self) -> Dict[str, Dict]:
+        return self.load_json_file(self.stock_trading_plans_file, {})
+
+    def save_stock_trading_plan(self, symbol: str, plan_data: Dict):
+        def save(stock_plans):
+            stock_plans[symbol] = plan_data
+        self.update_json_file(self.stock_trading_plans_file, save, {})
+
+    def save_stock_trading_plans(self, stock_plans: Dict[str, Dict]):
+        def save(existing):
+            existing.update(stock_plans)
+        self.update_json_file(self.stock_trading_plans_file, save, {})
+
+    def get_reflections(self, since: Optional[str] = None) -> List[Dict]:
+        return self.reflection_journal.get_reflections(since)
+
+    def save_reflection(self, reflection_data: Dict):
+        self.reflection_journal.append(reflection_data)
+
+    def save_reflections(self, reflections: List[Dict]):
+        self.reflection_journal.append_many(reflections)
+
+    def get_reflections_revision(self) -> str:
+        return self.reflection_journal.get_revision()
+
+    def get_document(self, name: str) -> Dict:
+        return self.load_json_file(self._user_file(f"{name}.json"), {})
+
+    def save_document(self, name: str, data: Dict):
+        self.save_json_file(self._user_file(f"{name}.json"), data)
+
+    def update_document(self, name: str, mutate: Callable[[Dict], Any]) -> Any:
+        return self.update_json_file(self._user_file(f"{name}.json"), mutate, {})
+
+
+class SqliteStorage(StorageBackend):
+    """All users' data in one SQLite database, updated a row at a time"""
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS today_stocks (
+            user TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            reason TEXT,
+            date_added TEXT,
+            PRIMARY KEY (user, symbol)
+        );
+        CREATE TABLE IF NOT EXISTS permanent_stocks (
+            user TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            reason TEXT,
+            date_added TEXT,
+            PRIMARY KEY (user, symbol)
+        );
+        CREATE TABLE IF NOT EXISTS historical_stocks (
+            user TEXT NOT NULL,
+            date TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            reason TEXT,
+            date_added TEXT,
+            PRIMARY KEY (user, date, symbol)
+        );
+        CREATE INDEX IF NOT EXISTS idx_historical_stocks_symbol
+            ON historical_stocks (user, symbol);
+        CREATE TABLE IF NOT EXISTS trading_plans (
+            user TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS stock_trading_plans (
+            user TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (user, symbol)
+        );
+        CREATE TABLE IF NOT EXISTS reflections (
+            user TEXT NOT NULL,
+            date TEXT NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (user, date)
+        );
+        CREATE TABLE IF NOT EXISTS documents (
+            user TEXT NOT NULL,
+            name TEXT NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (user, name)
+        );
+    '''
+
+    def __init__(self, username=None, data_dir="data", db_path=None):
+        if not os.path.exists(data_dir):
+            os.makedirs(data_dir)
+        self.username = username
+        self.user = username or ''
+        self.db_path = db_path or os.path.join(data_dir, "daytrader.db")
+        self._conn = None
+        # Reentrant so update_document's mutate can run queries
+        self._lock = threading.RLock()
+        with self._lock:
+            self.conn.executescript(self.SCHEMA)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """The connection, reopened if the storage was closed while still in use"""
+        with self._lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+                self._conn.row_factory = sqlite3.Row
+                self._conn.execute('PRAGMA journal_mode=WAL')
+                self._conn.execute('PRAGMA synchronous=NORMAL')
+            return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _query(self, sql: str, params=()) -> List[sqlite3.Row]:
+        with span("sqlite_query", "storage", sql=sql.split(None, 1)[0]), self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _stock_row(row) -> Dict:
+        return {'symbol': row['symbol'], 'reason': row['reason'], 'date_added': row['date_added']}
+
+    def _get_stocks(self, table: str) -> List[Dict]:
+        rows = self._query(
+            f'SELECT symbol, reason, date_added FROM {table} WHERE user=? ORDER BY rowid',
+            (self.user,)
+        )
+        return [self._stock_row(row) for row in rows]
+
+    def _save_stock(self, table: str, stock: Dict) -> bool:
+        with self._lock, self.conn:
+            exists = self.conn.execute(
+                f'SELECT 1 FROM {table} WHERE user=? AND symbol=?',
+                (self.user, stock['symbol'])
+            ).fetchone() is not None
+            self.conn.execute(
+                f'''INSERT INTO {table} (user, symbol, reason, date_added) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (user, symbol) DO UPDATE
+                    SET reason=excluded.reason, date_added=excluded.date_added''',
+                (self.user, stock['symbol'], stock.get('reason'), stock.get('date_added'))
+            )
+        return not exists
+
+    def _remove_stock(self, table: str, symbol: str):
+        with self._lock, self.conn:
+            self.conn.execute(f'DELETE FROM {table} WHERE user=? AND symbol=?', (self.user, symbol))
+
+    def get_today_stocks(self) -> List[Dict]:
+        return self._get_stocks('today_stocks')
+
+    def save_today_stock(self, stock: Dict) -> bool:
+        return self._save_stock('today_stocks', stock)
+
+    def remove_today_stock(self, symbol: str):
+        self._remove_stock('today_stocks', symbol)
+
+    def get_permanent_stocks(self) -> List[Dict]:
+        return self._get_stocks('permanent_stocks')
+
+    def save_permanent_stock(self, stock: Dict) -> bool:
+        return self._save_stock('permanent_stocks', stock)
+
+    def remove_permanent_stock(self, symbol: str):
+        self._remove_stock('permanent_stocks', symbol)
+
+    def archive_stocks(self, date: str, stocks: List[Dict]):
+        with self._lock, self.conn:
+            self.conn.execute('DELETE FROM historical_stocks WHERE user=? AND date=?', (self.user, date))
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO historical_stocks (user, date, symbol, reason, date_added) VALUES (?, ?, ?, ?, ?)',
+                [(self.user, date, s['symbol'], s.get('reason'), s.get('date_added')) for s in stocks]
+            )
+
+    def merge_historical_stocks(self, history: Dict[str, List[Dict]]) -> int:
+        with self._lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO historical_stocks (user, date, symbol, reason, date_added) VALUES (?, ?, ?, ?, ?)',
+                [(self.user, date, s['symbol'], s.get('reason'), s.get('date_added'))
+                 for date, stocks in history.items() for s in stocks]
+            )
+            return self.conn.total_changes - before
+
+    def get_historical_stocks(self, start_date: str, end_date: str) -> Dict[str, List[Dict]]:
+        rows = self._query(
+            '''SELECT date, symbol, reason, date_added FROM historical_stocks
+               WHERE user=? AND date BETWEEN ? AND ? ORDER BY date, rowid''',
+            (self.user, start_date, end_date)
+        )
+        historical_data = {}
+        for row in rows:
+            historical_data.setdefault(row['date'], []).append(self._stock_row(row))
+        return historical_data
+
+    def get_trading_plan(self) -> Dict:
+        rows = self._query('SELECT data FROM trading_plans WHERE user=?', (self.user,))
+        return json.loads(rows[0]['data']) if rows else {}
+
+    def save_trading_plan(self, plan_data: Dict):
+        with self._lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO trading_plans (user, data) VALUES (?, ?)',
+                (self.user, json.dumps(plan_data))
+            )
+
+    def get_stock_trading_plans(self) -> Dict[str, Dict]:
+        rows = self._query(
+            'SELECT symbol, data FROM stock_trading_plans WHERE user=? ORDER BY rowid',
+            (self.user,)
+        )
+        return {row['symbol']: json.loads(row['data']) for row in rows}
+
+    def save_stock_trading_plan(self, symbol: str, plan_data: Dict):
+        with self._lock, self.conn:
+            self.conn.execute(
+                '''INSERT INTO stock_trading_plans (user, symbol, data) VALUES (?, ?, ?)
+                   ON CONFLICT (user, symbol) DO UPDATE SET data=excluded.data''',
+                (self.user, symbol, json.dumps(plan_data))
+            )
+
+    def save_stock_trading_plans(self, stock_plans: Dict[str, Dict]):
+        with self._lock, self.conn:
+            self.conn.executemany(
+                '''INSERT INTO stock_trading_plans (user, symbol, data) VALUES (?, ?, ?)
+                   ON CONFLICT (user, symbol) DO UPDATE SET data=excluded.data''',
+                [(self.user, symbol, json.dumps(plan_data)) for symbol, plan_data in stock_plans.items()]
+            )
+
+    def get_reflections(self, since: Optional[str] = None) -> List[Dict]:
+        rows = self._query(
+            'SELECT data FROM reflections WHERE user=? AND date>=? ORDER BY rowid',
+            (self.user, since or '')
+        )
+        return [json.loads(row['data']) for row in rows]
+
+    def save_reflection(self, reflection_data: Dict):
+        # REPLACE deletes and reinserts, so a resaved date moves to the end
+        # just like it does in the JSON list.
+        with self._lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO reflections (user, date, data) VALUES (?, ?, ?)',
+                (self.user, reflection_data['date'], json.dumps(reflection_data))
+            )
+
+    def save_reflections(self, reflections: List[Dict]):
+        with self._lock, self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO reflections (user, date, data) VALUES (?, ?, ?)',
+                [(self.user, reflection['date'], json.dumps(reflection)) for reflection in reflections]
+            )
+
+    def get_reflections_revision(self) -> str:
+        # Every save gets a new rowid, so (count, max rowid) changes on each write
+        rows = self._query('SELECT COUNT(*), MAX(rowid) FROM reflections WHERE user=?', (self.user,))
+        return f"{rows[0][0]}:{rows[0][1]}"
+
+    def get_document(self, name: str) -> Dict:
+        rows = self._query('SELECT data FROM documents WHERE user=? AND name=?', (self.user, name))
+        return json.loads(rows[0]['data']) if rows else {}
+
+    def save_document(self, name: str, data: Dict):
+        with self._lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO documents (user, name, data) VALUES (?, ?, ?)',
+                (self.user, name, json.dumps(data))
+            )
+
+    def update_document(self, name: str, mutate: Callable[[Dict], Any]) -> Any:
+        with self._lock, self.conn:
+            # Take the write lock up front so no other connection can change the row in between
+            self.conn.execute('BEGIN IMMEDIATE')
+            rows = self.conn.execute(
+                'SELECT data FROM documents WHERE user=? AND name=?', (self.user, name)
+            ).fetchall()
+            document = json.loads(rows[0]['data']) if rows else {}
+            result = mutate(document)
+            self.conn.execute(
+                'INSERT OR REPLACE INTO documents (user, name, data) VALUES (?, ?, ?)',
+                (self.user, name, json.dumps(document))
+            )
+        return result
+
+
+def create_storage(username=None, backend=None, data_dir="data") -> StorageBackend:
+    """Create the storage backend selected by name or DAYTRADER_STORAGE"""
+    backend = backend or os.environ.get("DAYTRADER_STORAGE", "json")
+    if backend == "json":
+        return JsonStorage(username=username, data_dir=data_dir)
+    if backend == "sqlite":
+        return SqliteStorage(username=username, data_dir=data_dir)
+    raise ValueError(f"Unknown storage backend: {backend} (expected one of {', '.join(STORAGE_BACKENDS)})")
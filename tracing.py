@@ -0,0 +1,239 @@
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+class RerunTrace:
+    """Spans recorded during one rerun of the app script"""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.thread_id = threading.get_ident()
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration = None
+        self.spans = []
+        self.profile = None
+
+    def to_dict(self) -> Dict:
+        return {
+            'label': self.label,
+            'started_at': self.started_at,
+            'duration_ms': (self.duration or 0) * 1000,
+            'spans': [dict(span) for span in self.spans],
+            'profile': self.profile
+        }
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack at a fixed interval.
+
+    Uses sys._current_frames() from a helper thread, so the traced code runs
+    unmodified; stacks are counted as "outer;...;inner" strings.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005, max_depth: int = 40):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Dict[str, int]:
+        self._stop.set()
+        self._thread.join()
+        return dict(self.stacks)
+
+
+class Tracer:
+    """Collects span timelines per rerun.
+
+    Each rerun is traced on the thread that runs it. Worker threads doing
+    work for a rerun record into it once the rerun is handed to them
+    (handoff() on the rerun thread, attach() on the worker); their spans
+    carry the worker's thread id. Other spans opened outside a rerun
+    (background refreshes) are not recorded. When profiling is on, every
+    rerun is sampled and the profiles of the keep_profiles slowest reruns
+    are kept.
+    """
+
+    def __init__(self, enabled: bool = False, profile: bool = False, history: int = 50,
+                 keep_profiles: int = 5, profile_interval: float = 0.005):
+        self.enabled = enabled
+        self.profile = profile
+        self.profile_interval = profile_interval
+        self.keep_profiles = keep_profiles
+        self.reruns = deque(maxlen=history)
+        self.slowest = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _current(self) -> Optional[RerunTrace]:
+        return getattr(self._local, 'rerun', None)
+
+    def begin_rerun(self, label: str = "rerun"):
+        """Start recording a rerun on the calling thread"""
+        if not self.enabled:
+            return
+        rerun = RerunTrace(label)
+        self._local.rerun = rerun
+        self._local.depth = 0
+        if self.profile:
+            self._local.profiler = SamplingProfiler(rerun.thread_id, self.profile_interval)
+            self._local.profiler.start()
+
+    def end_rerun(self) -> Optional[RerunTrace]:
+        """Finish the calling thread's rerun and file it in the history"""
+        rerun = self._current()
+        if rerun is None:
+            return None
+        self._local.rerun = None
+        rerun.duration = time.perf_counter() - rerun.start
+        profiler = getattr(self._local, 'profiler', None)
+        if profiler is not None:
+            self._local.profiler = None
+            rerun.profile = profiler.stop()
+
+        with self._lock:
+            self.reruns.append(rerun)
+            if rerun.profile is not None:
+                self.slowest.append(rerun)
+                self.slowest.sort(key=lambda r: r.duration, reverse=True)
+                del self.slowest[self.keep_profiles:]
+        return rerun
+
+    def handoff(self) -> Optional[tuple]:
+        """The calling thread's rerun and span depth, to pass to attach() on a worker"""
+        rerun = self._current() if self.enabled else None
+        return None if rerun is None else (rerun, self._local.depth)
+
+    @contextmanager
+    def attach(self, handoff: Optional[tuple]):
+        """Record this thread's spans into a rerun from handoff(), nested where it was taken"""
+        if handoff is None:
+            yield
+            return
+        previous = self._current(), getattr(self._local, 'depth', 0)
+        self._local.rerun, self._local.depth = handoff
+        try:
+            yield
+        finally:
+            self._local.rerun, self._local.depth = previous
+
+    @contextmanager
+    def span(self, name: str, category: str = "app", **args):
+        """Time a block as a span of the current rerun"""
+        rerun = self._current() if self.enabled else None
+        if rerun is None:
+            yield
+            return
+        depth = self._local.depth
+        self._local.depth = depth + 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self._local.depth = depth
+            rerun.spans.append({
+                'name': name,
+                'category': category,
+                'start_ms': (start - rerun.start) * 1000,
+                'duration_ms': (end - start) * 1000,
+                'depth': depth,
+                'tid': threading.get_ident(),
+                'args': args
+            })
+
+    def traced(self, name=None, category: str = "app"):
+        """Decorator form of span, named after the function by default.
+
+        Usable bare (@traced) or with arguments (@traced(category="storage")).
+        """
+        if callable(name):
+            return self.traced()(name)
+
+        def decorator(func):
+            span_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled or self._current() is None:
+                    return func(*args, **kwargs)
+                with self.span(span_name, category):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def get_reruns(self) -> List[RerunTrace]:
+        with self._lock:
+            return list(self.reruns)
+
+    def get_slowest(self) -> List[RerunTrace]:
+        with self._lock:
+            return list(self.slowest)
+
+    def clear(self):
+        with self._lock:
+            self.reruns.clear()
+            self.slowest.clear()
+
+
+def to_chrome_trace(reruns: List[RerunTrace]) -> Dict:
+    """Convert reruns to the Chrome trace event format (chrome://tracing, Perfetto)"""
+    events = []
+    for rerun in reruns:
+        base_us = rerun.started_at * 1e6
+        events.append({
+            'name': rerun.label, 'cat': 'rerun', 'ph': 'X', 'pid': os.getpid(), 'tid': rerun.thread_id,
+            'ts': base_us, 'dur': (rerun.duration or 0) * 1e6
+        })
+        for span in rerun.spans:
+            events.append({
+                'name': span['name'], 'cat': span['category'], 'ph': 'X', 'pid': os.getpid(),
+                'tid': span.get('tid', rerun.thread_id), 'ts': base_us + span['start_ms'] * 1000,
+                'dur': span['duration_ms'] * 1000, 'args': {k: str(v) for k, v in span['args'].items()}
+            })
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def top_stacks(profile: Dict[str, int], limit: int = 10) -> List[Dict]:
+    """Most sampled stacks of a profile, innermost frame first"""
+    total = sum(profile.values()) or 1
+    return [
+        {'samples': count, 'share %': count / total * 100, 'stack': " ← ".join(reversed(stack.split(";")))}
+        for stack, count in Counter(profile).most_common(limit)
+    ]
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes", "on")
+
+
+# Process-wide tracer; DAYTRADER_TRACE turns tracing on, DAYTRADER_PROFILE adds sampling
+tracer = Tracer(
+    enabled=_env_flag("DAYTRADER_TRACE") or _env_flag("DAYTRADER_PROFILE"),
+    profile=_env_flag("DAYTRADER_PROFILE")
+)
+span = tracer.span
+traced = tracer.traced
@@ -0,0 +1,493 @@
+import json
+import os
+import re
+import tempfile
+import threading
+from datetime import time as time_of_day
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from file_formats import decode
+from file_lock import file_lock
+from plan_levels import saved_plan_levels
+
+FILL_COLUMNS = ["time", "symbol", "quantity", "price", "fees"]
+
+TRIP_COLUMNS = [
+    "symbol", "direction", "entry_time", "exit_time", "fills", "max_position", "open_position",
+    "avg_entry", "avg_exit", "fees", "realized", "unrealized", "closed",
+]
+
+# Positions within this many shares of zero count as flat
+FLAT_EPSILON = 1e-9
+
+# Losing trips that lost no more than this many R still respected the stop
+# (leaves room for slippage through the stop price)
+STOP_TOLERANCE_R = 1.1
+
+# Times of day without a date, like "09:31:05" or "9:31 AM"
+_TIME_ONLY = re.compile(r'^\s*\d{1,2}:\d{2}(:\d{2}(\.\d+)?)?\s*([AaPp][Mm])?\s*$')
+
+_SIDES = {
+    'BUY': 1, 'BOT': 1, 'B': 1, 'BUY TO COVER': 1, 'COVER': 1, 'LONG': 1,
+    'SELL': -1, 'SLD': -1, 'S': -1, 'SELL SHORT': -1, 'SHORT': -1,
+}
+
+
+class TradeLog:
+    """Append-only log of fills stored column-wise in numpy chunks.
+
+    Each append writes one immutable .npz chunk holding the new fills as
+    parallel arrays (time in ns, symbol codes plus the chunk's symbol table,
+    signed quantity, price, fees); once there are more than MAX_CHUNKS they
+    are merged into one. A manifest names the live chunks and is replaced
+    atomically, so a chunk only counts once the manifest lists it, and a
+    merge switches from the old chunks to the merged one in a single step;
+    chunks left behind by an interrupted append or merge are ignored and
+    removed by the next append. load() concatenates the live chunks into a
+    DataFrame and keeps it until the manifest changes. Writers hold an
+    exclusive lock on the log and readers a shared one.
+    """
+
+    MAX_CHUNKS = 32
+    MANIFEST = "manifest.json"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.lock_path = os.path.join(directory, "trades")
+        self.manifest_file = os.path.join(directory, self.MANIFEST)
+        self._lock = threading.Lock()
+        self._cache = None
+
+    def _chunk_files(self):
+        """Every chunk on disk, live or not"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(name for name in names if name.startswith("chunk_") and name.endswith(".npz"))
+
+    def _live_chunks(self):
+        """The chunks the manifest lists"""
+        try:
+            # decode() also reads a manifest some tool rewrote in another file format
+            with open(self.manifest_file, 'rb') as f:
+                return decode(f.read())['chunks']
+        except FileNotFoundError:
+            # Logs written before the manifest existed: every chunk is live
+            return self._chunk_files()
+
+    def _version(self, chunk_files) -> tuple:
+        # Chunks are never modified in place, so names identify the contents
+        return tuple(chunk_files)
+
+    def get_revision(self) -> str:
+        """Get a token that changes whenever fills are added or chunks are merged"""
+        chunk_files = self._live_chunks()
+        return f"{len(chunk_files)}:{chunk_files[-1] if chunk_files else ''}"
+
+    # Writing
+    def _replace_file(self, name: str, write: Callable):
+        """Write a file in the log directory via a temp file and atomic rename"""
+        fd, tmp_file = tempfile.mkstemp(dir=self.directory, prefix=name + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, os.path.join(self.directory, name))
+        except BaseException:
+            if os.path.exists(tmp_file):
+                os.unlink(tmp_file)
+            raise
+
+    def _write_chunk(self, arrays: Dict[str, np.ndarray]) -> str:
+        # Number past every chunk on disk, so leftovers are never reused
+        chunk_files = self._chunk_files()
+        sequence = int(chunk_files[-1][6:-4]) + 1 if chunk_files else 0
+        name = f"chunk_{sequence:08d}.npz"
+        self._replace_file(name, lambda f: np.savez(f, **arrays))
+        return name
+
+    def _write_manifest(self, chunk_files):
+        self._replace_file(self.MANIFEST, lambda f: f.write(json.dumps({'chunks': chunk_files}).encode()))
+
+    @staticmethod
+    def _to_arrays(fills: pd.DataFrame) -> Dict[str, np.ndarray]:
+        symbols, codes = np.unique(fills['symbol'].to_numpy(dtype=str), return_inverse=True)
+        return {
+            'time': fills['time'].to_numpy(dtype='datetime64[ns]').view('int64'),
+            'symbols': symbols,
+            'symbol_codes': codes.astype(np.int32),
+            'quantity': fills['quantity'].to_numpy(dtype=float),
+            'price': fills['price'].to_numpy(dtype=float),
+            'fees': fills['fees'].to_numpy(dtype=float),
+        }
+
+    def append(self, fills: pd.DataFrame) -> int:
+        """Append fills (see normalize_fills) as one chunk; return the number added"""
+        fills = normalize_fills(fills)
+        if fills.empty:
+            return 0
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, file_lock(self.lock_path):
+            chunk_files = self._live_chunks() + [self._write_chunk(self._to_arrays(fills))]
+            if len(chunk_files) > self.MAX_CHUNKS:
+                # Merge; the old chunks stop counting once the manifest is replaced
+                chunk_files = [self._write_chunk(self._to_arrays(self._read_chunks(chunk_files)))]
+            self._write_manifest(chunk_files)
+            self._remove_unlisted(chunk_files)
+        return len(fills)
+
+    def _remove_unlisted(self, chunk_files):
+        """Delete merged-away chunks and leftovers of interrupted writes"""
+        for name in set(self._chunk_files()) - set(chunk_files):
+            os.unlink(os.path.join(self.directory, name))
+
+    # Reading
+    def _read_chunks(self, chunk_files) -> pd.DataFrame:
+        if not chunk_files:
+            return pd.DataFrame({
+                'time': pd.Series(dtype='datetime64[ns]'),
+                'symbol': pd.Categorical([]),
+                'quantity': pd.Series(dtype=float),
+                'price': pd.Series(dtype=float),
+                'fees': pd.Series(dtype=float),
+            }, columns=FILL_COLUMNS)
+
+        chunks = []
+        for name in chunk_files:
+            with np.load(os.path.join(self.directory, name)) as chunk:
+                chunks.append({key: chunk[key] for key in chunk.files})
+
+        # Each chunk has its own symbol table; map its codes onto a shared one
+        offsets = np.cumsum([0] + [len(chunk['symbols']) for chunk in chunks])
+        categories, inverse = np.unique(np.concatenate([chunk['symbols'] for chunk in chunks]),
+                                        return_inverse=True)
+        codes = inverse[np.concatenate([chunk['symbol_codes'] + offset
+                                        for chunk, offset in zip(chunks, offsets)])]
+        column = lambda key: np.concatenate([chunk[key] for chunk in chunks])
+        return pd.DataFrame({
+            'time': column('time').view('datetime64[ns]'),
+            'symbol': pd.Categorical.from_codes(codes, categories=categories),
+            'quantity': column('quantity'),
+            'price': column('price'),
+            'fees': column('fees'),
+        }, columns=FILL_COLUMNS)
+
+    def load(self) -> pd.DataFrame:
+        """Get every fill in the order it was logged"""
+        if not os.path.isdir(self.directory):
+            # Nothing logged yet; the directory (and its lock) appear on first append
+            return self._read_chunks([])
+        with self._lock, file_lock(self.lock_path, shared=True):
+            chunk_files = self._live_chunks()
+            version = self._version(chunk_files)
+            if self._cache is None or self._cache[0] != version:
+                fills = self._read_chunks(chunk_files)
+                self._cache = (version, fills, frame_bytes(fills))
+            return self._cache[1]
+
+    def get_cache_bytes(self) -> int:
+        """Memory held by the loaded fills"""
+        cache = self._cache
+        return cache[2] if cache is not None else 0
+
+    def release(self):
+        """Drop the loaded fills; they are reread on next use"""
+        with self._lock:
+            self._cache = None
+
+
+def frame_bytes(frame: pd.DataFrame) -> int:
+    """In-memory size of a fills or round-trips frame, strings included"""
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+def normalize_fills(fills: pd.DataFrame) -> pd.DataFrame:
+    """Validate fills into time, symbol, signed quantity, price and fees columns.
+
+    Accepts a signed quantity, or an unsigned one plus a side column
+    (buy/sell and broker spellings like BOT/SLD). Missing fees count as
+    zero. Times may be full timestamps, or times of day combined with a
+    separate date column (as in many broker exports); a date column alone
+    stands in for time. Raises ValueError naming the first bad row, which
+    includes a time of day with no date to go with it.
+    """
+    fills = fills.rename(columns=lambda column: str(column).strip().lower().replace(' ', '_'))
+    fills = fills.rename(columns={'ticker': 'symbol', 'qty': 'quantity', 'shares': 'quantity',
+                                  'commission': 'fees', 'fee': 'fees', 'action': 'side'})
+    if 'time' not in fills and 'date' in fills:
+        fills = fills.rename(columns={'date': 'time'})
+    missing = [column for column in ('time', 'symbol', 'quantity', 'price') if column not in fills]
+    if missing:
+        raise ValueError(f"Fills are missing column(s): {', '.join(missing)}")
+    if fills.empty:
+        return pd.DataFrame(columns=FILL_COLUMNS)
+
+    def bad(mask, problem):
+        if mask.any():
+            row = int(np.flatnonzero(np.asarray(mask))[0])
+            raise ValueError(f"Fill {row + 1}: {problem}")
+
+    time = fills['time']
+    time_only = time.map(lambda value: isinstance(value, time_of_day)
+                         or (isinstance(value, str) and bool(_TIME_ONLY.match(value))))
+    if 'date' in fills:
+        # Put each time of day on its row's date instead of letting it default to today
+        date = pd.to_datetime(fills['date'], errors='coerce', format='mixed').dt.strftime('%Y-%m-%d')
+        bad(time_only & date.isna(), "time has no date")
+        time = time.astype(object).where(~time_only, date + ' ' + time.astype(str).str.strip())
+    else:
+        bad(time_only, "time has no date")
+    time = pd.to_datetime(time, errors='coerce', format='mixed')
+    if getattr(time.dt, 'tz', None) is not None:
+        time = time.dt.tz_localize(None)
+    bad(time.isna(), "invalid time")
+
+    symbol = fills['symbol'].astype(str).str.strip().str.upper()
+    bad((symbol == '') | (symbol == 'NAN'), "missing symbol")
+
+    quantity = pd.to_numeric(fills['quantity'], errors='coerce')
+    if 'side' in fills:
+        side = fills['side'].astype(str).str.strip().str.upper().map(_SIDES)
+        bad(side.isna(), "unknown side")
+        quantity = quantity.abs() * side
+    bad(~np.isfinite(quantity) | (quantity == 0), "quantity must be a non-zero number")
+
+    price = pd.to_numeric(fills['price'], errors='coerce')
+    bad(~np.isfinite(price) | (price <= 0), "price must be positive")
+
+    fees = pd.to_numeric(fills['fees'], errors='coerce').fillna(0).abs() if 'fees' in fills \
+        else pd.Series(0.0, index=fills.index)
+
+    return pd.DataFrame({
+        'time': time.to_numpy(dtype='datetime64[ns]'),
+        'symbol': symbol.to_numpy(),
+        'quantity': quantity.to_numpy(dtype=float),
+        'price': price.to_numpy(dtype=float),
+        'fees': fees.to_numpy(dtype=float),
+    }, columns=FILL_COLUMNS)
+
+
+def fill_frame(symbol: str, side: str, quantity: float, price: float, fees: float = 0.0,
+               time=None) -> pd.DataFrame:
+    """A one-row fills frame for a single execution"""
+    return pd.DataFrame({'time': [time], 'symbol': [symbol], 'side': [side],
+                         'quantity': [quantity], 'price': [price], 'fees': [fees]})
+
+
+# Analytics
+def _grouped_position(codes: np.ndarray, quantity: np.ndarray) -> np.ndarray:
+    """Running position per symbol for fills sorted by symbol"""
+    totals = np.cumsum(quantity)
+    starts = np.r_[True, codes[1:] != codes[:-1]]
+    first = np.maximum.accumulate(np.where(starts, np.arange(len(codes)), 0))
+    return totals - (totals[first] - quantity[first])
+
+
+def _empty_round_trips() -> pd.DataFrame:
+    """No round trips, with the same column dtypes as compute_round_trips returns"""
+    return pd.DataFrame({
+        'symbol': pd.Categorical([]),
+        'direction': pd.Series(dtype=str),
+        'entry_time': pd.Series(dtype='datetime64[ns]'),
+        'exit_time': pd.Series(dtype='datetime64[ns]'),
+        'fills': pd.Series(dtype=np.int64),
+        'max_position': pd.Series(dtype=float),
+        'open_position': pd.Series(dtype=float),
+        'avg_entry': pd.Series(dtype=float),
+        'avg_exit': pd.Series(dtype=float),
+        'fees': pd.Series(dtype=float),
+        'realized': pd.Series(dtype=float),
+        'unrealized': pd.Series(dtype=float),
+        'closed': pd.Series(dtype=bool),
+    }, columns=TRIP_COLUMNS)
+
+
+def compute_round_trips(fills: pd.DataFrame) -> pd.DataFrame:
+    """Group fills into flat-to-flat round trips per symbol, in one vectorized pass.
+
+    A trip starts with a fill from a flat position and ends when the
+    position is flat again; a fill that reverses the position is split into
+    a closing and an opening part (fees pro rata). Entries are the fills in
+    the trip's direction and the rest are exits, priced against the
+    weighted average entry. realized includes every fee; unrealized is
+    left at 0 here and filled in by apply_marks.
+    """
+    if fills.empty:
+        return _empty_round_trips()
+
+    symbols = fills['symbol'].astype('category')
+    codes = symbols.cat.codes.to_numpy()
+    time = fills['time'].to_numpy(dtype='datetime64[ns]').view('int64')
+    order = np.lexsort((np.arange(len(fills)), time, codes))
+    codes, time = codes[order], time[order]
+    quantity = fills['quantity'].to_numpy(dtype=float)[order]
+    price = fills['price'].to_numpy(dtype=float)[order]
+    fees = fills['fees'].to_numpy(dtype=float)[order]
+
+    position = _grouped_position(codes, quantity)
+    before = position - quantity
+    reversals = np.flatnonzero((before * position < 0) & (np.abs(before) > FLAT_EPSILON)
+                                & (np.abs(position) > FLAT_EPSILON))
+    if len(reversals):
+        # Close at the reversal fill, then reopen with the remainder
+        closing = -before[reversals]
+        share = closing / quantity[reversals]
+        insert_at = reversals + 1
+        codes = np.insert(codes, insert_at, codes[reversals])
+        time = np.insert(time, insert_at, time[reversals])
+        price = np.insert(price, insert_at, price[reversals])
+        fees = np.insert(fees, insert_at, fees[reversals] * (1 - share))
+        quantity = np.insert(quantity, insert_at, position[reversals])
+        shifted = reversals + np.arange(len(reversals))
+        quantity[shifted] = closing
+        fees[shifted] *= share
+        position = _grouped_position(codes, quantity)
+        before = position - quantity
+
+    flat_before = np.abs(before) <= FLAT_EPSILON
+    trip = np.cumsum(flat_before) - 1
+    starts = np.flatnonzero(flat_before)
+    ends = np.r_[starts[1:] - 1, len(codes) - 1]
+    trips = len(starts)
+
+    direction = np.sign(quantity[starts])
+    is_entry = np.sign(quantity) == direction[trip]
+    total = lambda weights: np.bincount(trip, weights=weights, minlength=trips)
+    entry_quantity = total(np.where(is_entry, quantity, 0.0))
+    exit_quantity = total(np.where(is_entry, 0.0, quantity))
+    avg_entry = total(np.where(is_entry, quantity * price, 0.0)) / entry_quantity
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_exit = np.where(exit_quantity != 0,
+                            total(np.where(is_entry, 0.0, quantity * price)) / exit_quantity, np.nan)
+    trip_fees = total(fees)
+    exited = np.abs(exit_quantity)
+    realized = np.where(exited > 0, direction * exited * (np.nan_to_num(avg_exit) - avg_entry), 0.0) - trip_fees
+
+    open_position = position[ends]
+    closed = np.abs(open_position) <= FLAT_EPSILON
+    open_position = np.where(closed, 0.0, open_position)
+
+    return pd.DataFrame({
+        'symbol': pd.Categorical.from_codes(codes[starts], categories=symbols.cat.categories),
+        'direction': np.where(direction > 0, 'long', 'short'),
+        'entry_time': time[starts].view('datetime64[ns]'),
+        'exit_time': np.where(closed, time[ends], np.iinfo(np.int64).min).view('datetime64[ns]'),
+        'fills': np.bincount(trip, minlength=trips),
+        'max_position': np.maximum.reduceat(np.abs(position), starts),
+        'open_position': open_position,
+        'avg_entry': avg_entry,
+        'avg_exit': avg_exit,
+        'fees': trip_fees,
+        'realized': realized,
+        'unrealized': 0.0,
+        'closed': closed,
+    }, columns=TRIP_COLUMNS)
+
+
+def apply_marks(trips: pd.DataFrame, marks: Optional[Dict[str, float]]) -> pd.DataFrame:
+    """Value open trips at marks (symbol -> last price); unmarked ones get NaN"""
+    trips = trips.copy()
+    open_trips = ~trips['closed'].to_numpy(dtype=bool)
+    mark = trips['symbol'].astype(str).map(marks or {}).to_numpy(dtype=float)
+    trips['unrealized'] = np.where(open_trips, trips['open_position'] * (mark - trips['avg_entry']), 0.0)
+    return trips
+
+
+def plan_stops(plans: Dict[str, Dict]) -> pd.DataFrame:
+    """One row per (symbol, stop price) from the plans' "If Wrong" levels.
+
+    Plans without a "wrong_scenario" level fall back to their scale-down
+    levels.
+    """
+    symbols, stops = [], []
+    for symbol, plan_data in plans.items():
+        levels = saved_plan_levels(plan_data)
+        for stop in levels.get('wrong_scenario') or levels.get('scale_down_condition') or []:
+            symbols.append(symbol)
+            stops.append(float(stop))
+    return pd.DataFrame({'symbol': symbols, 'stop': np.asarray(stops, dtype=float)})
+
+
+def apply_r_multiples(trips: pd.DataFrame, plans: Dict[str, Dict]) -> pd.DataFrame:
+    """Add each trip's plan stop, initial risk and R-multiple.
+
+    The stop is the nearest plan stop below the average entry for longs
+    (above it for shorts), and the risk is its distance from the entry times
+    the trip's largest position. Plans aren't versioned, so every trip is
+    measured against the symbol's current plan.
+    """
+    trips = trips.copy()
+    trips['stop'] = np.nan
+    stops = plan_stops(plans)
+    if not trips.empty and not stops.empty:
+        stops = stops.sort_values('stop')
+        stops['symbol'] = stops['symbol'].astype(str)
+        for direction, search in (('long', 'backward'), ('short', 'forward')):
+            mask = (trips['direction'] == direction).to_numpy()
+            if not mask.any():
+                continue
+            side = pd.DataFrame({
+                'row': np.flatnonzero(mask),
+                'symbol': trips['symbol'].astype(str).to_numpy()[mask],
+                'avg_entry': trips['avg_entry'].to_numpy()[mask],
+            }).sort_values('avg_entry')
+            matched = pd.merge_asof(side, stops, left_on='avg_entry', right_on='stop', by='symbol',
+                                    direction=search, allow_exact_matches=False)
+            trips.iloc[matched['row'].to_numpy(), trips.columns.get_loc('stop')] = matched['stop'].to_numpy()
+
+    risk = (trips['avg_entry'] - trips['stop']).abs() * trips['max_position']
+    trips['risk'] = risk.where(risk > 0)
+    trips['r_multiple'] = (trips['realized'] / trips['risk']).where(trips['closed'])
+    return trips
+
+
+def summarize_trades(trips: pd.DataFrame, plans: Optional[Dict[str, Dict]] = None) -> Dict:
+    """Headline P&L, win-rate, R and plan-adherence figures for analysed trips"""
+    closed = trips[trips['closed']]
+    realized = closed['realized'].to_numpy(dtype=float)
+    wins, losses = realized[realized > 0], realized[realized < 0]
+    r_multiples = closed['r_multiple'].dropna().to_numpy(dtype=float) if 'r_multiple' in closed else np.array([])
+    losing_r = r_multiples[r_multiples < 0]
+    unrealized = trips.loc[~trips['closed'], 'unrealized']
+
+    return {
+        'trades': len(closed),
+        'open_trades': int((~trips['closed']).sum()),
+        'realized': float(realized.sum()),
+        'unrealized': float(unrealized.sum()) if unrealized.notna().any() else None,
+        'unmarked_positions': int(unrealized.isna().sum()),
+        'win_rate': len(wins) / len(realized) if len(realized) else None,
+        'avg_win': float(wins.mean()) if len(wins) else None,
+        'avg_loss': float(losses.mean()) if len(losses) else None,
+        'profit_factor': float(wins.sum() / -losses.sum()) if len(losses) else None,
+        'expectancy': float(realized.mean()) if len(realized) else None,
+        'avg_r': float(r_multiples.mean()) if len(r_multiples) else None,
+        'worst_r': float(r_multiples.min()) if len(r_multiples) else None,
+        # Plan adherence
+        'planned_share': (float(closed['symbol'].astype(str).isin(list(plans)).mean())
+                          if plans is not None and len(closed) else None),
+        'with_stop_share': len(r_multiples) / len(closed) if len(closed) else None,
+        'stop_respected_share': (float((losing_r >= -STOP_TOLERANCE_R).mean())
+                                 if len(losing_r) else None),
+    }
+
+
+def daily_pnl(trips: pd.DataFrame) -> pd.DataFrame:
+    """Realized P&L, trade count and win rate per exit date"""
+    closed = trips[trips['closed']]
+    if closed.empty:
+        return pd.DataFrame(columns=['date', 'realized', 'trades', 'win_rate'])
+    grouped = closed.assign(
+        date=closed['exit_time'].dt.strftime('%Y-%m-%d'),
+        win=closed['realized'] > 0
+    ).groupby('date')
+    return pd.DataFrame({
+        'realized': grouped['realized'].sum(),
+        'trades': grouped.size(),
+        'win_rate': grouped['win'].mean(),
+    }).reset_index()
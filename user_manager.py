@@ -1,11 +1,134 @@
+import os
 import sqlite3
 import hashlib
+import hmac
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+# KDF parameters for new hashes; stored hashes carry their own, so these can
+# be raised later and old hashes are upgraded on the next login
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = 600_000
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+
+class HashQueueFull(RuntimeError):
+    """Raised when too many password hashes are already queued"""
+
+
+def hash_password(password, salt=None):
+    """Hash a password as "scrypt$n$r$p$salt$hash" (or "pbkdf2_sha256$iterations$salt$hash"
+    where OpenSSL lacks scrypt)"""
+    salt = salt or os.urandom(SALT_BYTES)
+    if hasattr(hashlib, 'scrypt'):
+        digest = hashlib.scrypt(password.encode(), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P,
+                                maxmem=256 * SCRYPT_N * SCRYPT_R, dklen=HASH_BYTES)
+        return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${digest.hex()}"
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, PBKDF2_ITERATIONS, HASH_BYTES)
+    return f"pbkdf2_sha256${PBKDF2_ITERATIONS}${salt.hex()}${digest.hex()}"
+
+
+def verify_password(password, stored):
+    """Check a password against any stored format, including legacy unsalted SHA-256"""
+    parts = stored.split('$')
+    try:
+        if parts[0] == 'scrypt' and len(parts) == 6:
+            n, r, p = (int(value) for value in parts[1:4])
+            salt, expected = bytes.fromhex(parts[4]), bytes.fromhex(parts[5])
+            digest = hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                                    maxmem=256 * n * r, dklen=len(expected))
+        elif parts[0] == 'pbkdf2_sha256' and len(parts) == 4:
+            salt, expected = bytes.fromhex(parts[2]), bytes.fromhex(parts[3])
+            digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, int(parts[1]), len(expected))
+        elif len(parts) == 1:
+            expected, digest = stored.encode(), hashlib.sha256(password.encode()).hexdigest().encode()
+        else:
+            return False
+    except (ValueError, IndexError):
+        # Malformed or truncated stored hash (bad hex, parameters or digest length)
+        return False
+    return hmac.compare_digest(digest, expected)
+
+
+def needs_rehash(stored):
+    """Whether a stored hash is legacy or uses weaker parameters than current ones"""
+    if hasattr(hashlib, 'scrypt'):
+        return not stored.startswith(f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$")
+    return not stored.startswith(f"pbkdf2_sha256${PBKDF2_ITERATIONS}$")
+
 
 class UserManager:
-    def __init__(self, db_path='users.db'):
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+    """User accounts in SQLite, safe to share across Streamlit sessions.
+
+    Each thread gets its own connection (sessions run on separate threads);
+    connections left by threads that have since exited are closed whenever
+    a new one is opened, so they don't pile up as sessions come and go. The
+    database runs in WAL mode so logins read while a registration
+    writes, and writers wait up to busy_timeout seconds for the lock.
+
+    Password hashing runs on a small worker pool. At most max_pending_hashes
+    hashes may be running or queued; callers wait up to queue_timeout for a
+    slot and then get HashQueueFull, so a login burst is turned away early
+    instead of piling up behind the KDF.
+    """
+
+    def __init__(self, db_path='users.db', busy_timeout=5.0, hash_workers=None,
+                 max_pending_hashes=32, queue_timeout=2.0):
+        self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        self.queue_timeout = queue_timeout
+        self._local = threading.local()
+        self._connections = []  # (weakref to owner thread, connection)
+        self._lock = threading.Lock()
+        self._hash_executor = ThreadPoolExecutor(
+            max_workers=hash_workers or min(4, os.cpu_count() or 1),
+            thread_name_prefix="password-hash"
+        )
+        self._hash_slots = threading.BoundedSemaphore(max_pending_hashes)
+        # Checked against for unknown usernames, so they cost as much as a wrong password
+        self._dummy_hash = hash_password(os.urandom(SALT_BYTES).hex())
+        with self.conn:
+            self.conn.execute('PRAGMA journal_mode=WAL')
         self.create_user_table()
 
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, check_same_thread=False)
+            conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout * 1000)}')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            with self._lock:
+                self._prune_connections()
+                self._connections.append((weakref.ref(threading.current_thread()), conn))
+        return conn
+
+    def _prune_connections(self):
+        """Close connections whose thread has exited; call with self._lock held"""
+        live = []
+        for owner, conn in self._connections:
+            thread = owner()
+            if thread is not None and thread.is_alive():
+                live.append((owner, conn))
+            else:
+                conn.close()
+        self._connections = live
+
+    def close(self):
+        """Close every thread's connection and stop the hash workers"""
+        self._hash_executor.shutdown(wait=True)
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for _, conn in connections:
+            conn.close()
+        self._local = threading.local()
+
     def create_user_table(self):
         with self.conn:
             self.conn.execute('''
@@ -17,11 +140,26 @@ class UserManager:
                 )
             ''')
 
+    def _run_hash(self, func, *args):
+        """Run a hashing function on the worker pool, within the queue-depth limit"""
+        if not self._hash_slots.acquire(timeout=self.queue_timeout):
+            raise HashQueueFull("Too many logins in progress, please try again in a moment.")
+        try:
+            future = self._hash_executor.submit(func, *args)
+        except RuntimeError:
+            self._hash_slots.release()
+            raise
+        future.add_done_callback(lambda _: self._hash_slots.release())
+        return future.result()
+
     def hash_password(self, password):
-        return hashlib.sha256(password.encode()).hexdigest()
+        return self._run_hash(hash_password, password)
 
     def register_user(self, username, email, password):
-        password_hash = self.hash_password(password)
+        try:
+            password_hash = self.hash_password(password)
+        except HashQueueFull as e:
+            return False, f'Error: {str(e)}'
         try:
             with self.conn:
                 self.conn.execute(
@@ -31,15 +169,33 @@ class UserManager:
             return True, 'Registration successful.'
         except sqlite3.IntegrityError as e:
             return False, f'Error: {str(e)}'
+        except sqlite3.OperationalError as e:
+            # Lock still held after busy_timeout
+            return False, f'Error: {str(e)}, please try again.'
 
     def authenticate_user(self, username, password):
-        password_hash = self.hash_password(password)
-        cur = self.conn.cursor()
-        cur.execute('SELECT * FROM users WHERE username=? AND password_hash=?', (username, password_hash))
-        user = cur.fetchone()
-        return user is not None
+        """Check a login; raises HashQueueFull when the hash queue is saturated"""
+        # Look up by the unique username index, then verify off the script thread
+        row = self.conn.execute('SELECT password_hash FROM users WHERE username=?', (username,)).fetchone()
+        if row is None:
+            # Same KDF work as a wrong password, so response times don't reveal which usernames exist
+            self._run_hash(verify_password, password, self._dummy_hash)
+            return False
+        stored = row[0]
+        if not self._run_hash(verify_password, password, stored):
+            return False
+
+        # Upgrade legacy SHA-256 hashes and outdated KDF parameters
+        if needs_rehash(stored):
+            try:
+                with self.conn:
+                    self.conn.execute('UPDATE users SET password_hash=? WHERE username=? AND password_hash=?',
+                                      (self.hash_password(password), username, stored))
+            except (HashQueueFull, sqlite3.OperationalError):
+                pass  # the login still succeeds; the upgrade happens next time
+        return True
 
     def get_user_info(self, username):
         cur = self.conn.cursor()
         cur.execute('SELECT id, username, email FROM users WHERE username=?', (username,))
-        return cur.fetchone() 
\ No newline at end of file
+        return cur.fetchone()
@@ -0,0 +1,32 @@
+import threading
+import time
+from typing import List
+
+
+class WatchRegistry:
+    """Symbols each active session is watching, deduplicated across sessions.
+
+    Sessions report their today list with watch() on every rerun; sessions
+    that stop reporting for session_ttl seconds are dropped. Kept free of
+    market data imports so registering a watchlist costs nothing on views
+    that don't chart; RefreshScheduler reads it from its background thread.
+    """
+
+    def __init__(self, session_ttl: float = 1800):
+        self.session_ttl = session_ttl
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def watch(self, session_key: str, symbols: List[str]):
+        """Register (or renew) the symbols a session is watching"""
+        with self._lock:
+            self._sessions[session_key] = (time.monotonic(), list(symbols))
+
+    def watched_symbols(self) -> List[str]:
+        """Unique symbols across all sessions that are still active"""
+        cutoff = time.monotonic() - self.session_ttl
+        with self._lock:
+            for key in [k for k, (seen, _) in self._sessions.items() if seen < cutoff]:
+                del self._sessions[key]
+            symbols = [symbol for _, watched in self._sessions.values() for symbol in watched]
+        return list(dict.fromkeys(symbols))